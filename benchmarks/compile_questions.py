@@ -0,0 +1,71 @@
+"""
+Time the compilation of a large workflow step into prompts.
+
+Builds a synthetic step of nested BooleanLists holding every question type, then
+times appform.compile_questions and prompts.build_prompts separately. Run from the
+repository root:
+
+    python benchmarks/compile_questions.py --width 12 --depth 3
+"""
+import argparse
+import time
+
+from jobbergate_cli import appform, prompts
+
+
+def leaves(prefix):
+    return [
+        appform.Text(f"{prefix}text", "Text?", default="t"),
+        appform.Integer(f"{prefix}integer", "Integer?", minval=0, maxval=10, default=1),
+        appform.List(f"{prefix}list", "List?", ["a", "b", "c"], default="a"),
+        appform.Checkbox(f"{prefix}checkbox", "Checkbox?", ["a", "b"], default=["a"]),
+        appform.Confirm(f"{prefix}confirm", "Confirm?", default=True),
+        appform.Const(f"{prefix}const", default="c"),
+    ]
+
+
+def step(width, depth, prefix="q"):
+    questions = leaves(prefix)
+    if depth:
+        for index in range(width):
+            branch = f"{prefix}{index}_"
+            questions.append(
+                appform.BooleanList(
+                    f"{branch}bool",
+                    "Branch?",
+                    default=False,
+                    whentrue=step(width, depth - 1, f"{branch}t"),
+                    whenfalse=leaves(f"{branch}f"),
+                )
+            )
+    return questions
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--width", type=int, default=12)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    questions = step(args.width, args.depth)
+    plan = appform.compile_questions(questions)
+    print(f"{len(plan)} prompts, best of {args.repeat}")
+    for name, func in (
+        ("compile_questions", lambda: appform.compile_questions(questions)),
+        ("build_prompts", lambda: prompts.build_prompts(plan)),
+    ):
+        print(f"{name:<18} {best_of(args.repeat, func) * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
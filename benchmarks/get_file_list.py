@@ -0,0 +1,62 @@
+"""
+Time jobberappslib.get_file_list on a large directory.
+
+Compares the previous glob + sorted(getmtime) implementation with the scandir one,
+with and without limit and cache. Run from the repository root:
+
+    python benchmarks/get_file_list.py --files 20000
+"""
+import argparse
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from jobbergate_cli import jobberappslib
+
+
+def previous_get_file_list(path, search_term="*.*"):
+    files = sorted(path.glob(search_term), key=os.path.getmtime, reverse=True)
+    return [x.name for x in files if x.is_file()]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory)
+        for index in range(args.files):
+            (path / f"input-{index}.dat").touch()
+        for index in range(args.files // 10):
+            (path / f"dir-{index}.d").mkdir()
+
+        # same files; the order of files with equal mtimes may differ
+        assert sorted(previous_get_file_list(path)) == sorted(
+            jobberappslib.get_file_list(path)
+        )
+        jobberappslib.get_file_list(path, cache=True)
+        cases = [
+            ("previous", lambda: previous_get_file_list(path)),
+            ("scandir", lambda: jobberappslib.get_file_list(path)),
+            ("scandir, limit=10", lambda: jobberappslib.get_file_list(path, limit=10)),
+            ("scandir, cached", lambda: jobberappslib.get_file_list(path, cache=True)),
+        ]
+        print(f"{args.files} files, best of {args.repeat}")
+        for name, func in cases:
+            print(f"{name:<20} {best_of(args.repeat, func) * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the throughput of jobbergate_cli.json_codec against the standard library.
+
+Decodes and encodes a large job script and a long application listing. Without
+orjson installed, json_codec falls back to the standard library and both columns
+match. Run from the repository root:
+
+    python benchmarks/json_codec.py --repeat 20
+"""
+import argparse
+import json
+import time
+
+from jobbergate_cli import json_codec
+
+
+def job_script():
+    files = {f"templates/input-{index}.in": "x = 1.0\n" * 1500 for index in range(10)}
+    return dict(
+        id=1,
+        job_script_name="large",
+        job_script_data_as_string=json.dumps(files),
+        job_script_owner="user@example.com",
+    )
+
+
+def listing():
+    return [
+        dict(
+            id=index,
+            application_name=f"application-{index}",
+            application_file="import os\n" * 300,
+            application_config="jobbergate_config:\n  partition: debug\n" * 30,
+            application_owner="user@example.com",
+        )
+        for index in range(3000)
+    ]
+
+
+def throughput(repeat, func, size):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat
+    return size / elapsed / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"json_codec backend: {json_codec.BACKEND}, average of {args.repeat} runs")
+    print(f"{'document':<10} {'size':>8}  {'MB/s json':>20}  {'MB/s json_codec':>20}")
+    for name, document in (("job script", job_script()), ("listing", listing())):
+        text = json.dumps(document)
+        size = len(text.encode())
+        for action, stdlib, codec in (
+            ("decode", lambda: json.loads(text), lambda: json_codec.loads(text)),
+            (
+                "encode",
+                lambda: json.dumps(document),
+                lambda: json_codec.dumps(document),
+            ),
+        ):
+            print(
+                f"{name:<10} {size / 2 ** 20:>6.1f}MB  "
+                f"{action} {throughput(args.repeat, stdlib, size):>13.0f}  "
+                f"{action} {throughput(args.repeat, codec, size):>13.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Time the output formats of the CLI on a long listing, with their peak memory.
+
+The previous table and raw output (tabulate and json.dumps of the whole listing)
+are timed next to the streaming writers of jobbergate_cli.output. Output goes to
+os.devnull. Run from the repository root:
+
+    python benchmarks/output_formats.py --rows 100000
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from tabulate import tabulate
+
+from jobbergate_cli import output
+
+
+def make_rows(count):
+    return [
+        dict(
+            id=index,
+            job_script_name=f"job-script-{index}",
+            job_script_description="parameter sweep point",
+            application=index % 50,
+            job_script_owner="user@example.com",
+            created_at="2021-12-06T10:00:00.000000",
+            updated_at="2021-12-06T10:00:00.000000",
+        )
+        for index in range(count)
+    ]
+
+
+def measure(func, rows, stream):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(rows, stream)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    cases = [
+        ("previous table", lambda r, s: print(tabulate(r, headers="keys"), file=s)),
+        ("previous raw", lambda r, s: print(json.dumps(r, indent=2), file=s)),
+    ] + [
+        (name, lambda r, s, name=name: output.write_response(r, name, s))
+        for name in output.FORMATS
+    ]
+    print(f"{args.rows} rows")
+    with open(os.devnull, "w") as stream:
+        for name, func in cases:
+            elapsed, peak = measure(func, rows, stream)
+            print(f"{name:<16} {elapsed:>8.2f} s {peak / 2 ** 20:>8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure the time and peak memory of handling a large rendered job script.
+
+A job script with --files files and --size MB in total is handled like
+get-job-script does:
+- joined into one text
+- printed one file at a time to os.devnull
+- written to a directory
+The previous in-place += loop is timed for comparison. Run from the repository root:
+
+    python benchmarks/rendered_files.py --files 500 --size 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from jobbergate_cli import render
+
+
+def previous_join(files, separator):
+    text = ""
+    for _, content in files:
+        text += separator + content
+    return text
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--size", type=int, default=100, help="total size in MB")
+    args = parser.parse_args()
+
+    content = "x" * (args.size * 2 ** 20 // args.files)
+    data = json.dumps({f"file-{index}.in": content for index in range(args.files)})
+    separator = "\nNEW_FILE\n"
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as null:
+        cases = [
+            (
+                "previous +=",
+                lambda: previous_join(render.rendered_files(data), separator),
+            ),
+            (
+                "join",
+                lambda: render.join_rendered_files(
+                    render.rendered_files(data), separator
+                ),
+            ),
+            (
+                "print",
+                lambda: render.print_rendered_files(
+                    render.rendered_files(data), null, separator
+                ),
+            ),
+            (
+                "--output-dir",
+                lambda: render.write_rendered_files(
+                    render.rendered_files(data), directory
+                ),
+            ),
+        ]
+        print(
+            f"{args.files} files, {args.size} MB; the decoded data is counted in the peak"
+        )
+        for name, func in cases:
+            elapsed, peak = measure(func)
+            print(f"{name:<14} {elapsed:>8.2f} s {peak / 2 ** 20:>8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
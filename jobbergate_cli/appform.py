@@ -4,12 +4,36 @@ Appform
 Abstraction layer for questions. Each class represents different question
 types, and QuestionBase"""
 
-from collections import deque
 from functools import partial, wraps
 
+from jobbergate_cli import registry
 
-questions = deque()
-workflows = {}
+
+# registrations made outside of any application; see registry.active for the
+# registrations of the application being evaluated
+questions = registry.DEFAULT_REGISTRY.questions
+workflows = registry.DEFAULT_REGISTRY.workflows
+
+
+def resolve_choices(choices):
+    """Returns the choices of a `List` or `Checkbox`.
+    Choices may be given as a list, or by a provider: a function without arguments
+    or an iterator (such as a generator) yielding the choices. Providers are only
+    evaluated here, when the question is shown, and each provider is evaluated once
+    per application: questions sharing a provider share its choices.
+    :param choices: List of choices, or provider of the choices
+    """
+    if not (callable(choices) or hasattr(choices, "__next__")):
+        return choices
+    active = registry.active()
+    with active.lock:
+        try:
+            return active.provided_choices[choices]
+        except KeyError:
+            pass
+        provided = list(choices() if callable(choices) else choices)
+        active.provided_choices[choices] = provided
+        return provided
 
 
 class QuestionBase:
@@ -20,6 +44,9 @@ class QuestionBase:
     :param default: Default value
     """
 
+    # __dict__ keeps the attributes applications set on their questions, such as help
+    __slots__ = ("variablename", "message", "default", "__dict__")
+
     def __init__(self, variablename, message, default):
         self.variablename = variablename
         self.message = message
@@ -33,6 +60,8 @@ class Text(QuestionBase):
     :param default: Default value
     """
 
+    __slots__ = ()
+
     def __init__(self, variablename, message, default=None):
         super().__init__(variablename, message, default)
 
@@ -46,6 +75,8 @@ class Integer(QuestionBase):
     :param default: Default value
     """
 
+    __slots__ = ("minval", "maxval")
+
     def __init__(self, variablename, message, minval=None, maxval=None, default=None):
         super().__init__(variablename, message, default)
         self.maxval = maxval
@@ -65,13 +96,19 @@ class List(QuestionBase):
     """Gives the user a list to choose one from.
     :param variablename: The variable name to set
     :param message: Message to show
-    :param choices: List with choices
+    :param choices: List with choices, or a provider of them (see `resolve_choices`)
     :param default: Default value"""
 
+    __slots__ = ("choices",)
+
     def __init__(self, variablename, message, choices, default=None):
         super().__init__(variablename, message, default)
         self.choices = choices
 
+    def get_choices(self):
+        """Returns the list of choices, evaluating their provider if needed."""
+        return resolve_choices(self.choices)
+
 
 class Directory(QuestionBase):
     """Asks for a directory name. If `exists` is `True` it checks if path exists and is a directory.
@@ -80,6 +117,8 @@ class Directory(QuestionBase):
     :param default: Default value
     :param exists: Checks if given directory exists"""
 
+    __slots__ = ("exists",)
+
     def __init__(self, variablename, message, default=None, exists=None):
         super().__init__(variablename, message, default)
         self.exists = exists
@@ -92,6 +131,8 @@ class File(QuestionBase):
     :param default: Default value
     :param exists: Checks if given file exists"""
 
+    __slots__ = ("exists",)
+
     def __init__(self, variablename, message, default=None, exists=None):
         super().__init__(variablename, message, default)
         self.exists = exists
@@ -101,13 +142,19 @@ class Checkbox(QuestionBase):
     """Gives the user a list to choose multiple entries from.
     :param variablename: The variable name to set
     :param message: Message to show
-    :param choices: List with choices
+    :param choices: List with choices, or a provider of them (see `resolve_choices`)
     :param default: Default value(s)"""
 
+    __slots__ = ("choices",)
+
     def __init__(self, variablename, message, choices, default=None):
         super().__init__(variablename, message, default)
         self.choices = choices
 
+    def get_choices(self):
+        """Returns the list of choices, evaluating their provider if needed."""
+        return resolve_choices(self.choices)
+
 
 class Confirm(QuestionBase):
     """Asks a question with an boolean answer (true/false).
@@ -116,6 +163,8 @@ class Confirm(QuestionBase):
     :param default: Default value
     """
 
+    __slots__ = ()
+
     def __init__(self, variablename, message, default=None):
         super().__init__(variablename, message, default)
 
@@ -130,6 +179,8 @@ class BooleanList(QuestionBase):
     :param whentrue: List of questions to show if user answers no/false on this question
     """
 
+    __slots__ = ("whentrue", "whenfalse")
+
     def __init__(
         self, variablename, message, default=None, whentrue=None, whenfalse=None
     ):
@@ -138,8 +189,14 @@ class BooleanList(QuestionBase):
             raise ValueError("Empty questions lists")
         self.whentrue = whentrue
         self.whenfalse = whenfalse
-        self.ignore = lambda a: a[self.variablename]
-        self.noignore = lambda a: not a[self.variablename]
+
+    def ignore(self, answers):
+        """Whether the `whenfalse` questions are hidden, given the answers so far."""
+        return bool(answers.get(self.variablename))
+
+    def noignore(self, answers):
+        """Whether the `whentrue` questions are hidden, given the answers so far."""
+        return not answers.get(self.variablename)
 
 
 class Const(QuestionBase):
@@ -149,10 +206,61 @@ class Const(QuestionBase):
     :param default: Value that variable is set to
     """
 
+    __slots__ = ()
+
     def __init__(self, variablename, default):
         super().__init__(variablename, None, default)
 
 
+def _hidden_unless(parent_hidden, variablename, answer):
+    """Visibility predicate of a BooleanList branch, composed with its parent's.
+    The predicate's `depends` attribute holds the names of the BooleanLists it reads.
+    """
+    if parent_hidden is None:
+
+        def hidden(answers):
+            return bool(answers.get(variablename)) != answer
+
+        hidden.depends = frozenset([variablename])
+    else:
+
+        def hidden(answers):
+            return parent_hidden(answers) or bool(answers.get(variablename)) != answer
+
+        hidden.depends = getattr(parent_hidden, "depends", frozenset()) | {variablename}
+    return hidden
+
+
+def compile_questions(questions, hidden=None):
+    """Flatten questions into a plan of (question, hidden) pairs, in asking order.
+    The questions of `BooleanList` branches follow their BooleanList, and `hidden` is
+    a predicate over the answers so far telling whether to skip the question, or
+    None when the question is always asked. Predicates of nested branches include
+    the ones of the enclosing branches, so a whole subtree is skipped at once.
+    :param questions: Questions returned by a workflow step
+    :param hidden: Predicate of the enclosing branch, if any
+    """
+    plan = []
+    for question in questions:
+        plan.append((question, hidden))
+        if isinstance(question, BooleanList):
+            if question.whenfalse:
+                plan.extend(
+                    compile_questions(
+                        question.whenfalse,
+                        _hidden_unless(hidden, question.variablename, False),
+                    )
+                )
+            if question.whentrue:
+                plan.extend(
+                    compile_questions(
+                        question.whentrue,
+                        _hidden_unless(hidden, question.variablename, True),
+                    )
+                )
+    return plan
+
+
 def workflow(func=None, *, name=None):
     """A decorator for workflows. Adds an workflow question and all questions
     added in the decorated question is asked after selecting workflow.
@@ -176,6 +284,6 @@ def workflow(func=None, *, name=None):
     def wrapper(*args, **kvargs):
         return func(*args, **kvargs)
 
-    workflows[name or func.__name__] = func
+    registry.active().workflows[name or func.__name__] = func
 
     return
@@ -5,13 +5,15 @@ from http.client import HTTPConnection
 import logging
 
 # import locally so we can patch them when tracing
-from requests import Session, delete, get, post, put
+from requests import Session, delete, get, patch, post, put
+from requests.adapters import HTTPAdapter
 
 
 (
     get,
     post,
     put,
+    patch,
     delete,
 )  # importable from here, we may patch them out if debugging is turned on
 
@@ -21,6 +23,9 @@ urllib3_logger = logging.getLogger("requests.packages.urllib3")
 
 DEFAULT_MAX_BYTES_DEBUG = 1000
 
+# session the request functions are bound to, once one is in use
+_session = None
+
 
 def debug_body_printer(max_bytes):
     """
@@ -39,16 +44,37 @@ def debug_requests_on(max_bytes=DEFAULT_MAX_BYTES_DEBUG):
 
     Response body will be printed as well, up to max_bytes
     """
-    global get, post, put, delete
-
     HTTPConnection.debuglevel = 1
-    sesh = Session()
-    sesh.hooks["response"] = [debug_body_printer(max_bytes)]
-    get = sesh.get
-    post = sesh.post
-    put = sesh.put
-    delete = sesh.delete
+    _use_session().hooks["response"] = [debug_body_printer(max_bytes)]
 
     logging.basicConfig(level=logging.DEBUG)
     urllib3_logger.setLevel(logging.DEBUG)
     urllib3_logger.propagate = True
+
+
+def _use_session():
+    """Bind the request functions to a session shared by this process."""
+    global get, post, put, patch, delete, _session
+
+    if _session is None:
+        _session = Session()
+        get = _session.get
+        post = _session.post
+        put = _session.put
+        patch = _session.patch
+        delete = _session.delete
+    return _session
+
+
+def use_pooled_session(pool_size):
+    """
+    Send the following requests through one session, reusing its connections.
+
+    :param pool_size: Connections kept open per host, at least the number of threads
+                      sending requests at once
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = _use_session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
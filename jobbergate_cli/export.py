@@ -0,0 +1,142 @@
+"""
+Manifest of an export of applications and job scripts to a directory tree.
+
+The manifest records, for every exported object, the updated_at it was exported at
+and the size and SHA-256 checksum of each file written for it. An export started
+again in the same directory skips the objects whose updated_at did not change and
+whose files are still in place, so an interrupted export resumes where it stopped
+and a repeated export only downloads what changed.
+
+Layout of the export directory:
+
+    manifest.json
+    application/<id>/jobbergate.py
+    application/<id>/jobbergate.yaml
+    application/<id>/metadata.json
+    job-script/<id>/files/<rendered files>
+    job-script/<id>/metadata.json
+"""
+import hashlib
+import os
+from pathlib import Path
+import shutil
+import threading
+
+from jobbergate_cli import json_codec
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# objects exported between two saves of the manifest, bounding the work redone after
+# an interruption
+SAVE_EVERY = 100
+
+
+class Manifest:
+    """
+    Manifest of an export directory, safe to update from several threads.
+
+    :param root: Export directory
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self.objects = {}
+        try:
+            data = json_codec.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            # missing, or left truncated by an interrupted export: rebuilt from scratch
+            return
+        if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+            self.objects = data.get("objects", {})
+
+    def is_current(self, key, updated_at):
+        """
+        Whether an object was exported at this updated_at, with its files in place.
+
+        Files are checked by size only; checksums are kept for verifying backups.
+        """
+        with self._lock:
+            entry = self.objects.get(key)
+        if entry is None or updated_at is None or entry["updated_at"] != updated_at:
+            return False
+        for name, details in entry["files"].items():
+            path = self.root / name
+            if not path.is_file() or path.stat().st_size != details["size"]:
+                return False
+        return True
+
+    def write_object(self, key, updated_at, files):
+        """
+        Write the files of an object under the export directory and record them.
+
+        The directory of the object is emptied first, so files the object no longer
+        has do not linger from an earlier export.
+
+        :param key: Key of the object, such as "job-script/12", also its directory
+        :param files: (relative path, text) pairs
+        """
+        directory = self.root / key
+        if directory.is_dir():
+            shutil.rmtree(str(directory))
+        written = {}
+        for name, content in files:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = content.encode()
+            path.write_bytes(data)
+            written[name] = dict(
+                size=len(data), sha256=hashlib.sha256(data).hexdigest()
+            )
+        with self._lock:
+            self.objects[key] = dict(updated_at=updated_at, files=written)
+
+    def save(self):
+        """
+        Write the manifest, replacing the previous one atomically.
+
+        The temporary file is written under the lock, so threads saving at the same
+        time do not write it together.
+        """
+        with self._lock:
+            text = json_codec.dumps(
+                dict(version=MANIFEST_VERSION, objects=self.objects),
+                indent=2,
+                sort_keys=True,
+            )
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+            tmp_path.write_text(text)
+            os.replace(str(tmp_path), str(self.path))
+
+
+def object_files(kind, entity):
+    """
+    Files of an object in the export, as (relative path, text) pairs.
+
+    Raises ValueError when a file name of a job script leads out of its directory.
+
+    :param kind: Type of the object: application, job-script
+    :param entity: Object as returned by the API, with its heavy fields
+    """
+    base = f"{kind}/{entity['id']}"
+    if kind == "application":
+        heavy = ("application_file", "application_config")
+        files = [
+            (f"{base}/jobbergate.py", entity.get("application_file") or ""),
+            (f"{base}/jobbergate.yaml", entity.get("application_config") or ""),
+        ]
+    else:
+        heavy = ("job_script_data_as_string",)
+        rendered = json_codec.loads(entity.get("job_script_data_as_string") or "{}")
+        files = []
+        for name, content in rendered.items():
+            if Path(name).is_absolute() or ".." in Path(name).parts:
+                raise ValueError(f"Invalid file name in job script: {name}")
+            files.append((f"{base}/files/{name}", content))
+    metadata = {key: value for key, value in entity.items() if key not in heavy}
+    files.append((f"{base}/metadata.json", json_codec.dumps(metadata, indent=2)))
+    return files
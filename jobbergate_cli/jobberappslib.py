@@ -1,35 +1,251 @@
+import asyncio
+from collections import defaultdict, namedtuple
+from concurrent.futures import Future
+import fnmatch
+import functools
+import getpass
+import heapq
 import os
 from pathlib import Path
 import subprocess
+import threading
+import time
+
+from jobbergate_cli import json_codec
+from jobbergate_cli.jobbergate_common import (
+    JOBBERGATE_CACHE_DIR,
+    JOBBERGATE_QUEUE_SNAPSHOT_TTL,
+    SQUEUE_PATH,
+)
+
+
+QueueRow = namedtuple("QueueRow", ["job_id", "name", "state", "user"])
+
+
+class QueueSnapshot:
+    """The jobs in the SLURM queue at a given time, indexed by job id and by name."""
+
+    def __init__(self, rows, taken_at=None):
+        self.rows = list(rows)
+        self.taken_at = time.time() if taken_at is None else taken_at
+        self.by_id = {row.job_id: row for row in self.rows}
+        self.by_name = defaultdict(list)
+        for row in self.rows:
+            self.by_name[row.name].append(row)
+
+    def is_fresh(self, ttl):
+        return time.time() - self.taken_at < ttl
+
+    def to_dict(self):
+        return {"taken_at": self.taken_at, "rows": [list(row) for row in self.rows]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls((QueueRow(*row) for row in data["rows"]), data["taken_at"])
+
+
+# snapshots shared by every caller in this process, keyed by user (None for all users)
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+# snapshots being taken, keyed by user: callers arriving meanwhile wait for them
+# instead of running squeue again
+_snapshots_pending = {}
+# whether this squeue understands --json, found out on first use
+_squeue_json = None
+
+
+def _squeue_rows_json(user):
+    cmd_args = [SQUEUE_PATH, "--json"]
+    if user:
+        cmd_args.append("--user=" + user)
+    cmd_results = subprocess.run(
+        cmd_args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+    )
+    rows = []
+    for job in json_codec.loads(cmd_results.stdout)["jobs"]:
+        state = job.get("job_state")
+        if isinstance(state, list):
+            state = state[0] if state else ""
+        rows.append(
+            QueueRow(
+                str(job["job_id"]), job.get("name", ""), state, job.get("user_name", "")
+            )
+        )
+    return rows
+
+
+def _squeue_rows_text(user):
+    # The job name goes last, as it is the only field that may hold the separator
+    cmd_args = [SQUEUE_PATH, "--noheader", "--format=%A|%T|%u|%j"]
+    if user:
+        cmd_args.append("--user=" + user)
+    cmd_results = subprocess.run(
+        cmd_args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+    )
+    rows = []
+    for line in cmd_results.stdout.decode().splitlines():
+        if line.strip():
+            job_id, state, user_name, name = line.strip().split("|", 3)
+            rows.append(QueueRow(job_id, name, state, user_name))
+    return rows
+
+
+def _squeue_rows(user):
+    """Query squeue, preferring its JSON output when it is supported."""
+    global _squeue_json
+    if _squeue_json is not False:
+        try:
+            rows = _squeue_rows_json(user)
+            _squeue_json = True
+            return rows
+        except (subprocess.CalledProcessError, ValueError, KeyError):
+            _squeue_json = False
+    return _squeue_rows_text(user)
+
+
+def _disk_cache_path(user):
+    return JOBBERGATE_CACHE_DIR / f"squeue-{user or 'all'}.json"
+
+
+def get_queue_snapshot(
+    user_only=True, ttl=JOBBERGATE_QUEUE_SNAPSHOT_TTL, disk_cache=False
+):
+    """
+    Returns a snapshot of the SLURM queue, reusing one taken less than `ttl` seconds ago.
+
+    Snapshots are shared within the process. With `disk_cache`, they are also shared
+    with other processes of the same user through the Jobbergate cache directory.
+    Raises OSError or subprocess.CalledProcessError if squeue can not be queried.
+    """
+    user = getpass.getuser() if user_only else None
+    with _snapshots_lock:
+        snapshot = _snapshots.get(user)
+        if snapshot is not None and snapshot.is_fresh(ttl):
+            return snapshot
+        pending = _snapshots_pending.get(user)
+        if pending is None:
+            _snapshots_pending[user] = future = Future()
+
+    if pending is not None:
+        # squeue runs without the lock held; wait for the caller already running it
+        return pending.result()
+
+    try:
+        snapshot = _take_queue_snapshot(user, ttl, disk_cache)
+    except BaseException as err:
+        future.set_exception(err)
+        raise
+    else:
+        future.set_result(snapshot)
+        return snapshot
+    finally:
+        with _snapshots_lock:
+            del _snapshots_pending[user]
+
+
+def _take_queue_snapshot(user, ttl, disk_cache):
+    """Read a fresh snapshot from the disk cache, or query squeue for a new one."""
+    cache_path = _disk_cache_path(user)
+    if disk_cache and cache_path.exists():
+        try:
+            snapshot = QueueSnapshot.from_dict(
+                json_codec.loads(cache_path.read_bytes())
+            )
+        except (ValueError, KeyError, TypeError):
+            snapshot = None
+        if snapshot is not None and snapshot.is_fresh(ttl):
+            with _snapshots_lock:
+                _snapshots[user] = snapshot
+            return snapshot
+
+    snapshot = QueueSnapshot(_squeue_rows(user))
+    with _snapshots_lock:
+        _snapshots[user] = snapshot
+
+    if disk_cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}")
+        temp_path.write_text(json_codec.dumps(snapshot.to_dict()))
+        os.replace(str(temp_path), str(cache_path))
+
+    return snapshot
+
+
+async def get_queue_snapshot_async(
+    user_only=True, ttl=JOBBERGATE_QUEUE_SNAPSHOT_TTL, disk_cache=False
+):
+    """Same as get_queue_snapshot, without blocking the event loop while squeue runs."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        None,
+        functools.partial(get_queue_snapshot, user_only, ttl, disk_cache),
+    )
 
 
 def get_running_jobs(user_only=True):
     """Returns a list of the user's currently running jobs, as given by SLURM."""
-    cmd_args = [
-        "squeue",
-        '--format="%.8A %j"',
-        "--noheader",
-    ]  # format:[job ID, 8 chars] [job name]
-    if user_only:
-        cmd_args.append("--user=" + os.getenv("USER"))
     try:
-        cmd_results = subprocess.run(cmd_args, stdout=subprocess.PIPE)
-        # Skip last line (empty), strip quotation marks
-        ID_alternatives = cmd_results.stdout.decode().split("\n")[:-1]
-        ID_alternatives = [j.strip('"') for j in ID_alternatives]
+        snapshot = get_queue_snapshot(user_only=user_only)
     except:  # noqa: E722
         print("Could not retrieve queue information from SLURM.")
         return []
-    return ID_alternatives
+    # format:[job ID, 8 chars] [job name]
+    return [f"{row.job_id:>8} {row.name}" for row in snapshot.rows]
+
+
+# results of get_file_list(cache=True), keyed by directory, pattern and limit
+_file_lists = {}
+
 
+def get_file_list(path=None, search_term="*.*", limit=None, cache=False):
+    """Returns a list of input files in a directory ( default: pwd).
 
-def get_file_list(path=None, search_term="*.*"):
-    """Returns a list of input files in a directory ( default: pwd)."""
+    Files are sorted by modification time, most recent first. Each entry is stat-ed
+    once, and with `limit` only the `limit` most recent files are kept, without
+    sorting the whole directory.
+
+    With `cache`, the result is reused until the directory's own modification time
+    changes, which happens when files are added, removed or renamed (but not when a
+    file is only modified).
+    """
     if not path:
         path = Path.cwd()
+    path = Path(path)
+
+    if cache:
+        key = (str(path), search_term, limit)
+        directory_mtime = path.stat().st_mtime_ns
+        cached = _file_lists.get(key)
+        if cached is not None and cached[0] == directory_mtime:
+            return list(cached[1])
+
+    if "/" in search_term or "**" in search_term:
+        # Patterns reaching into subdirectories are left to glob
+        entries = ((p.name, p) for p in path.glob(search_term))
+    else:
+        entries = (
+            (entry.name, entry)
+            for entry in os.scandir(str(path))
+            if fnmatch.fnmatchcase(entry.name, search_term)
+        )
+
+    mtimes = []
+    for name, entry in entries:
+        try:
+            if entry.is_file():
+                mtimes.append((entry.stat().st_mtime, name))
+        except OSError:
+            # vanished or broken symlink
+            continue
 
-    files = sorted(path.glob(search_term), key=os.path.getmtime, reverse=True)
+    if limit is None:
+        mtimes.sort(reverse=True)
+    else:
+        mtimes = heapq.nlargest(limit, mtimes)
+    files = [name for _, name in mtimes]
 
-    files = [x.name for x in files if x.is_file()]
+    if cache:
+        _file_lists[key] = (directory_mtime, files)
+        files = list(files)
 
     return files
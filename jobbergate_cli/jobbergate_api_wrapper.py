@@ -1,29 +1,119 @@
 #!/usr/bin/env python3
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
+from datetime import datetime, timedelta, timezone
+import email.utils
+import fnmatch
+import functools
 import importlib
-import json
+import io
+import itertools
 import os
 import pathlib
-from subprocess import PIPE, Popen
+import re
+import sqlite3
+import sys
 import tarfile
+import threading
+import time
+from types import MappingProxyType
 from urllib.parse import urljoin
 
-import inquirer
+from loguru import logger
 import requests
 import yaml
 
-from jobbergate_cli import appform, client
+from jobbergate_cli import (
+    appform,
+    client,
+    export,
+    json_codec,
+    ledger,
+    output,
+    registry,
+    render,
+    resolver,
+    workflow,
+)
 from jobbergate_cli.jobbergate_common import (
     JOBBERGATE_APPLICATION_CONFIG_FILE_NAME,
     JOBBERGATE_APPLICATION_CONFIG_PATH,
     JOBBERGATE_APPLICATION_MODULE_FILE_NAME,
     JOBBERGATE_APPLICATION_MODULE_PATH,
-    JOBBERGATE_CACHE_DIR,
-    SBATCH_PATH,
+    JOBBERGATE_DELETE_MAX_WORKERS,
+    JOBBERGATE_EXPORT_MAX_WORKERS,
+    JOBBERGATE_SYNC_MAX_WORKERS,
+    JOBBERGATE_SYNC_STATE_PATH,
     TAR_NAME,
+    WORKFLOW_HOOK_MAX_WORKERS,
 )
+from jobbergate_cli.profiler import WorkflowProfiler
+from jobbergate_cli.slurm import JobStateWatcher, SbatchError, SbatchExecutor
+
+
+# Fields requested by the list commands, unless the full output is asked for. The API
+# answers with these fields only, when it supports the fields parameter.
+LIST_FIELDS = {
+    "application": [
+        "id",
+        "application_name",
+        "application_identifier",
+        "application_description",
+        "application_owner",
+        "updated_at",
+    ],
+    "job-script": [
+        "id",
+        "job_script_name",
+        "job_script_description",
+        "job_script_owner",
+        "application",
+        "updated_at",
+    ],
+}
+
+# Large fields left out of listings, fetched with the whole object on first access
+HEAVY_FIELDS = {
+    "application": ["application_file", "application_config"],
+    "job-script": ["job_script_data_as_string"],
+}
+
+
+def light_entity(kind, entity):
+    """Copy of an object without its HEAVY_FIELDS, as stored in the ledger."""
+    if not isinstance(entity, dict):
+        return entity
+    heavy = HEAVY_FIELDS.get(kind, [])
+    return {key: value for key, value in entity.items() if key not in heavy}
+
+
+# guards the cached jobbergate.py and jobbergate.yaml, written by every command that
+# loads an application
+_application_cache_lock = threading.Lock()
+
+
+def _frozen(config):
+    """Read-only copy of a base payload, so requests cannot change it in place."""
+    return MappingProxyType(dict(config or {}))
 
 
 class JobbergateApi:
+    """
+    Client of the Jobbergate API.
+
+    One client may be shared by the threads of a worker pool. Every request builds
+    its payload from a copy of the read-only base configs, uploads such as
+    param_dict.json and application archives are built in memory, state of a single
+    call is kept in local variables, and the objects remembered between calls are
+    guarded by a lock. Applications are imported from their source with a registry of their
+    own, see the registry module. The attributes set by the constructor, such as
+    profiler and full_output, are meant to be set before the client is shared.
+
+    Commands that write files to the working directory, such as create-job-submission,
+    write the same files when given the same job script.
+    """
+
     def __init__(
         self,
         token=None,
@@ -33,13 +123,30 @@ class JobbergateApi:
         api_endpoint=None,
         user_id=None,
         full_output=False,
+        sbatch=None,
+        ledger=None,
+        ledger_factory=None,
+        profiler=None,
     ):
         """Initialize JobbergateAPI."""
 
         self.token = token
-        self.job_script_config = job_script_config
-        self.job_submission_config = job_submission_config
-        self.application_config = application_config
+        self.full_output = full_output
+        # Cleared when the API rejects the fields parameter of list requests
+        self.project_fields = not full_output
+        # Cleared when the API rejects PATCH requests
+        self.partial_updates = True
+        # Cleared when the API rejects PATCH requests of single job script files
+        self.file_updates = True
+        self.sbatch = sbatch or SbatchExecutor()
+        self._ledger = ledger
+        # Opens the ledger on first use, so commands that do not need it never do
+        self._ledger_factory = ledger_factory
+        self._ledger_lock = threading.Lock()
+        self.profiler = profiler or WorkflowProfiler(enabled=False)
+        self.job_script_config = _frozen(job_script_config)
+        self.job_submission_config = _frozen(job_submission_config)
+        self.application_config = _frozen(application_config)
         self.api_endpoint = api_endpoint
         self.user_id = user_id
         # Suppress from list- and create- application:
@@ -73,8 +180,191 @@ class JobbergateApi:
             if not full_output
             else []
         )
+        # Objects fetched or created during this invocation, keyed by (kind, id)
+        self._entities = {}
+        self._entities_lock = threading.Lock()
+
+    def remember_entity(self, kind, entity):
+        """
+        Keep a copy of an API object so later calls in the same invocation can reuse it.
+
+        Keyword Arguments:
+            kind    -- type of the object: application, job-script, job-submission
+            entity  -- dict returned by the API; error responses are not stored
+        """
+        if not isinstance(entity, dict) or "error" in entity or "id" not in entity:
+            return
+        with self._entities_lock:
+            self._entities[(kind, str(entity["id"]))] = dict(entity)
+
+    def forget_entity(self, kind, entity_id):
+        """
+        Drop an object from the identity map after it was changed or deleted.
+
+        Keyword Arguments:
+            kind       -- type of the object: application, job-script, job-submission
+            entity_id  -- id of the object to drop
+        """
+        with self._entities_lock:
+            self._entities.pop((kind, str(entity_id)), None)
+
+    def get_entity(self, kind, entity_id):
+        """
+        GET an object by id, reusing the copy already held by this invocation if any.
+
+        Keyword Arguments:
+            kind       -- type of the object: application, job-script, job-submission
+            entity_id  -- id of the object to be returned
+        """
+        with self._entities_lock:
+            entity = self._entities.get((kind, str(entity_id)))
+            if entity is not None:
+                return dict(entity)
+
+        response = self.jobbergate_request(
+            method="GET",
+            endpoint=urljoin(self.api_endpoint, f"/{kind}/{entity_id}"),
+        )
+        self.remember_entity(kind, response)
+        return response
+
+    def known_entity(self, kind, entity_id, ledger=True):
+        """
+        Return the copy of an object held by this invocation or the ledger, if any.
+
+        Keyword Arguments:
+            kind       -- type of the object: job-script, job-submission
+            entity_id  -- id of the object
+            ledger     -- also look in the ledger, whose copy may be stale
+        """
+        with self._entities_lock:
+            entity = self._entities.get((kind, str(entity_id)))
+        if entity is not None:
+            return dict(entity)
+        if ledger and self.ledger is not None:
+            return self.ledger.get(kind, entity_id)
+        return None
+
+    @property
+    def ledger(self):
+        """The local ledger, opened by ledger_factory on first use, or None."""
+        if self._ledger_factory is not None:
+            with self._ledger_lock:
+                if self._ledger_factory is not None:
+                    self._ledger = self._ledger_factory()
+                    self._ledger_factory = None
+        return self._ledger
+
+    def ledger_scope(self, all):
+        """Name of the ledger listing scope for all objects, or the user's ones."""
+        return "all" if all else f"user:{self.user_id}"
+
+    def record_entity(self, kind, entity, created=False):
+        """
+        Write an object created or updated by this command through to the ledger.
+
+        Keyword Arguments:
+            kind     -- type of the object: job-script, job-submission
+            entity   -- dict returned by the API; error responses are not stored
+            created  -- the object is new, so it joins the user's and the "all" listings
+        """
+        if self.ledger is None:
+            return
+        scopes = (self.ledger_scope(True), self.ledger_scope(False)) if created else ()
+        self.ledger.upsert(kind, light_entity(kind, entity), scopes=scopes)
+
+    def list_entities(self, kind, all, sync=False, since=None, name=None, status=None):
+        """
+        LIST job scripts or job submissions, answering from the ledger when available.
+
+        The ledger is reconciled with the API first when it is stale or sync is set.
+        When the ledger can not be used, for instance while another process holds a
+        lock on it, the objects are listed from the API.
+
+        Keyword Arguments:
+            kind    -- type of the objects: job-script, job-submission
+            all     -- list all objects, not only the user's
+            sync    -- force reconciling the ledger with the API
+            since   -- only objects updated at or after this ISO date
+            name    -- only objects whose name contains this text
+            status  -- only objects with this status
+        """
+        scope = self.ledger_scope(all)
+        # The ledger holds listings as projected by LIST_FIELDS, so the full output
+        # is always listed from the API
+        use_ledger = self.ledger is not None and not self.full_output
+        response = None
+        if use_ledger:
+            try:
+                if sync or self.ledger.is_stale(kind, scope):
+                    response = self.list_request(
+                        kind, params=dict(all=True) if all else None
+                    )
+                    if not isinstance(response, list):
+                        return response
+                    self.ledger.sync(
+                        kind, scope, [light_entity(kind, entity) for entity in response]
+                    )
+                return self.ledger.query(
+                    kind, scope, since=since, name=name, status=status
+                )
+            except sqlite3.Error as err:
+                logger.warning(f"Local ledger unavailable, listing from the API: {err}")
+
+        if response is None:
+            response = self.list_request(kind, params=dict(all=True) if all else None)
+            if not isinstance(response, list):
+                return response
+        return [
+            entity
+            for entity in response
+            if ledger.matches(kind, entity, since, name, status)
+        ]
+
+    def list_request(self, kind, params=None):
+        """
+        GET a listing, asking the API for the LIST_FIELDS of the objects only.
+
+        If the API rejects the fields parameter, the listing is requested again
+        without it, and later listings do not send it anymore. Other failures are
+        returned as they are.
+
+        Keyword Arguments:
+            kind    -- type of the objects: application, job-script, job-submission
+            params  -- Query parameters of the listing
+        """
+        endpoint = urljoin(self.api_endpoint, f"/{kind}/")
+        fields = LIST_FIELDS.get(kind) if self.project_fields else None
+        if fields:
+            response = self.jobbergate_request(
+                method="GET",
+                endpoint=endpoint,
+                params=dict(params or {}, fields=",".join(fields)),
+            )
+            if self.project_fields or not (
+                isinstance(response, dict) and "error" in response
+            ):
+                return response
+
+        return self.jobbergate_request(method="GET", endpoint=endpoint, params=params)
 
-    def tardir(self, path, tar_name, tar_list):
+    def lazy_record(self, kind, entity):
+        """
+        Wrap a listed object so its HEAVY_FIELDS are fetched when accessed.
+
+        Keyword Arguments:
+            kind    -- type of the object: application, job-script
+            entity  -- dict of the fields to show for the object
+        """
+        if self.full_output or "id" not in entity:
+            return entity
+        return LazyRecord(
+            entity,
+            HEAVY_FIELDS.get(kind, []),
+            functools.partial(self.get_entity, kind, entity["id"]),
+        )
+
+    def tardir(self, path, tar_name, tar_list, fileobj=None):
         """
         Compress application files to a tar file.
 
@@ -83,9 +373,11 @@ class JobbergateApi:
             tar_name  -- name of tar file
             tar_list  -- list of values for root to be added to tar file
                          this is to avoid including extraneous files in tar
+            fileobj   -- optional file object to write the tar file to, instead of
+                         the file tar_name
 
         """
-        archive = tarfile.open(tar_name, "w|gz")
+        archive = tarfile.open(tar_name, "w|gz", fileobj=fileobj)
         for root, dirs, files in os.walk(path):
             if root in tar_list:
                 for file in files:
@@ -97,18 +389,39 @@ class JobbergateApi:
                         archive.add(os.path.join(root, file), arcname=file)
         archive.close()
 
-    def jobbergate_request(self, method, endpoint, data=None, files=None, params=None):
+    def pack_application(self, application_path):
+        """
+        Pack an application directory in memory, as the files of an upload.
+
+        Nothing is written to the working directory, so several applications can be
+        packed at once.
+
+        Keyword Arguments:
+            application_path -- path to the dir where application files are
+        """
+        buffer = io.BytesIO()
+        tar_list = [application_path, os.path.join(application_path, "templates")]
+        self.tardir(application_path, TAR_NAME, tar_list, fileobj=buffer)
+        buffer.seek(0)
+        return {"upload_file": (TAR_NAME, buffer)}
+
+    def jobbergate_request(
+        self, method, endpoint, data=None, files=None, params=None, headers=None
+    ):
         """
         Submit HTTP requests.
 
         Keyword Arguments:
             method    -- HTTP request method
             endpoint  -- API End point: application, job-script, job-submission
-            data      -- data to be submitted on POST/PUT requests
+            data      -- data to be submitted on POST/PUT/PATCH requests
             files     -- file(s) to be sent with request where applicable
             params    -- Query parameters for GET requests
+            headers   -- extra headers of PUT/PATCH requests, such as
+                         If-Unmodified-Since
 
         """
+        request_headers = dict(headers or {}, Authorization="JWT " + self.token)
         if method == "GET":
             try:
                 response = client.get(
@@ -118,7 +431,7 @@ class JobbergateApi:
                     verify=False,
                 )
                 if response.status_code == 200:
-                    response = response.json()
+                    response = json_codec.loads(response.content)
                 elif response.status_code == 403:
                     response = self.error_handle(
                         error=f"User is not Authorized to access {endpoint}",
@@ -132,6 +445,12 @@ class JobbergateApi:
                     )
                     return response
                 else:
+                    if (
+                        response.status_code in (400, 422)
+                        and "fields" in (params or {})
+                        and "fields" in response.text
+                    ):
+                        self.project_fields = False
                     response = self.error_handle(
                         error=f"Failed to access {endpoint}",
                         solution="Please check credentials or report server error",
@@ -150,7 +469,7 @@ class JobbergateApi:
                     endpoint,
                     data=data,
                     files=files,
-                    headers={"Authorization": "JWT " + self.token},
+                    headers=request_headers,
                     verify=False,
                 )  # .json()
                 if response.status_code == 403:
@@ -159,10 +478,57 @@ class JobbergateApi:
                         solution="Please contact your admin for permission",
                     )
                     return response
+                elif response.status_code == 412:
+                    return self.conflict_error(endpoint)
                 else:
-                    response = response.json()
-            except Exception:
-                response = "PUT request failed"
+                    response = json_codec.loads(response.content)
+            except Exception as err:
+                response = self.error_handle(
+                    error=f"Failed to update {endpoint}: {err}",
+                    solution="Please try submitting again",
+                )
+                return response
+
+        if method == "PATCH":
+            try:
+                response = client.patch(
+                    endpoint, data=data, headers=request_headers, verify=False
+                )
+            except requests.exceptions.ConnectionError:
+                response = self.error_handle(
+                    error="Failed to establish connection with API",
+                    solution="Please try submitting again",
+                )
+                return response
+            if response.status_code == 200:
+                response = json_codec.loads(response.content)
+            elif response.status_code == 403:
+                response = self.error_handle(
+                    error=f"User is not Authorized to access {endpoint}",
+                    solution="Please contact your admin for permission",
+                )
+                return response
+            elif response.status_code == 404:
+                response = self.error_handle(
+                    error=f"Could not find object at {endpoint}",
+                    solution="Please confirm the id and try again",
+                )
+                return response
+            elif response.status_code == 412:
+                return self.conflict_error(endpoint)
+            else:
+                if response.status_code in (405, 501):
+                    self.partial_updates = False
+                elif (
+                    response.status_code in (400, 422)
+                    and "job_script_files" in (data or {})
+                    and "job_script_files" in response.text
+                ):
+                    self.file_updates = False
+                response = self.error_handle(
+                    error=f"Partial update failed with code {response.status_code}",
+                    solution=f"Please review the data sent to {endpoint}",
+                )
                 return response
 
         if method == "DELETE":
@@ -217,7 +583,7 @@ class JobbergateApi:
                 return response
 
             elif full_response.status_code in [200, 201]:
-                response = full_response.json()
+                response = json_codec.loads(full_response.content)
 
             else:
                 response = self.error_handle(
@@ -227,26 +593,25 @@ class JobbergateApi:
 
         return response
 
-    def jobbergate_run(self, filename, *argv):
-        """Execute Job Submission."""
-        cmd = [SBATCH_PATH, filename]
-        for arg in argv:
-            cmd.append(arg)
-        p = Popen(cmd, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        output, err = p.communicate(b"sbatch output")
-
-        rc = p.returncode
-
-        return output.decode("utf-8"), err.decode("utf-8"), rc
+    def import_jobbergate_application_module(self, app_data=None):
+        """
+        Import jobbergate.py for generating questions.
 
-    def import_jobbergate_application_module(self):
-        """Import jobbergate.py for generating questions."""
+        Keyword Arguments:
+            app_data  -- application as returned by the API, whose application_file
+                         is imported; defaults to the cached jobbergate.py
+        """
+        if app_data is not None:
+            return registry.exec_source(
+                app_data["application_file"],
+                "JobbergateApplication",
+                str(JOBBERGATE_APPLICATION_MODULE_PATH),
+            )
         spec = importlib.util.spec_from_file_location(
             "JobbergateApplication", JOBBERGATE_APPLICATION_MODULE_PATH
         )
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return module
+        # the module registers its workflows and hooks into a registry of its own
+        return registry.exec_module(spec)
 
     def assemble_questions(self, question, ignore=None):
         """
@@ -255,106 +620,30 @@ class JobbergateApi:
         Keyword Arguments:
             question  -- question object passed in from jobbergate.py.
                          function returns the appropriate question from
-                         inquirer
+                         inquirer, or a list of them for a BooleanList
+            ignore    -- optional predicate telling inquirer to skip the question
         """
+        from jobbergate_cli.prompts import build_prompts  # imports inquirer
 
-        if isinstance(question, appform.Text):
-            return inquirer.Text(
-                question.variablename,
-                message=question.message,
-                default=question.default,
-                ignore=ignore,
-            )
-
-        if isinstance(question, appform.Integer):
-            return inquirer.Text(
-                question.variablename,
-                message=question.message,
-                default=question.default,
-                validate=question.validate,
-                ignore=ignore,
-            )
-
-        if isinstance(question, appform.List):
-            return inquirer.List(
-                question.variablename,
-                message=question.message,
-                choices=question.choices,
-                default=question.default,
-                ignore=ignore,
-            )
-
-        if isinstance(question, appform.Directory):
-            return inquirer.Path(
-                question.variablename,
-                message=question.message,
-                path_type=inquirer.Path.DIRECTORY,
-                default=question.default,
-                exists=question.exists,
-                ignore=ignore,
-            )
-
-        if isinstance(question, appform.File):
-            return inquirer.Path(
-                question.variablename,
-                message=question.message,
-                path_type=inquirer.Path.FILE,
-                default=question.default,
-                exists=question.exists,
-                ignore=ignore,
-            )
+        if ignore is None or callable(ignore):
+            hidden = ignore
+        else:
 
-        if isinstance(question, appform.Checkbox):
-            return inquirer.Checkbox(
-                question.variablename,
-                message=question.message,
-                choices=question.choices,
-                default=question.default,
-                ignore=ignore,
-            )
-
-        if isinstance(question, appform.Confirm):
-            return inquirer.Confirm(
-                question.variablename,
-                message=question.message,
-                default=question.default,
-                ignore=ignore,
-            )
+            def hidden(answers):
+                return bool(ignore)
 
+        built = build_prompts(appform.compile_questions([question], hidden=hidden))
         if isinstance(question, appform.BooleanList):
-            retval = [
-                inquirer.Confirm(
-                    question.variablename,
-                    message=question.message,
-                    default=question.default,
-                    ignore=ignore,
-                )
-            ]
-
-            if question.whenfalse:
-                retval.extend(
-                    [
-                        self.assemble_questions(wf, ignore=question.ignore)
-                        for wf in question.whenfalse
-                    ]
-                )
-            if question.whentrue:
-                retval.extend(
-                    [
-                        self.assemble_questions(wt, ignore=question.noignore)
-                        for wt in question.whentrue
-                    ]
-                )
-
-            return retval
-
-        if isinstance(question, appform.Const):
-            return inquirer.Text(
-                question.variablename,
-                message="",
-                default=question.default,
-                ignore=True,
-            )
+            return built
+        return built[0] if built else None
+
+    def conflict_error(self, endpoint):
+        """Error of a conditional update rejected because the object changed."""
+        response = self.error_handle(
+            error=f"The object at {endpoint} was changed since it was fetched",
+            solution="Please fetch it again, reapply your changes and retry",
+        )
+        return response
 
     def error_handle(self, error, solution):
         """
@@ -422,127 +711,104 @@ class JobbergateApi:
 
         return error_check
 
-    def list_job_scripts(self, all):
+    def list_job_scripts(self, all, sync=False, since=None, name=None):
         """
         LIST Job Scripts.
 
         Keyword Arguments:
-            all  -- optional parameter that will return all job scripts
-                    if NOT specified then only the user's job scripts
-                    will be returned
+            all    -- optional parameter that will return all job scripts
+                      if NOT specified then only the user's job scripts
+                      will be returned
+            sync   -- optional parameter to reconcile the local ledger with the API
+            since  -- optional ISO date; only job scripts updated since then
+            name   -- optional text the job script names must contain
         """
-        params = dict(all=True) if all else None
-        response = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, "/job-script/"),
-            params=params,
+        response = self.list_entities(
+            "job-script", all, sync=sync, since=since, name=name
         )
 
         try:
             return [
-                {k: v for k, v in d.items() if k not in self.job_script_suppress}
+                self.lazy_record(
+                    "job-script",
+                    {k: v for k, v in d.items() if k not in self.job_script_suppress},
+                )
                 for d in response
             ]
         except Exception:
             return response
 
-    def create_job_script(
-        self,
-        job_script_name,
-        application_id,
-        application_identifier,
-        param_file,
-        sbatch_params,
-        fast,
-        no_submit,
-        debug,
-    ):
+    def load_param_file(self, param_file):
         """
-        CREATE a Job Script.
+        Load the answers supplied in a parameter file, if any.
 
         Keyword Arguments:
-            name                    --  Name for job script
-            application-id          --  id of the application for the job script
-            application-identifier  --  identifier of the application for the job script
-            param-file              --  optional parameter file for populating templates.
-                                        if this is not provided, the question askin in
-                                        jobbergate.py is triggered
-            sbatch-params           --  optional parameter to submit raw sbatch parameters
-            fast                    --  optional parameter to use default answers (when available)
-                                        instead of asking user
-            no-submit               --  optional parameter to not even ask about submitting job
-            debug                   --  optional parameter to view job script data
-                                        in CLI output
+            param_file -- optional path to a JSON file with one object of answers
         """
-        parameter_check = []
-        if application_id and application_identifier:
-            response = self.error_handle(
-                error="Both identifier and id supplied",
-                solution="Please try again with only one",
-            )
-            parameter_check.append(response)
+        if not param_file:
+            return {}
 
-        if not application_id and not application_identifier:
+        if not os.path.isfile(param_file):
             response = self.error_handle(
-                error="--application-id and --application-identifier for the job script not defined",
-                solution="Please try again with one of them specified",
+                error=f"invalid --parameter-file supplied: {param_file}",
+                solution="Provide the full path to a valid parameter file",
             )
-            parameter_check.append(response)
-
-        if len(parameter_check) > 0:
-            response = parameter_check
             return response
 
-        self.validation_check = {}
-        data = self.job_script_config
-        data["job_script_name"] = job_script_name
-        data["job_script_owner"] = self.user_id
-        app_data = None
+        with open(param_file, "rb") as fh:
+            try:
+                params = json_codec.loads(fh.read())
+            except ValueError:
+                params = None
 
-        if application_identifier:
-            app_data = self.jobbergate_request(
-                method="GET",
-                endpoint=urljoin(
-                    self.api_endpoint,
-                    f"/application/?identifier={application_identifier}",
-                ),
+        if not isinstance(params, dict):
+            response = self.error_handle(
+                error=f"invalid --parameter-file supplied: {param_file}",
+                solution="The file must hold a JSON object of answers",
             )
-            application_id = app_data.get("id")
-
-        data["application"] = application_id
+            return response
+        return params
 
-        if param_file:
-            is_param_file = os.path.isfile(param_file)
-            if is_param_file is False:
-                response = self.error_handle(
-                    error=f"invalid --parameter-file supplied: {param_file}",
-                    solution="Provide the full path to a valid parameter file",
-                )
-                return response
+    def fetch_application(self, application_id, application_identifier):
+        """
+        GET the application a job script is created from.
 
-            with open(param_file, "rb") as fh:
-                supplied_params = json.loads(fh.read())
-        else:
-            supplied_params = {}
+        Keyword Arguments:
+            application_id          -- id of the application
+            application_identifier  -- identifier of the application, used instead of the id
+        """
+        if not application_identifier:
+            return self.get_entity("application", application_id)
 
-        if not app_data:
-            app_data = self.jobbergate_request(
-                method="GET",
-                endpoint=urljoin(self.api_endpoint, f"/application/{application_id}"),
-            )
-        if "error" in app_data.keys():
-            return app_data
+        app_data = self.jobbergate_request(
+            method="GET",
+            endpoint=urljoin(
+                self.api_endpoint,
+                f"/application/?identifier={application_identifier}",
+            ),
+        )
+        self.remember_entity("application", app_data)
+        return app_data
 
-        # Get the jobbergate application python module
-        JOBBERGATE_APPLICATION_MODULE_PATH.write_text(app_data["application_file"])
-        # Get the jobbergate application yaml config
-        JOBBERGATE_APPLICATION_CONFIG_PATH.write_text(app_data["application_config"])
+    def load_application_config(self, app_data):
+        """
+        Cache the application files locally and load its jobbergate.yaml.
 
-        # Load the jobbergate yaml
-        config = JOBBERGATE_APPLICATION_CONFIG_PATH.read_text()
+        Keyword Arguments:
+            app_data -- application as returned by the API
+        """
+        with _application_cache_lock:
+            # Get the jobbergate application python module
+            JOBBERGATE_APPLICATION_MODULE_PATH.write_text(app_data["application_file"])
+            # Get the jobbergate application yaml config
+            JOBBERGATE_APPLICATION_CONFIG_PATH.write_text(
+                app_data["application_config"]
+            )
 
+        # Load the jobbergate yaml from the application itself, as another thread
+        # may have cached a different application since
         try:
-            param_dict = yaml.load(config, Loader=yaml.FullLoader)
+            return yaml.load(app_data["application_config"], Loader=yaml.FullLoader)
         except:  # noqa
             response = self.error_handle(
                 error="Could not load application's yaml file",
@@ -550,25 +816,81 @@ class JobbergateApi:
             )
             return response
 
-        # Exec the jobbergate application python module
-        module = self.import_jobbergate_application_module()
-        application = module.JobbergateApplication(param_dict)
+    def run_workflow(
+        self,
+        application,
+        param_dict,
+        supplied_params,
+        fast,
+        interactive=True,
+        application_registry=None,
+    ):
+        """
+        Walk the application workflow, starting in "mainflow", and collect the answers.
 
+        Answers are stored in param_dict["jobbergate_config"]. Returns an error if the
+        workflow could not be completed, None otherwise. Supplied and default answers
+        are resolved and checked without prompting; the prompt library is only loaded
+        for questions that are left without an answer.
+
+        Keyword Arguments:
+            application      -- instance of the application's JobbergateApplication
+            param_dict       -- application config loaded from jobbergate.yaml
+            supplied_params  -- answers that were supplied up front
+            fast             -- use default answers (when available) instead of asking user
+            interactive      -- ask the user for missing answers; when False, a question
+                                without a supplied or default answer is an error
+            application_registry  -- registrations of the application module, see
+                                     registry.of_module; defaults to the active ones
+        """
+        application_registry = application_registry or registry.active()
+        with registry.bound(application_registry), ThreadPoolExecutor(
+            max_workers=WORKFLOW_HOOK_MAX_WORKERS
+        ) as executor:
+            try:
+                return self.walk_workflow(
+                    application,
+                    param_dict,
+                    supplied_params,
+                    fast,
+                    interactive,
+                    workflow.HookRunner(executor),
+                )
+            except workflow.HookError as err:
+                return self.error_handle(
+                    error=str(err),
+                    solution="Please review the pre and post functions of the application",
+                )
+
+    def walk_workflow(
+        self, application, param_dict, supplied_params, fast, interactive, hooks
+    ):
+        """
+        Run the steps of the application workflow, see run_workflow.
+
+        Keyword Arguments:
+            hooks  -- workflow.HookRunner running the pre and post functions
+        """
+        config = param_dict["jobbergate_config"]
         # Add all parameters from parameter file
-        param_dict["jobbergate_config"].update(supplied_params)
+        config.update(supplied_params)
 
         # Begin question assembly, starting in "mainflow" method
-        param_dict["jobbergate_config"]["nextworkflow"] = "mainflow"
+        config["nextworkflow"] = "mainflow"
+        hooks.start_pre("", config)
+        hooks.start_pre("mainflow", config)
+
+        while "nextworkflow" in config:
+            method_name = config.pop("nextworkflow")
+            method_to_call = getattr(application, method_name)
 
-        while "nextworkflow" in param_dict["jobbergate_config"]:
-            method_to_call = getattr(
-                application, param_dict["jobbergate_config"].pop("nextworkflow")
-            )  # Use and remove from the dict
+            if hooks.waiting_pre(method_name):
+                with self.profiler.stage(f"pre functions {method_name}"):
+                    config.update(hooks.finish_pre(method_name))
 
             try:
-                workflow_questions = method_to_call(
-                    data=param_dict["jobbergate_config"]
-                )
+                with self.profiler.stage(f"workflow {method_name}"):
+                    workflow_questions = method_to_call(data=config)
             except NotImplementedError:
                 response = self.error_handle(
                     error="Abstract method not implemented",
@@ -576,37 +898,74 @@ class JobbergateApi:
                 )
                 return response
 
-            questions = []
-            auto_answers = {}
-
-            while workflow_questions:
-                field = workflow_questions.pop(0)
-                # Use pre-defined answer or ask user
-                if field.variablename in supplied_params.keys():
-                    pass  # No further action needed, case kept here to visualize priority
-                elif fast and field.default is not None:
-                    print(f"Default value used: {field.variablename}={field.default}")
-                    auto_answers[field.variablename] = field.default
-                else:
-                    # Prepare question for user
-                    question = self.assemble_questions(field)
-                    if isinstance(question, list):
-                        questions.extend(question)
-                    else:
-                        questions.append(question)
+            # Gather the data of the next step while this one is answered
+            if "nextworkflow" in config:
+                hooks.start_pre(config["nextworkflow"], config)
+
+            # Answer from the supplied params, defaults and Const values first
+            with self.profiler.stage(f"resolve {method_name}"):
+                resolution = resolver.resolve(
+                    appform.compile_questions(workflow_questions),
+                    supplied_params,
+                    use_defaults=fast or not interactive,
+                    interactive=interactive,
+                )
+            if interactive:
+                for name in resolution.defaulted:
+                    output.notice(
+                        f"Default value used: {name}={resolution.answers[name]}"
+                    )
+
+            if resolution.missing:
+                response = self.error_handle(
+                    error=f"No answer supplied for: {', '.join(resolution.missing)}",
+                    solution="Please supply these answers in the parameter file",
+                )
+                return response
 
-            workflow_answers = inquirer.prompt(questions, raise_keyboard_interrupt=True)
-            workflow_answers.update(auto_answers)
-            param_dict["jobbergate_config"].update(workflow_answers)
+            if resolution.invalid:
+                response = self.error_handle(
+                    error=f"Invalid answers: {'; '.join(resolution.invalid)}",
+                    solution="Please correct these answers and try again",
+                )
+                return response
 
-        param_filename = f"{JOBBERGATE_CACHE_DIR}/param_dict.json"
+            workflow_answers = resolution.answers
+            if resolution.deferred:
+                # Only now is the interactive prompt library needed
+                from jobbergate_cli import prompts
 
-        param_file = open(param_filename, "w")
-        json.dump(param_dict, param_file)
-        param_file.close()
+                with self.profiler.stage(f"prompt {method_name}"):
+                    workflow_answers = prompts.ask(
+                        resolution.deferred, workflow_answers
+                    )
+            config.update(workflow_answers)
+            hooks.start_post(method_name, config)
+
+        if hooks.waiting_post():
+            with self.profiler.stage("post functions"):
+                config.update(hooks.finish_post())
+        hooks.start_post("", config)
+        if hooks.waiting_post():
+            with self.profiler.stage("post functions *"):
+                config.update(hooks.finish_post())
+
+    def job_script_payload(
+        self, job_script_name, application_id, param_dict, sbatch_params
+    ):
+        """
+        Build the data POSTed to create a job script.
 
-        # TODO: Put below in function after testing - DRY
-        files = {"upload_file": open(param_filename, "rb")}
+        Keyword Arguments:
+            job_script_name  -- name for job script, unless the answers provide one
+            application_id   -- id of the application for the job script
+            param_dict       -- application config holding the collected answers
+            sbatch_params    -- optional raw sbatch parameters
+        """
+        data = dict(self.job_script_config)
+        data["job_script_name"] = job_script_name
+        data["job_script_owner"] = self.user_id
+        data["application"] = application_id
 
         # Possibly overwrite script name
         job_script_name_from_param = param_dict["jobbergate_config"].get(
@@ -620,17 +979,199 @@ class JobbergateApi:
                 data["sbatch_params_" + str(i)] = param
             data["sbatch_params_len"] = len(sbatch_params)
 
+        return data
+
+    def post_job_script(self, data, files):
+        """
+        POST a new job script to be rendered by the API.
+
+        Keyword Arguments:
+            data   -- job script payload, see job_script_payload
+            files  -- param_dict.json to upload as "upload_file"
+        """
         response = self.jobbergate_request(
             method="POST",
             endpoint=urljoin(self.api_endpoint, "/job-script/"),
             data=data,
             files=files,
         )
+        self.remember_entity("job-script", response)
+        self.record_entity("job-script", response, created=True)
+        return response
+
+    def local_application_data(self, application_path):
+        """
+        Read an application from a local directory, in the shape returned by the API.
+
+        Keyword Arguments:
+            application_path -- path to the dir where application files are
+        """
+        application_path = pathlib.Path(application_path)
+        return {
+            "application_file": (
+                application_path / JOBBERGATE_APPLICATION_MODULE_FILE_NAME
+            ).read_text(),
+            "application_config": (
+                application_path / JOBBERGATE_APPLICATION_CONFIG_FILE_NAME
+            ).read_text(),
+        }
+
+    def upload_param_dict(
+        self, job_script_name, application_id, param_dict, sbatch_params
+    ):
+        """
+        Create a job script rendered by the API from the collected answers.
+
+        Keyword Arguments:
+            job_script_name  -- name for job script, unless the answers provide one
+            application_id   -- id of the application for the job script
+            param_dict       -- application config holding the collected answers
+            sbatch_params    -- optional raw sbatch parameters
+        """
+        files = {"upload_file": ("param_dict.json", json_codec.dumps(param_dict))}
+        data = self.job_script_payload(
+            job_script_name, application_id, param_dict, sbatch_params
+        )
+        return self.post_job_script(data, files)
+
+    def create_job_script(
+        self,
+        job_script_name,
+        application_id,
+        application_identifier,
+        param_file,
+        sbatch_params,
+        fast,
+        no_submit,
+        debug,
+        application_path=None,
+        dry_run=False,
+        stream=None,
+    ):
+        """
+        CREATE a Job Script.
+
+        Keyword Arguments:
+            name                    --  Name for job script
+            application-id          --  id of the application for the job script
+            application-identifier  --  identifier of the application for the job script
+            param-file              --  optional parameter file for populating templates.
+                                        if this is not provided, the question askin in
+                                        jobbergate.py is triggered
+            sbatch-params           --  optional parameter to submit raw sbatch parameters
+            fast                    --  optional parameter to use default answers (when available)
+                                        instead of asking user
+            no-submit               --  optional parameter to not even ask about submitting job
+            debug                   --  optional parameter to view job script data
+                                        in CLI output
+            application-path        --  optional local application directory; the workflow
+                                        and templates are taken from it and the job script
+                                        is rendered locally, uploading only the result
+            dry-run                 --  render locally and return the files without
+                                        contacting the API; requires application-path
+            stream                  --  optional stream the job script data of debug is
+                                        written to, one file at a time, instead of
+                                        being included in the CLI output
+        """
+        parameter_check = []
+        if application_id and application_identifier:
+            response = self.error_handle(
+                error="Both identifier and id supplied",
+                solution="Please try again with only one",
+            )
+            parameter_check.append(response)
+
+        if not application_id and not application_identifier and not dry_run:
+            response = self.error_handle(
+                error="--application-id and --application-identifier for the job script not defined",
+                solution="Please try again with one of them specified",
+            )
+            parameter_check.append(response)
+
+        if dry_run and not application_path:
+            response = self.error_handle(
+                error="--dry-run requires --application-path",
+                solution="Please try again with the local application directory specified",
+            )
+            parameter_check.append(response)
+
+        if application_path:
+            parameter_check.extend(self.application_error_check(application_path))
+
+        if len(parameter_check) > 0:
+            response = parameter_check
+            return response
+
+        supplied_params = self.load_param_file(param_file)
+        if "error" in supplied_params.keys():
+            return supplied_params
+
+        if not dry_run:
+            with self.profiler.stage("download application"):
+                app_data = self.fetch_application(
+                    application_id, application_identifier
+                )
+            if "error" in app_data.keys():
+                return app_data
+            application_id = app_data["id"]
+
+        if application_path:
+            with self.profiler.stage("read local application"):
+                app_data = self.local_application_data(application_path)
+
+        with self.profiler.stage("parse config"):
+            param_dict = self.load_application_config(app_data)
+        if "error" in param_dict.keys():
+            return param_dict
+
+        # Exec the jobbergate application python module
+        with self.profiler.stage("import module"):
+            module = self.import_jobbergate_application_module(app_data)
+            application = module.JobbergateApplication(param_dict)
+
+        error = self.run_workflow(
+            application,
+            param_dict,
+            supplied_params,
+            fast,
+            application_registry=registry.of_module(module),
+        )
+        if error:
+            return error
+
+        if application_path:
+            try:
+                with self.profiler.stage("render"):
+                    rendered_dict = render.render_cached(
+                        application_path, param_dict, sbatch_params
+                    )
+            except (render.RenderError, OSError) as err:
+                response = self.error_handle(
+                    error=f"Could not render job script locally: {err}",
+                    solution="Please review the templates of the application",
+                )
+                return response
+
+            if dry_run:
+                return rendered_dict
+
+            data = self.job_script_payload(
+                job_script_name, application_id, param_dict, None
+            )
+            data["job_script_data_as_string"] = json_codec.dumps(rendered_dict)
+            with self.profiler.stage("upload"):
+                response = self.post_job_script(data, files=None)
+        else:
+            # the API renders the job script while handling the upload
+            with self.profiler.stage("upload and render"):
+                response = self.upload_param_dict(
+                    job_script_name, application_id, param_dict, sbatch_params
+                )
         if "error" in response.keys():
             return response
 
         try:
-            rendered_dict = json.loads(response["job_script_data_as_string"])
+            files = render.rendered_files(response["job_script_data_as_string"])
         except:  # noqa: E722
             response = self.error_handle(
                 error="could not load job_script_data_as_string from response",
@@ -638,15 +1179,15 @@ class JobbergateApi:
             )
             return response
 
-        job_script_data_as_string = ""
-        for key, value in rendered_dict.items():
-            job_script_data_as_string += "\n\nNEW_FILE\n\n"
-            job_script_data_as_string += value
-
-        response["job_script_data_as_string"] = job_script_data_as_string
-
         if debug is False:
             del response["job_script_data_as_string"]
+        elif stream is not None:
+            del response["job_script_data_as_string"]
+            render.print_rendered_files(files, stream, "\n\nNEW_FILE\n\n")
+        else:
+            response["job_script_data_as_string"] = render.join_rendered_files(
+                files, "\n\nNEW_FILE\n\n"
+            )
 
         # Check if user wants to submit immediately
         if no_submit:
@@ -654,34 +1195,218 @@ class JobbergateApi:
         elif fast:
             submit = True
         else:
-            submit = inquirer.prompt(
-                [
-                    inquirer.Confirm(
-                        "sub",
-                        message="Would you like to submit this immediately?",
-                        default=True,
-                    )
-                ]
-            )["sub"]
+            from jobbergate_cli import prompts
+
+            with self.profiler.stage("prompt submit"):
+                submit = prompts.confirm("Would you like to submit this immediately?")
 
         # Write local copy of script and supporting files
-        submission_result = self.create_job_submission(
-            job_script_id=response["id"],
-            render_only=not submit,
-            job_submission_name=response["job_script_name"],
-        )
+        with self.profiler.stage("submit" if submit else "write job script"):
+            submission_result = self.create_job_submission(
+                job_script_id=response["id"],
+                render_only=not submit,
+                job_submission_name=response["job_script_name"],
+            )
         if submit:
             response["submission_result"] = submission_result
 
         return response
 
-    def get_job_script(self, job_script_id, as_str):
+    def load_sweep_points(self, sweep_file):
+        """
+        Expand a sweep file into the list of parameter sets it describes.
+
+        The file holds either a JSON list of parameter objects, or an object with a
+        "grid" (every combination of the values of each axis) or a "zip" (the N-th
+        value of every axis together) spec. An optional "base" object is merged
+        under every point.
+
+        Keyword Arguments:
+            sweep_file -- path to the JSON sweep file
+        """
+        if not os.path.isfile(sweep_file):
+            return self.error_handle(
+                error=f"invalid --sweep-file supplied: {sweep_file}",
+                solution="Provide the full path to a valid sweep file",
+            )
+
+        with open(sweep_file, "rb") as fh:
+            try:
+                spec = json_codec.loads(fh.read())
+            except ValueError:
+                spec = None
+
+        if isinstance(spec, list):
+            base, points = {}, spec
+        elif isinstance(spec, dict) and ("grid" in spec) != ("zip" in spec):
+            base = spec.get("base", {})
+            axes = spec.get("grid") or spec.get("zip") or {}
+            names = list(axes.keys())
+            values = [axes[name] for name in names]
+            if "grid" in spec:
+                combinations = itertools.product(*values)
+            elif len({len(v) for v in values}) == 1:
+                combinations = zip(*values)
+            else:
+                return self.error_handle(
+                    error=f"invalid --sweep-file supplied: {sweep_file}",
+                    solution="Every axis of a zip sweep must have the same number of values",
+                )
+            points = [dict(zip(names, combination)) for combination in combinations]
+        else:
+            points = None
+
+        if not points or not all(isinstance(point, dict) for point in points):
+            return self.error_handle(
+                error=f"invalid --sweep-file supplied: {sweep_file}",
+                solution=(
+                    "The file must hold a non-empty JSON list of objects, "
+                    'or an object with either a "grid" or a "zip" spec'
+                ),
+            )
+        return [dict(base, **point) for point in points]
+
+    def create_job_script_sweep(
+        self,
+        job_script_name,
+        application_id,
+        application_identifier,
+        sweep_file,
+        param_file,
+        sbatch_params,
+        max_workers,
+    ):
+        """
+        CREATE one Job Script per point of a parameter sweep.
+
+        The application is downloaded and imported once. The workflow is resolved
+        without prompting for every point, and the job scripts are created
+        concurrently. Progress is reported on stderr as each point finishes.
+
+        Keyword Arguments:
+            job_script_name         --  base name for the job scripts, suffixed by point index;
+                                        defaults to the name of the application
+            application_id          --  id of the application for the job scripts
+            application_identifier  --  identifier of the application for the job scripts
+            sweep_file              --  JSON file describing the sweep, see load_sweep_points
+            param_file              --  optional answers shared by every point
+            sbatch_params           --  optional raw sbatch parameters
+            max_workers             --  maximum number of job scripts created at once
+        """
+        if application_id and application_identifier:
+            return self.error_handle(
+                error="Both identifier and id supplied",
+                solution="Please try again with only one",
+            )
+        if not application_id and not application_identifier:
+            return self.error_handle(
+                error="--application-id and --application-identifier for the job script not defined",
+                solution="Please try again with one of them specified",
+            )
+
+        points = self.load_sweep_points(sweep_file)
+        if isinstance(points, dict):
+            return points
+
+        shared_params = self.load_param_file(param_file)
+        if "error" in shared_params.keys():
+            return shared_params
+
+        with self.profiler.stage("download application"):
+            app_data = self.fetch_application(application_id, application_identifier)
+        if "error" in app_data.keys():
+            return app_data
+        application_id = app_data["id"]
+        job_script_name = job_script_name or app_data["application_name"]
+
+        with self.profiler.stage("parse config"):
+            app_config = self.load_application_config(app_data)
+        if "error" in app_config.keys():
+            return app_config
+        with self.profiler.stage("import module"):
+            module = self.import_jobbergate_application_module(app_data)
+
+        def resolve(index, point):
+            param_dict = copy.deepcopy(app_config)
+            application = module.JobbergateApplication(param_dict)
+            error = self.run_workflow(
+                application,
+                param_dict,
+                dict(shared_params, **point),
+                fast=True,
+                interactive=False,
+                application_registry=registry.of_module(module),
+            )
+            if error:
+                return error
+            data = self.job_script_payload(
+                f"{job_script_name}-{index}", application_id, param_dict, sbatch_params
+            )
+            files = {"upload_file": ("param_dict.json", json_codec.dumps(param_dict))}
+            return data, files
+
+        def create(data, files):
+            started = time.monotonic()
+            with self.profiler.stage("upload and render"):
+                response = self.post_job_script(data, files)
+            return response, time.monotonic() - started
+
+        results = [None] * len(points)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for index, point in enumerate(points):
+                resolved = resolve(index, point)
+                if isinstance(resolved, dict):
+                    results[index] = dict(point=index, **resolved)
+                    print(f"Point {index} failed: {resolved['error']}", file=sys.stderr)
+                else:
+                    futures[executor.submit(create, *resolved)] = index
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    response, elapsed = future.result()
+                except Exception as err:
+                    response = self.error_handle(
+                        error=f"Failed to create job script: {err}",
+                        solution="Please try again",
+                    )
+                    elapsed = None
+                if "error" in response.keys():
+                    results[index] = dict(point=index, **response)
+                    message = f"failed: {response['error']}"
+                else:
+                    results[index] = dict(
+                        point=index,
+                        id=response["id"],
+                        job_script_name=response["job_script_name"],
+                    )
+                    message = f"created job script {response['id']} in {elapsed:.2f}s"
+                print(
+                    f"[{done}/{len(futures)}] Point {index} {message}", file=sys.stderr
+                )
+
+        elapsed = time.monotonic() - started
+        created = len([result for result in results if "id" in result])
+        print(
+            f"Created {created}/{len(points)} job scripts in {elapsed:.2f}s "
+            f"({created / elapsed if elapsed else 0:.1f}/s)",
+            file=sys.stderr,
+        )
+        return results
+
+    def get_job_script(self, job_script_id, as_str, output_dir=None, stream=None):
         """
         GET a Job Script.
 
         Keyword Arguments:
             job_script_id -- id of job script to be returned
             as_str        -- return job script as str in CLI output
+            output_dir    -- optional directory to write the job script files to,
+                             instead of including them in the CLI output
+            stream        -- optional stream to write the job script files to, one at
+                             a time, instead of including them in the CLI output
         """
         if job_script_id is None:
             response = self.error_handle(
@@ -690,33 +1415,80 @@ class JobbergateApi:
             )
             return response
 
-        response = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, f"/job-script/{job_script_id}"),
-        )
+        response = self.get_entity("job-script", job_script_id)
         if "error" in response.keys():
             return response
 
-        rendered_dict = json.loads(response["job_script_data_as_string"])
+        files = render.rendered_files(response.pop("job_script_data_as_string"))
         if as_str:
-            return rendered_dict["application.sh"]
+            return dict(files)["application.sh"]
+        elif output_dir:
+            try:
+                paths = render.write_rendered_files(files, output_dir)
+            except (render.RenderError, OSError) as err:
+                response = self.error_handle(
+                    error=f"Could not write job script files: {err}",
+                    solution="Please review --output-dir and try again",
+                )
+                return response
+            response["job_script_files"] = [str(path) for path in paths]
+            return response
+        elif stream is not None:
+            render.print_rendered_files(files, stream, "\nNEW_FILE\n")
+            return response
         else:
-            job_script_data_as_string = ""
-            for key, value in rendered_dict.items():
-                job_script_data_as_string += "\nNEW_FILE\n"
-                job_script_data_as_string += value
-
-            response["job_script_data_as_string"] = job_script_data_as_string
-
+            response["job_script_data_as_string"] = render.join_rendered_files(
+                files, "\nNEW_FILE\n"
+            )
             return response
 
-    def update_job_script(self, job_script_id, job_script_data_as_string):
+    def read_job_script_files(self, job_script_file=None, job_script_dir=None):
+        """
+        Read the files of a job script from disk, in the shape stored by the API.
+
+        Keyword Arguments:
+            job_script_file  -- path to the main job script, stored as application.sh
+            job_script_dir   -- path to a directory holding the files of the job script,
+                                as written by get-job-script --output-dir
+        """
+        files = {}
+        if job_script_dir:
+            root = pathlib.Path(job_script_dir)
+            for path in sorted(root.rglob("*")):
+                if path.is_file():
+                    files[path.relative_to(root).as_posix()] = path.read_text()
+        if job_script_file:
+            files["application.sh"] = pathlib.Path(job_script_file).read_text()
+        return files
+
+    def update_job_script(
+        self,
+        job_script_id,
+        job_script_data_as_string=None,
+        job_script_file=None,
+        job_script_dir=None,
+        unmodified_since=None,
+    ):
         """
         UPDATE a Job Script.
 
+        The new content is sent as a partial update (PATCH). A job_script_file alone
+        is sent as job_script_files, which only replaces the main script, so the job
+        script is not downloaded; otherwise job_script_data_as_string is sent. The
+        update is conditional on the job script not having changed since
+        unmodified_since, or since the version fetched earlier in this invocation,
+        sent as an HTTP date in If-Unmodified-Since. When the API does not accept
+        partial updates, the whole job script is fetched and sent back instead.
+
         Keyword Arguments:
             job_script_id              -- id of job script to update
             job_script_data_as_string  -- data to update job script with
+            job_script_file            -- path to the new main job script; the other
+                                          files are kept unless job_script_dir is given
+            job_script_dir             -- path to a directory holding all the files
+                                          of the job script
+            unmodified_since           -- updated_at of the version the changes are
+                                          based on
         """
         if job_script_id is None:
             response = self.error_handle(
@@ -724,25 +1496,119 @@ class JobbergateApi:
                 solution="Please try again with --id specified",
             )
             return response
-        if job_script_data_as_string is None:
+        if job_script_data_as_string is not None and (
+            job_script_file or job_script_dir
+        ):
+            response = self.error_handle(
+                error="--job-script can not be combined with --job-script-file or --dir",
+                solution="Please provide the job script in one way only",
+            )
+            return response
+        if job_script_data_as_string is None and not (
+            job_script_file or job_script_dir
+        ):
             response = self.error_handle(
                 error="--job-script not defined",
                 solution=f"Provide data to update ID: {job_script_id}",
             )
             return response
 
-        data = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, f"/job-script/{job_script_id}"),
-        )
-        if "error" in data.keys():
-            return data
-        data["job_script_data_as_string"] = job_script_data_as_string
-        response = self.jobbergate_request(
-            method="PUT",
-            endpoint=urljoin(self.api_endpoint, f"/job-script/{job_script_id}/"),
-            data=data,
-        )
+        # files changed on top of the stored job script, when it is not replaced whole
+        changed_files = None
+        if job_script_data_as_string is None:
+            try:
+                files = self.read_job_script_files(job_script_file, job_script_dir)
+            except (OSError, UnicodeDecodeError) as err:
+                response = self.error_handle(
+                    error=f"Could not read the job script files: {err}",
+                    solution="Please review --job-script-file and --dir",
+                )
+                return response
+            if job_script_dir:
+                job_script_data_as_string = json_codec.dumps(files)
+            else:
+                changed_files = files
+
+        # the copy fetched by this invocation, the only one the changes can be based on
+        fetched = self.known_entity("job-script", job_script_id, ledger=False)
+        known = fetched or self.known_entity("job-script", job_script_id)
+        if unmodified_since is None and fetched is not None:
+            unmodified_since = fetched.get("updated_at")
+        headers = {}
+        if unmodified_since:
+            try:
+                headers["If-Unmodified-Since"] = http_date(unmodified_since)
+            except ValueError:
+                response = self.error_handle(
+                    error=f"Invalid --if-unmodified-since: {unmodified_since}",
+                    solution="Please provide an ISO date or an HTTP date",
+                )
+                return response
+        endpoint = urljoin(self.api_endpoint, f"/job-script/{job_script_id}/")
+
+        response = None
+        if changed_files is not None and self.partial_updates and self.file_updates:
+            response = self.jobbergate_request(
+                method="PATCH",
+                endpoint=endpoint,
+                data={"job_script_files": json_codec.dumps(changed_files)},
+                headers=headers,
+            )
+            if "error" in response.keys() and (
+                self.partial_updates and self.file_updates
+            ):
+                return response
+
+        if changed_files is not None and (
+            not self.partial_updates or not self.file_updates
+        ):
+            # the API only takes whole job scripts: merge the files into the stored ones
+            current = fetched
+            if current is None or "job_script_data_as_string" not in current:
+                current = self.get_entity("job-script", job_script_id)
+                if "error" in current.keys():
+                    return current
+                known = current
+            job_script_data_as_string = json_codec.dumps(
+                dict(
+                    render.rendered_files(current["job_script_data_as_string"]),
+                    **changed_files,
+                )
+            )
+            response = None
+
+        if job_script_data_as_string is not None and self.partial_updates:
+            response = self.jobbergate_request(
+                method="PATCH",
+                endpoint=endpoint,
+                data={"job_script_data_as_string": job_script_data_as_string},
+                headers=headers,
+            )
+        if response is None or not self.partial_updates:
+            data = self.get_entity("job-script", job_script_id)
+            if "error" in data.keys():
+                return data
+            data["job_script_data_as_string"] = job_script_data_as_string
+            response = self.jobbergate_request(
+                method="PUT", endpoint=endpoint, data=data, headers=headers
+            )
+
+        self.forget_entity("job-script", job_script_id)
+        if isinstance(response, dict) and "error" not in response:
+            # a PATCH may answer with the changed fields only
+            entity = dict(known or {})
+            if job_script_data_as_string is not None:
+                entity["job_script_data_as_string"] = job_script_data_as_string
+            elif "job_script_data_as_string" in entity:
+                entity["job_script_data_as_string"] = json_codec.dumps(
+                    dict(
+                        render.rendered_files(entity["job_script_data_as_string"]),
+                        **changed_files,
+                    )
+                )
+            entity.update(response)
+            self.remember_entity("job-script", entity)
+            self.record_entity("job-script", entity)
 
         return response
 
@@ -764,24 +1630,28 @@ class JobbergateApi:
             method="DELETE",
             endpoint=urljoin(self.api_endpoint, f"/job-script/{job_script_id}"),
         )
+        self.forget_entity("job-script", job_script_id)
+        if self.ledger is not None and "error" not in response:
+            self.ledger.delete("job-script", job_script_id)
 
         return response
 
     # Job Submissions
-    def list_job_submissions(self, all):
+    def list_job_submissions(self, all, sync=False, since=None, name=None, status=None):
         """
         LIST Job Submissions.
 
         Keyword Arguments:
-            all  -- optional parameter that will return all job submissions
-                    if NOT specified then only the user's job submissions
-                    will be returned
+            all     -- optional parameter that will return all job submissions
+                       if NOT specified then only the user's job submissions
+                       will be returned
+            sync    -- optional parameter to reconcile the local ledger with the API
+            since   -- optional ISO date; only job submissions updated since then
+            name    -- optional text the job submission names must contain
+            status  -- optional status the job submissions must have
         """
-        params = dict(all=True) if all else None
-        response = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, "/job-submission/"),
-            params=params,
+        response = self.list_entities(
+            "job-submission", all, sync=sync, since=since, name=name, status=status
         )
 
         try:
@@ -792,15 +1662,72 @@ class JobbergateApi:
         except Exception:
             return response
 
-    def create_job_submission(self, job_script_id, render_only, job_submission_name=""):
+    def load_array_params(self, array_param_file):
+        """
+        Load the per-task parameters of a job array.
+
+        Keyword Arguments:
+            array_param_file -- JSON file holding a list with one object per array task
+        """
+        if not os.path.isfile(array_param_file):
+            return self.error_handle(
+                error=f"invalid --array-param-file supplied: {array_param_file}",
+                solution="Provide the full path to a valid parameter file",
+            )
+
+        with open(array_param_file, "rb") as fh:
+            try:
+                array_params = json_codec.loads(fh.read())
+            except ValueError:
+                array_params = None
+
+        if (
+            not isinstance(array_params, list)
+            or not array_params
+            or not all(isinstance(task_params, dict) for task_params in array_params)
+        ):
+            return self.error_handle(
+                error=f"invalid --array-param-file supplied: {array_param_file}",
+                solution="The file must hold a non-empty JSON list of objects, one per array task",
+            )
+        return array_params
+
+    def write_array_params(self, script_filename, array_params):
+        """
+        Materialize the parameters of each array task next to the job script.
+
+        Task N finds its parameters in $JOBBERGATE_ARRAY_PARAMS_DIR/N.json.
+        Returns the directory where the files were written.
+
+        Keyword Arguments:
+            script_filename -- name of the job script submitted as an array
+            array_params    -- list with the parameters of each array task
+        """
+        params_dir = pathlib.Path.cwd() / f"{script_filename}.array"
+        params_dir.mkdir(exist_ok=True)
+        for task_id, task_params in enumerate(array_params):
+            (params_dir / f"{task_id}.json").write_text(json_codec.dumps(task_params))
+        return params_dir
+
+    def create_job_submission(
+        self,
+        job_script_id,
+        render_only,
+        job_submission_name="",
+        array_param_file=None,
+        array_max_concurrent=None,
+    ):
         """
         CREATE Job Submission.
 
         Keyword Arguments:
-            job_script_id -- id of job script to submit
-            name          -- name for job submission
-            render_only   -- create record in API and return data to CLI
-                             but DO NOT submit job
+            job_script_id         -- id of job script to submit
+            name                  -- name for job submission
+            render_only           -- create record in API and return data to CLI
+                                     but DO NOT submit job
+            array_param_file      -- optional JSON list of parameters, one entry per task,
+                                     to submit the job script as a single Slurm job array
+            array_max_concurrent  -- optional limit of array tasks running at once
         """
         if job_script_id is None:
             response = self.error_handle(
@@ -809,38 +1736,58 @@ class JobbergateApi:
             )
             return response
 
-        data = self.job_submission_config
+        array_params = None
+        if array_param_file:
+            array_params = self.load_array_params(array_param_file)
+            if isinstance(array_params, dict):
+                return array_params
+
+        data = dict(self.job_submission_config)
         data["job_submission_name"] = job_submission_name
         data["job_script"] = job_script_id
         data["job_submission_owner"] = self.user_id
 
-        job_script = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, f"/job-script/{job_script_id}"),
-        )
+        job_script = self.get_entity("job-script", job_script_id)
         if "error" in job_script.keys():
             return job_script
 
         application_id = job_script["application"]
 
-        application = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, f"/application/{application_id}"),
-        )
+        application = self.get_entity("application", application_id)
         if "error" in application.keys():
             return application
 
         application_name = application["application_name"]
 
-        rendered_dict = json.loads(job_script["job_script_data_as_string"])
-
         script_filename = f'{job_script["job_script_name"]}.job'
-        for key, value in rendered_dict.items():
-            filename = key if key != "application.sh" else script_filename
-            file_path = pathlib.Path.cwd() / filename
-            file_path.write_text(value)
-            # with open(filename, 'w') as write_file:
-            #     write_file.write(value)
+        try:
+            render.write_rendered_files(
+                render.rendered_files(job_script["job_script_data_as_string"]),
+                pathlib.Path.cwd(),
+                rename={"application.sh": script_filename},
+            )
+        except render.RenderError as err:
+            response = self.error_handle(
+                error=f"Could not write job script files: {err}",
+                solution="Please review the supporting files of the application",
+            )
+            return response
+
+        sbatch_args = []
+        if array_params:
+            params_dir = self.write_array_params(script_filename, array_params)
+            array_spec = f"0-{len(array_params) - 1}"
+            if array_max_concurrent:
+                array_spec += f"%{array_max_concurrent}"
+            sbatch_args = [
+                f"--array={array_spec}",
+                f"--export=ALL,JOBBERGATE_ARRAY_PARAMS_DIR={params_dir}",
+            ]
+            array_note = f"Slurm job array with {len(array_params)} tasks"
+            description = data.get("job_submission_description")
+            data["job_submission_description"] = (
+                f"{description} ({array_note})" if description else array_note
+            )
 
         if render_only:
             response = self.jobbergate_request(
@@ -852,34 +1799,115 @@ class JobbergateApi:
                 return response
         else:
             try:
-                output, err, rc = self.jobbergate_run(script_filename, application_name)
+                slurm_job_id = self.sbatch.submit(
+                    script_filename, application_name, sbatch_args=sbatch_args
+                )
             except FileNotFoundError:
                 response = self.error_handle(
                     error="Failed to execute submission",
                     solution="Please confirm slurm sbatch is available",
                 )
                 return response
-
-            if rc == 0:
-                print(output)
-                find = output.find("job") + 4
-                slurm_job_id = output[find:]
-                data["slurm_job_id"] = slurm_job_id
-                response = self.jobbergate_request(
-                    method="POST",
-                    endpoint=urljoin(self.api_endpoint, "/job-submission/"),
-                    data=data,
-                )
-                if "error" in response.keys():
-                    return response
-            else:
+            except SbatchError as err:
                 response = self.error_handle(
                     error=f"Failed to execute submission with error: {err}",
                     solution="Please resolve error or contact for assistance",
                 )
                 return response
+
+            output.notice(f"Submitted batch job {slurm_job_id}")
+            data["slurm_job_id"] = slurm_job_id
+            response = self.jobbergate_request(
+                method="POST",
+                endpoint=urljoin(self.api_endpoint, "/job-submission/"),
+                data=data,
+            )
+            if "error" in response.keys():
+                return response
+        self.remember_entity("job-submission", response)
+        self.record_entity("job-submission", response, created=True)
         return response
 
+    def watch_job_submissions(
+        self, job_submission_ids, all, min_interval, max_interval, once
+    ):
+        """
+        WATCH the Slurm state of many Job Submissions.
+
+        All tracked jobs are looked up with one squeue/sacct query per tick, and only
+        state transitions are printed. The wait between ticks grows while nothing
+        changes.
+
+        Keyword Arguments:
+            job_submission_ids  -- ids of the job submissions to watch; all of the
+                                   listed job submissions when empty
+            all                 -- list all job submissions, not only the user's
+            min_interval        -- shortest wait between two ticks, in seconds
+            max_interval        -- longest wait between two ticks, in seconds
+            once                -- query the states once and return them
+        """
+        params = dict(all=True) if all else None
+        response = self.jobbergate_request(
+            method="GET",
+            endpoint=urljoin(self.api_endpoint, "/job-submission/"),
+            params=params,
+        )
+        if not isinstance(response, list):
+            return response
+
+        wanted = {str(id_) for id_ in job_submission_ids}
+        tracked = {
+            str(submission["slurm_job_id"]).strip(): submission
+            for submission in response
+            if submission.get("slurm_job_id")
+            and (not wanted or str(submission["id"]) in wanted)
+        }
+        if not tracked:
+            response = self.error_handle(
+                error="No job submissions with a Slurm job id to watch",
+                solution="Please check the ids of the job submissions",
+            )
+            return response
+
+        watcher = JobStateWatcher(
+            tracked.keys(), min_interval=min_interval, max_interval=max_interval
+        )
+        try:
+            for tick, transitions in enumerate(
+                watcher.watch(max_ticks=1 if once else None)
+            ):
+                if once:
+                    break
+                if tick == 0:
+                    counts = Counter(state for _, _, state in transitions)
+                    print(
+                        f"Watching {len(tracked)} job submissions: "
+                        + ", ".join(
+                            f"{n} {state}" for state, n in sorted(counts.items())
+                        )
+                    )
+                    continue
+                for slurm_job_id, old_state, new_state in transitions:
+                    submission = tracked[slurm_job_id]
+                    print(
+                        f"Job submission {submission['id']} (slurm job {slurm_job_id}): "
+                        f"{old_state} -> {new_state}"
+                    )
+        except KeyboardInterrupt:
+            pass
+
+        if once:
+            return [
+                dict(
+                    id=submission["id"],
+                    job_submission_name=submission.get("job_submission_name"),
+                    slurm_job_id=slurm_job_id,
+                    state=watcher.snapshot[slurm_job_id],
+                )
+                for slurm_job_id, submission in tracked.items()
+            ]
+        return dict(Counter(watcher.snapshot.values()))
+
     def get_job_submission(self, job_submission_id):
         """
         GET a Job Submission.
@@ -948,6 +1976,9 @@ class JobbergateApi:
             method="DELETE",
             endpoint=urljoin(self.api_endpoint, f"/job-submission/{job_submission_id}"),
         )
+        self.forget_entity("job-submission", job_submission_id)
+        if self.ledger is not None and "error" not in response:
+            self.ledger.delete("job-submission", job_submission_id)
 
         return response
 
@@ -969,19 +2000,18 @@ class JobbergateApi:
             params["all"] = True
         if user:
             params["user"] = True
-        response = self.jobbergate_request(
-            method="GET",
-            endpoint=urljoin(self.api_endpoint, "/application/"),
-            params=params,
-        )
+        response = self.list_request("application", params=params)
         try:
             return sorted(
                 [
-                    {
-                        k: (v if k != "application_description" else _fit_line(v))
-                        for (k, v) in d.items()
-                        if k not in self.application_suppress
-                    }
+                    self.lazy_record(
+                        "application",
+                        {
+                            k: (v if k != "application_description" else _fit_line(v))
+                            for (k, v) in d.items()
+                            if k not in self.application_suppress
+                        },
+                    )
                     for d in response
                 ],
                 key=lambda app: app["id"],
@@ -1029,7 +2059,7 @@ class JobbergateApi:
             response = error_check
             return response
 
-        data = self.application_config
+        data = dict(self.application_config)
         data["application_name"] = application_name
         data["application_owner"] = self.user_id
 
@@ -1039,10 +2069,7 @@ class JobbergateApi:
         if application_desc:
             data["application_description"] = application_desc
 
-        tar_list = [application_path, os.path.join(application_path, "templates")]
-        self.tardir(application_path, TAR_NAME, tar_list)
-
-        files = {"upload_file": open(TAR_NAME, "rb")}
+        files = self.pack_application(application_path)
 
         response = self.jobbergate_request(
             method="POST",
@@ -1060,10 +2087,266 @@ class JobbergateApi:
             # response is str of error message
             return response
 
-        os.remove(TAR_NAME)
+        return response
+
+    def scan_applications(self, root):
+        """
+        Find the application directories under root, by identifier.
+
+        An application directory holds jobbergate.py and jobbergate.yaml, and its
+        identifier is the name of the directory. Hidden directories and the
+        subdirectories of applications are not searched.
+
+        Keyword Arguments:
+            root -- directory to scan
+        """
+        found = {}
+        for path, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            if {
+                JOBBERGATE_APPLICATION_MODULE_FILE_NAME,
+                JOBBERGATE_APPLICATION_CONFIG_FILE_NAME,
+            } <= set(filenames):
+                found.setdefault(os.path.basename(path), []).append(path)
+                dirnames[:] = []
+        return found
+
+    def validate_application(self, application_path):
+        """
+        Check an application directory before it is uploaded.
+
+        Returns the reason it is invalid, or None. jobbergate.py is compiled but not
+        run, and jobbergate.yaml must be a YAML mapping.
+
+        Keyword Arguments:
+            application_path -- path to the dir where application files are
+        """
+        errors = self.application_error_check(application_path)
+        if errors:
+            return errors[0]["error"]
+        application_data = self.local_application_data(application_path)
+        try:
+            compile(
+                application_data["application_file"],
+                os.path.join(application_path, JOBBERGATE_APPLICATION_MODULE_FILE_NAME),
+                "exec",
+            )
+        except SyntaxError as err:
+            return f"Invalid {JOBBERGATE_APPLICATION_MODULE_FILE_NAME}: {err}"
+        try:
+            config = yaml.safe_load(application_data["application_config"])
+        except yaml.YAMLError as err:
+            return f"Invalid {JOBBERGATE_APPLICATION_CONFIG_FILE_NAME}: {err}"
+        if not isinstance(config, dict):
+            return f"{JOBBERGATE_APPLICATION_CONFIG_FILE_NAME} is not a mapping"
+        return None
+
+    def upload_application(self, identifier, application_path, listed=None):
+        """
+        Pack an application directory in memory, and create or update it on the API.
+
+        Keyword Arguments:
+            identifier        -- identifier of the application
+            application_path  -- path to the dir where application files are
+            listed            -- the application as listed by the API, to update it;
+                                 None to create it
+        """
+        files = self.pack_application(application_path)
+
+        if listed is None:
+            data = dict(self.application_config)
+            data["application_name"] = identifier
+            data["application_identifier"] = identifier
+            data["application_owner"] = self.user_id
+            return self.jobbergate_request(
+                method="POST",
+                endpoint=urljoin(self.api_endpoint, "/application/"),
+                data=data,
+                files=files,
+            )
 
+        data = self.jobbergate_request(
+            method="GET",
+            endpoint=urljoin(self.api_endpoint, f"/application/{listed['id']}"),
+        )
+        if "error" in data.keys():
+            return data
+        for key in ("id", "created_at", "updated_at"):
+            data.pop(key, None)
+        data.update(self.local_application_data(application_path))
+        response = self.jobbergate_request(
+            method="PUT",
+            endpoint=urljoin(self.api_endpoint, f"/application/{listed['id']}/"),
+            data=data,
+            files=files,
+        )
+        self.forget_entity("application", listed["id"])
         return response
 
+    def sync_applications(
+        self,
+        root,
+        all=False,
+        max_workers=JOBBERGATE_SYNC_MAX_WORKERS,
+        dry_run=False,
+        state_path=JOBBERGATE_SYNC_STATE_PATH,
+    ):
+        """
+        SYNC a directory tree of applications to the API.
+
+        Application directories are matched to the applications of the API by
+        identifier, see scan_applications. An application is uploaded when it is new,
+        when its files changed since this client last uploaded it, or when it was
+        changed on the API since then. An application this client has no record of is
+        fetched, and uploaded when the content hash of its module and config differs
+        from the local one. The changed applications are validated, packed and
+        uploaded concurrently. Returns one row per application with the action taken.
+
+        Keyword Arguments:
+            root         -- directory holding the applications
+            all          -- match against all applications, not only the user's
+            max_workers  -- maximum number of applications uploaded at once
+            dry_run      -- only report what would be uploaded
+            state_path   -- JSON file remembering what was uploaded
+        """
+        found = self.scan_applications(root)
+        if not found:
+            response = self.error_handle(
+                error=f"No application found under {root}",
+                solution=(
+                    f"Please provide a directory whose subdirectories hold "
+                    f"{JOBBERGATE_APPLICATION_MODULE_FILE_NAME} and "
+                    f"{JOBBERGATE_APPLICATION_CONFIG_FILE_NAME}"
+                ),
+            )
+            return response
+
+        params = dict(all=True) if all else dict(all=True, user=True)
+        response = self.list_request("application", params=params)
+        if not isinstance(response, list):
+            return response
+        listed = {
+            entity["application_identifier"]: entity
+            for entity in response
+            if entity.get("application_identifier")
+        }
+
+        state_path = pathlib.Path(state_path)
+        try:
+            state = json_codec.loads(state_path.read_bytes())
+        except (OSError, ValueError):
+            state = {}
+
+        state_changed = False
+        rows = {}
+        pending = []
+        for identifier, paths in sorted(found.items()):
+            row = dict(
+                identifier=identifier,
+                action="unchanged",
+                id=None,
+                path=paths[0],
+                error=None,
+            )
+            rows[identifier] = row
+            entity = listed.get(identifier)
+            if entity is not None:
+                row["id"] = entity["id"]
+            if len(paths) > 1:
+                row.update(action="invalid", error=f"Also found in {paths[1]}")
+                continue
+            version = render.application_version(paths[0])
+            known = state.get(identifier)
+            if entity is not None and known is None:
+                # not synced by this client: compare with the copy on the API
+                remote = self.get_entity("application", entity["id"])
+                if "error" not in remote and render.application_content_hash(
+                    remote
+                ) == render.application_content_hash(
+                    self.local_application_data(paths[0])
+                ):
+                    known = dict(version=version, updated_at=entity.get("updated_at"))
+                    state[identifier] = known
+                    state_changed = True
+            known = known or {}
+            if entity is None:
+                row["action"] = "create"
+            elif known.get("version") != version or (
+                known.get("updated_at") != entity.get("updated_at")
+            ):
+                row["action"] = "update"
+            else:
+                continue
+            error = self.validate_application(paths[0])
+            if error:
+                row.update(action="invalid", error=error)
+            else:
+                pending.append((identifier, version))
+
+        if dry_run:
+            return list(rows.values())
+        if not pending:
+            if state_changed:
+                self.save_sync_state(state_path, state)
+            return list(rows.values())
+
+        def upload(identifier, version):
+            response = self.upload_application(
+                identifier, rows[identifier]["path"], listed.get(identifier)
+            )
+            if isinstance(response, dict) and "error" not in response:
+                with state_lock:
+                    state[identifier] = dict(
+                        version=version, updated_at=response.get("updated_at")
+                    )
+            return response
+
+        client.use_pooled_session(max_workers)
+        state_lock = threading.Lock()
+        progress = output.ProgressLine(len(pending), "Synced")
+        failed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(upload, identifier, version): identifier
+                    for identifier, version in pending
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    row = rows[futures[future]]
+                    try:
+                        response = future.result()
+                    except Exception as err:
+                        response = self.error_handle(error=str(err), solution="")
+                    if not isinstance(response, dict):
+                        response = self.error_handle(error=str(response), solution="")
+                    if "error" in response:
+                        failed += 1
+                        row["error"] = response["error"]
+                        row["action"] += " failed"
+                    else:
+                        row["id"] = response.get("id", row.get("id"))
+                    progress.update(done, failed)
+        finally:
+            progress.finish()
+            with state_lock:
+                self.save_sync_state(state_path, state)
+
+        return list(rows.values())
+
+    def save_sync_state(self, state_path, state):
+        """
+        Write the state of sync_applications, replacing the previous one atomically.
+
+        Keyword Arguments:
+            state_path  -- JSON file remembering what was uploaded
+            state       -- version and updated_at of the synced applications
+        """
+        text = json_codec.dumps(state, indent=2, sort_keys=True)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text)
+        os.replace(str(tmp_path), str(state_path))
+
     def get_application(self, application_id, application_identifier):
         """
         GET an Application.
@@ -1190,10 +2473,7 @@ class JobbergateApi:
             )
             return response
 
-        tar_list = [application_path, os.path.join(application_path, "templates")]
-        self.tardir(application_path, TAR_NAME, tar_list)
-
-        files = {"upload_file": open(TAR_NAME, "rb")}
+        files = self.pack_application(application_path)
 
         response = self.jobbergate_request(
             method="PUT",
@@ -1201,14 +2481,13 @@ class JobbergateApi:
             data=data,
             files=files,
         )
+        self.forget_entity("application", application_id)
         if "error" in response.keys():
             return response
 
         try:
             for key in self.application_suppress:
                 response.pop(key, None)
-
-            os.remove(TAR_NAME)
         except AttributeError:
             # response is str of error message
             return response
@@ -1239,6 +2518,7 @@ class JobbergateApi:
                 method="DELETE",
                 endpoint=urljoin(self.api_endpoint, f"/application/{application_id}"),
             )
+            self.forget_entity("application", application_id)
         else:
             response = self.jobbergate_request(
                 method="DELETE",
@@ -1250,6 +2530,273 @@ class JobbergateApi:
 
         return response
 
+    def delete_entity(self, kind, entity_id):
+        """
+        DELETE a single object of any kind.
+
+        Keyword Arguments:
+            kind       -- type of the object: application, job-script, job-submission
+            entity_id  -- id of the object to delete
+        """
+        if kind == "application":
+            return self.delete_application(entity_id, None)
+        if kind == "job-script":
+            return self.delete_job_script(entity_id)
+        return self.delete_job_submission(entity_id)
+
+    def select_entities(self, kind, all, ids=None, older_than=None, name_glob=None):
+        """
+        Resolve the ids of the objects matching the selection of a bulk command.
+
+        Filters are applied to a listing fetched from the API. When ids are given
+        too, only the listed objects among them are selected.
+
+        Keyword Arguments:
+            kind        -- type of the objects: application, job-script, job-submission
+            all         -- apply the filters to all objects, not only the user's
+            ids         -- ids and ranges of ids, e.g. "1,4-7"
+            older_than  -- only objects last updated before this age (e.g. 30d, 12h)
+                           or ISO date
+            name_glob   -- only objects whose name matches this shell-style pattern
+        """
+        try:
+            selected = parse_ids(ids) if ids else None
+            cutoff = parse_timestamp(parse_age(older_than)) if older_than else None
+        except ValueError as err:
+            response = self.error_handle(
+                error=str(err),
+                solution="Please use ids like 1,4-7 and ages like 30d, 12h or 2021-12-01",
+            )
+            return response
+        if not (cutoff or name_glob):
+            return selected or []
+
+        if kind == "application":
+            params = dict(all=True) if all else dict(all=True, user=True)
+        else:
+            params = dict(all=True) if all else None
+        response = self.list_request(kind, params=params)
+        if not isinstance(response, list):
+            return response
+
+        def updated_before(entity):
+            # objects without a readable updated_at are never old enough
+            try:
+                return parse_timestamp(entity.get("updated_at") or "") < cutoff
+            except ValueError:
+                return False
+
+        wanted = set(selected) if selected is not None else None
+        name_field = ledger.NAME_FIELDS[kind]
+        return [
+            int(entity["id"])
+            for entity in response
+            if (wanted is None or int(entity["id"]) in wanted)
+            and (cutoff is None or updated_before(entity))
+            and (
+                not name_glob
+                or fnmatch.fnmatchcase(entity.get(name_field) or "", name_glob)
+            )
+        ]
+
+    def delete_many(
+        self,
+        kind,
+        all=False,
+        ids=None,
+        older_than=None,
+        name_glob=None,
+        max_workers=JOBBERGATE_DELETE_MAX_WORKERS,
+        yes=False,
+    ):
+        """
+        DELETE many objects at once.
+
+        The objects are selected by id or by filters, see select_entities, and the
+        deletion is confirmed unless yes is set. Deletes are sent concurrently through
+        one pooled session. Progress is reported on stderr, as well as every failure.
+        Returns a summary of the deletion.
+
+        Keyword Arguments:
+            kind         -- type of the objects: application, job-script, job-submission
+            max_workers  -- maximum number of deletes sent at once
+            yes          -- do not ask for confirmation
+        """
+        selected = self.select_entities(kind, all, ids, older_than, name_glob)
+        if isinstance(selected, dict):
+            return selected
+        if not selected:
+            response = self.error_handle(
+                error=f"No {kind} matched the selection",
+                solution="Please review --ids, --older-than and --name-glob",
+            )
+            return response
+
+        if not yes:
+            from jobbergate_cli import prompts
+
+            if not prompts.confirm(f"Delete {len(selected)} {kind}(s)?", default=False):
+                response = self.error_handle(
+                    error="Nothing was deleted",
+                    solution="Please confirm the deletion, or pass --yes",
+                )
+                return response
+
+        client.use_pooled_session(max_workers)
+        progress = output.ProgressLine(len(selected), "Deleted")
+        failed = []
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.delete_entity, kind, entity_id): entity_id
+                for entity_id in selected
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                entity_id = futures[future]
+                try:
+                    response = future.result()
+                except Exception as err:
+                    response = self.error_handle(error=str(err), solution="")
+                if isinstance(response, dict) and "error" in response:
+                    failed.append(entity_id)
+                    progress.finish()
+                    print(
+                        f"Failed to delete {kind} {entity_id}: {response['error']}",
+                        file=sys.stderr,
+                    )
+                progress.update(done, len(failed))
+        progress.finish()
+
+        summary = dict(
+            requested=len(selected),
+            deleted=len(selected) - len(failed),
+            failed=len(failed),
+            seconds=round(time.monotonic() - started, 2),
+        )
+        if failed:
+            summary["failed_ids"] = format_ids(failed)
+        return summary
+
+    def export(
+        self,
+        output_dir,
+        all=False,
+        kinds=("application", "job-script"),
+        max_workers=JOBBERGATE_EXPORT_MAX_WORKERS,
+    ):
+        """
+        EXPORT applications and job scripts to a directory tree.
+
+        Everything listed is downloaded concurrently through one pooled session and
+        recorded in the manifest of the directory, see the export module. Objects
+        already exported at their current updated_at are skipped, so an interrupted
+        export resumes, and a repeated export only downloads what changed. Returns a
+        summary of the export.
+
+        Keyword Arguments:
+            output_dir   -- directory to export to
+            all          -- export all objects, not only the user's
+            kinds        -- types of the objects to export
+            max_workers  -- maximum number of objects downloaded at once
+        """
+        manifest = export.Manifest(output_dir)
+        pending = []
+        summary = dict(listed=0, exported=0, unchanged=0, failed=0)
+        for kind in kinds:
+            if kind == "application":
+                params = dict(all=True) if all else dict(all=True, user=True)
+            else:
+                params = dict(all=True) if all else None
+            response = self.list_request(kind, params=params)
+            if not isinstance(response, list):
+                return response
+            summary["listed"] += len(response)
+            for entity in response:
+                key = f"{kind}/{entity['id']}"
+                if manifest.is_current(key, entity.get("updated_at")):
+                    summary["unchanged"] += 1
+                else:
+                    pending.append((kind, entity["id"]))
+
+        def download(kind, entity_id):
+            # only the status is returned, and the entity is not remembered in the
+            # identity map, so no more than max_workers downloads are held at once
+            entity = self.jobbergate_request(
+                method="GET",
+                endpoint=urljoin(self.api_endpoint, f"/{kind}/{entity_id}"),
+            )
+            if "error" in entity:
+                return entity
+            manifest.write_object(
+                f"{kind}/{entity_id}",
+                entity.get("updated_at"),
+                export.object_files(kind, entity),
+            )
+            return {}
+
+        client.use_pooled_session(max_workers)
+        progress = output.ProgressLine(len(pending), "Exported")
+        failed = []
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(download, kind, entity_id): (kind, entity_id)
+                    for kind, entity_id in pending
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    kind, entity_id = futures.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as err:
+                        response = self.error_handle(error=str(err), solution="")
+                    if "error" in response:
+                        failed.append(f"{kind}/{entity_id}")
+                        progress.finish()
+                        output.notice(
+                            f"Failed to export {kind} {entity_id}: {response['error']}"
+                        )
+                    if done % export.SAVE_EVERY == 0:
+                        manifest.save()
+                    progress.update(done, len(failed))
+        finally:
+            # keep what was exported, also when interrupted
+            manifest.save()
+            progress.finish()
+
+        summary["exported"] = len(pending) - len(failed)
+        summary["failed"] = len(failed)
+        summary["seconds"] = round(time.monotonic() - started, 2)
+        summary["manifest"] = str(manifest.path)
+        if failed:
+            summary["failed_objects"] = ",".join(failed)
+        return summary
+
+
+class LazyRecord(dict):
+    """
+    Object from a listing whose heavy fields are fetched on first access.
+
+    Accessing one of the lazy fields with record[key] loads the whole object once
+    and fills in the fields the listing left out. Other ways of reading the record,
+    such as get() or iteration, only see the listed fields.
+    """
+
+    def __init__(self, fields, lazy_fields, load):
+        super().__init__(fields)
+        self.lazy_fields = lazy_fields
+        self._load = load
+
+    def __missing__(self, key):
+        if key not in self.lazy_fields or self._load is None:
+            raise KeyError(key)
+        load, self._load = self._load, None
+        detail = load()
+        if "error" not in detail:
+            for detail_key, value in detail.items():
+                self.setdefault(detail_key, value)
+        return self[key]
+
 
 def _fit_line(s: str, n: int = 79):
     """
@@ -1272,3 +2819,110 @@ def _fit_line(s: str, n: int = 79):
         return s[:snip] + "..."
 
     return s
+
+
+def parse_ids(spec):
+    """
+    Parse ids and ranges of ids, such as "1,4-7", into a sorted list of ids.
+
+    Raises ValueError for anything else.
+    """
+    ids = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if dash else first
+        except ValueError:
+            raise ValueError(f"Invalid id or range of ids: {part}")
+        if first > last:
+            raise ValueError(f"Invalid range of ids: {part}")
+        ids.update(range(first, last + 1))
+    if not ids:
+        raise ValueError(f"No ids in: {spec}")
+    return sorted(ids)
+
+
+def format_ids(ids):
+    """Format ids as the shortest list of ids and ranges, the reverse of parse_ids."""
+    parts = []
+    for _, group in itertools.groupby(
+        enumerate(sorted(ids)), lambda item: item[1] - item[0]
+    ):
+        group = [entity_id for _, entity_id in group]
+        if len(group) == 1:
+            parts.append(str(group[0]))
+        else:
+            parts.append(f"{group[0]}-{group[-1]}")
+    return ",".join(parts)
+
+
+TIMESTAMP_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}:\d{2}:\d{2})(?:\.(\d+))?)?"
+    r"(Z|[+-]\d{2}:?\d{2})?"
+)
+
+
+def parse_timestamp(value):
+    """
+    Turn an ISO timestamp, as reported by the API, into an aware datetime.
+
+    Timestamps without an offset are in UTC. Raises ValueError for anything else.
+    """
+    match = TIMESTAMP_PATTERN.fullmatch(value.strip())
+    if match is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    date, time_of_day, fraction, offset = match.groups()
+    parsed = datetime.strptime(
+        f"{date} {time_of_day or '00:00:00'}", "%Y-%m-%d %H:%M:%S"
+    ).replace(microsecond=int((fraction or "0")[:6].ljust(6, "0")))
+    if offset in (None, "Z"):
+        return parsed.replace(tzinfo=timezone.utc)
+    sign = -1 if offset[0] == "-" else 1
+    hours, minutes = int(offset[1:3]), int(offset[-2:])
+    return parsed.replace(
+        tzinfo=timezone(sign * timedelta(hours=hours, minutes=minutes))
+    )
+
+
+def http_date(value):
+    """
+    Turn an ISO timestamp or an HTTP date into an HTTP date, as used by conditional
+    request headers. Raises ValueError for anything else.
+    """
+    try:
+        parsed = parse_timestamp(value)
+    except ValueError:
+        try:
+            parsed = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            raise ValueError(f"Invalid timestamp: {value}")
+        if parsed is None:
+            raise ValueError(f"Invalid timestamp: {value}")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+    return email.utils.format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
+
+
+AGE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_age(value, now=None):
+    """
+    Turn an age such as "30d" or "12h", or an ISO date, into an ISO timestamp.
+
+    Ages are counted back from now, in UTC, as the API reports updated_at.
+    Raises ValueError for anything else.
+    """
+    unit = AGE_UNITS.get(value[-1:])
+    if unit and value[:-1].isdigit():
+        now = now or datetime.utcnow()
+        return (now - timedelta(**{unit: int(value[:-1])})).isoformat()
+    for date_format in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, date_format).isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid age or date: {value}")
@@ -2,8 +2,10 @@
 Constants used throughout the tool
 """
 from configparser import ConfigParser
+import hashlib
 import os
 from pathlib import Path
+from types import MappingProxyType
 from urllib.parse import urljoin
 
 from dotenv import load_dotenv
@@ -40,6 +42,13 @@ JOBBERGATE_USER_TOKEN_DIR = JOBBERGATE_CACHE_DIR / "token"
 
 JOBBERGATE_API_JWT_PATH = JOBBERGATE_USER_TOKEN_DIR / "jobbergate.token"
 
+# lock file held while the token is refreshed, so concurrent processes log in once;
+# the others wait for it up to JOBBERGATE_TOKEN_LOCK_TIMEOUT seconds
+JOBBERGATE_API_JWT_LOCK_PATH = JOBBERGATE_USER_TOKEN_DIR / "jobbergate.token.lock"
+JOBBERGATE_TOKEN_LOCK_TIMEOUT = float(
+    os.environ.get("JOBBERGATE_TOKEN_LOCK_TIMEOUT", 60)
+)
+
 JOBBERGATE_API_OBTAIN_TOKEN_ENDPOINT = urljoin(
     JOBBERGATE_API_ENDPOINT, "api-token-auth/"
 )
@@ -49,29 +58,61 @@ JOBBERGATE_APPLICATION_S3_BASE_PATH = "jobbergate-resources"
 
 SBATCH_PATH = os.environ.get("SBATCH_PATH", "/usr/bin/sbatch")
 
-JOBBERGATE_APPLICATION_CONFIG = {
-    "application_name": "",
-    "application_description": "",
-    "application_location": "TEST_LOC",
-    "application_owner": "",
-    "application_file": "",
-    "application_config": "",
-}
-
-JOBBERGATE_JOB_SCRIPT_CONFIG = {
-    "job_script_name": "",
-    "job_script_description": "TEST_DESC",
-    "job_script_data_as_string": "TEST_DATA_AS_STR",
-    "job_script_owner": "",
-    "application": "",
-}
-
-JOBBERGATE_JOB_SUBMISSION_CONFIG = {
-    "job_submission_name": "",
-    "job_submission_description": "TEST_DESC",
-    "job_submission_owner": "",
-    "job_script": "",
-}
+SQUEUE_PATH = os.environ.get("SQUEUE_PATH", "/usr/bin/squeue")
+
+SACCT_PATH = os.environ.get("SACCT_PATH", "/usr/bin/sacct")
+
+# seconds to wait for each sbatch call
+SBATCH_TIMEOUT = float(os.environ.get("SBATCH_TIMEOUT", 60))
+
+# delete requests sent at once by the bulk delete commands
+JOBBERGATE_DELETE_MAX_WORKERS = int(os.environ.get("JOBBERGATE_DELETE_MAX_WORKERS", 8))
+
+# objects downloaded at once by the export command
+JOBBERGATE_EXPORT_MAX_WORKERS = int(os.environ.get("JOBBERGATE_EXPORT_MAX_WORKERS", 8))
+
+# applications uploaded at once by sync-applications
+JOBBERGATE_SYNC_MAX_WORKERS = int(os.environ.get("JOBBERGATE_SYNC_MAX_WORKERS", 4))
+
+# pre and post functions of application workflows running at once
+WORKFLOW_HOOK_MAX_WORKERS = int(os.environ.get("WORKFLOW_HOOK_MAX_WORKERS", 4))
+
+# seconds a snapshot of the SLURM queue is reused by jobberappslib
+JOBBERGATE_QUEUE_SNAPSHOT_TTL = float(
+    os.environ.get("JOBBERGATE_QUEUE_SNAPSHOT_TTL", 10)
+)
+
+# base payloads of the objects created through the API. They are read-only: each
+# request copies them into a payload of its own.
+JOBBERGATE_APPLICATION_CONFIG = MappingProxyType(
+    {
+        "application_name": "",
+        "application_description": "",
+        "application_location": "TEST_LOC",
+        "application_owner": "",
+        "application_file": "",
+        "application_config": "",
+    }
+)
+
+JOBBERGATE_JOB_SCRIPT_CONFIG = MappingProxyType(
+    {
+        "job_script_name": "",
+        "job_script_description": "TEST_DESC",
+        "job_script_data_as_string": "TEST_DATA_AS_STR",
+        "job_script_owner": "",
+        "application": "",
+    }
+)
+
+JOBBERGATE_JOB_SUBMISSION_CONFIG = MappingProxyType(
+    {
+        "job_submission_name": "",
+        "job_submission_description": "TEST_DESC",
+        "job_submission_owner": "",
+        "job_script": "",
+    }
+)
 
 JOBBERGATE_APPLICATION_MODULE_FILE_NAME = "jobbergate.py"
 
@@ -87,6 +128,25 @@ JOBBERGATE_APPLICATION_CONFIG_PATH = (
 
 TAR_NAME = "jobbergate.tar.gz"
 
+# job scripts rendered locally, by application version and parameter hash
+JOBBERGATE_RENDER_CACHE_DIR = JOBBERGATE_CACHE_DIR / "rendered"
+
+# local ledger of job scripts and job submissions, reconciled with the API when older
+# than JOBBERGATE_LEDGER_TTL seconds; one per API endpoint, as ids are per server
+JOBBERGATE_LEDGER_PATH = JOBBERGATE_CACHE_DIR / (
+    "ledger-"
+    + hashlib.sha256(JOBBERGATE_API_ENDPOINT.rstrip("/").encode()).hexdigest()[:16]
+    + ".sqlite3"
+)
+JOBBERGATE_LEDGER_TTL = float(os.environ.get("JOBBERGATE_LEDGER_TTL", 300))
+
+# report written by create-job-script --profile-workflow
+JOBBERGATE_WORKFLOW_PROFILE_PATH = JOBBERGATE_CACHE_DIR / "workflow-profile.json"
+
+# identifier, version and updated_at of the applications uploaded by
+# sync-applications
+JOBBERGATE_SYNC_STATE_PATH = JOBBERGATE_CACHE_DIR / "application-sync.json"
+
 JOBBERGATE_APPLICATION_MODULE_PATH = (
     JOBBERGATE_CACHE_DIR / JOBBERGATE_APPLICATION_MODULE_FILE_NAME
 )
@@ -0,0 +1,54 @@
+"""
+JSON encoding and decoding for the CLI.
+
+Uses orjson when it is installed and the standard library otherwise. Both backends
+produce the same text: compact output has no spaces after separators, and indented
+output is laid out like ``json.dumps(obj, indent=2)``. Unlike the json.dumps
+default, non-ASCII characters are written as they are rather than escaped, since
+orjson can not escape them. Invalid JSON raises ValueError with either backend.
+"""
+import json
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+BACKEND = "json" if orjson is None else "orjson"
+
+
+def loads(data):
+    """Decode a JSON document given as str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=None, sort_keys=False):
+    """
+    Encode obj as a JSON str.
+
+    :param indent: None for compact output, or 2 for pretty-printed output
+    :param sort_keys: Whether to write the keys of objects in sorted order
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            # Values orjson does not handle, such as integers beyond 64 bits, are
+            # left to the standard library
+            pass
+    return json.dumps(
+        obj,
+        indent=indent,
+        sort_keys=sort_keys,
+        ensure_ascii=False,
+        separators=(",", ": ") if indent else (",", ":"),
+    )
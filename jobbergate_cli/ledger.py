@@ -0,0 +1,218 @@
+"""
+Local SQLite ledger of job scripts and job submissions.
+
+List commands answer from the ledger, which is reconciled with the API when it is
+older than JOBBERGATE_LEDGER_TTL or when a sync is forced. Create, update and delete
+commands write through to it, so the ledger reflects this client's own changes
+immediately. The ledger is only a cache: a write through that fails, for instance
+because another process holds the database lock, is logged and skipped, and the
+next sync catches up.
+
+Each listing scope ("all", or one user's objects) remembers which ids the API
+returned for it at the last sync, so the ledger never needs to know how the API
+represents owners.
+"""
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+from jobbergate_cli import json_codec
+from jobbergate_cli.jobbergate_common import (
+    JOBBERGATE_LEDGER_PATH,
+    JOBBERGATE_LEDGER_TTL,
+)
+
+
+# name of the field holding the human-friendly name of each kind of object
+NAME_FIELDS = {
+    "application": "application_name",
+    "job-script": "job_script_name",
+    "job-submission": "job_submission_name",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT,
+    status TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS entities_updated_at ON entities (kind, updated_at);
+CREATE INDEX IF NOT EXISTS entities_name ON entities (kind, name);
+CREATE TABLE IF NOT EXISTS listings (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (kind, scope, id)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (kind, scope)
+);
+"""
+
+
+class Ledger:
+    """
+    SQLite store of the job scripts and job submissions seen by this client.
+
+    A single connection is shared between threads, guarded by a lock.
+
+    :param path: Path to the SQLite database file
+    :param ttl: Seconds after which a listing scope is reconciled with the API again
+    """
+
+    def __init__(self, path=JOBBERGATE_LEDGER_PATH, ttl=JOBBERGATE_LEDGER_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def _row(self, kind, entity):
+        return (
+            kind,
+            int(entity["id"]),
+            entity.get(NAME_FIELDS.get(kind)),
+            entity.get("status"),
+            entity.get("updated_at"),
+            json_codec.dumps(entity),
+        )
+
+    def is_stale(self, kind, scope):
+        """Whether the listing scope was never synced or was synced too long ago."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT synced_at FROM syncs WHERE kind = ? AND scope = ?",
+                (kind, scope),
+            ).fetchone()
+        return row is None or time.time() - row[0] >= self.ttl
+
+    def sync(self, kind, scope, entities):
+        """
+        Reconcile a listing scope with the objects just listed by the API.
+
+        Only objects whose updated_at changed are rewritten. Objects the API no longer
+        lists in this scope leave it.
+        """
+        with self._lock, self._connection:
+            known = dict(
+                self._connection.execute(
+                    "SELECT id, updated_at FROM entities WHERE kind = ?", (kind,)
+                )
+            )
+            changed = [
+                self._row(kind, entity)
+                for entity in entities
+                if int(entity["id"]) not in known
+                or known[int(entity["id"])] != entity.get("updated_at")
+            ]
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?)", changed
+            )
+            self._connection.execute(
+                "DELETE FROM listings WHERE kind = ? AND scope = ?", (kind, scope)
+            )
+            self._connection.executemany(
+                "INSERT INTO listings VALUES (?, ?, ?)",
+                ((kind, scope, int(entity["id"])) for entity in entities),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)",
+                (kind, scope, time.time()),
+            )
+
+    def upsert(self, kind, entity, scopes=()):
+        """
+        Write an object created or updated by this client.
+
+        :param scopes: Listing scopes the object now belongs to, in addition to the
+                       ones it already belonged to
+        """
+        if not isinstance(entity, dict) or "error" in entity or "id" not in entity:
+            return
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?)",
+                    self._row(kind, entity),
+                )
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO listings VALUES (?, ?, ?)",
+                    ((kind, scope, int(entity["id"])) for scope in scopes),
+                )
+        except sqlite3.Error as err:
+            logger.warning(f"Local ledger not updated for {kind} {entity['id']}: {err}")
+
+    def delete(self, kind, entity_id):
+        """Drop an object deleted by this client."""
+        try:
+            with self._lock, self._connection:
+                for table in ("entities", "listings"):
+                    self._connection.execute(
+                        f"DELETE FROM {table} WHERE kind = ? AND id = ?",
+                        (kind, int(entity_id)),
+                    )
+        except sqlite3.Error as err:
+            logger.warning(f"Local ledger not updated for {kind} {entity_id}: {err}")
+
+    def get(self, kind, entity_id):
+        """Return the stored copy of an object, or None, also when it can't be read."""
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT data FROM entities WHERE kind = ? AND id = ?",
+                    (kind, int(entity_id)),
+                ).fetchone()
+        except sqlite3.Error as err:
+            logger.warning(f"Local ledger not read for {kind} {entity_id}: {err}")
+            return None
+        return None if row is None else json_codec.loads(row[0])
+
+    def query(self, kind, scope, since=None, name=None, status=None):
+        """
+        List the objects of a listing scope, ordered by id.
+
+        :param since: Only objects updated at or after this ISO date or timestamp
+        :param name: Only objects whose name contains this text, ignoring case
+        :param status: Only objects with this status, ignoring case
+        """
+        sql = (
+            "SELECT entities.data FROM entities JOIN listings"
+            " ON listings.kind = entities.kind AND listings.id = entities.id"
+            " WHERE entities.kind = ? AND listings.scope = ?"
+        )
+        args = [kind, scope]
+        if since:
+            sql += " AND entities.updated_at >= ?"
+            args.append(since)
+        if name:
+            sql += " AND instr(lower(entities.name), lower(?)) > 0"
+            args.append(name)
+        if status:
+            sql += " AND lower(entities.status) = lower(?)"
+            args.append(status)
+        sql += " ORDER BY entities.id"
+        with self._lock:
+            rows = self._connection.execute(sql, args).fetchall()
+        return [json_codec.loads(data) for (data,) in rows]
+
+
+def matches(kind, entity, since=None, name=None, status=None):
+    """Apply the filters of Ledger.query to an object listed by the API."""
+    if since and (entity.get("updated_at") or "") < since:
+        return False
+    if name and name.lower() not in (entity.get(NAME_FIELDS[kind]) or "").lower():
+        return False
+    if status and (entity.get("status") or "").lower() != status.lower():
+        return False
+    return True
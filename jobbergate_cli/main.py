@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
+from contextlib import contextmanager
 from datetime import datetime
 import functools
 import getpass
-import json
+import os
 from pathlib import Path
+import sqlite3
 import sys
 import tarfile
 import tempfile
 import textwrap
+import time
 
 import boto3
 import click
@@ -15,12 +18,12 @@ import jwt
 from loguru import logger
 import requests
 import sentry_sdk
-from tabulate import tabulate
 
-from jobbergate_cli import client
+from jobbergate_cli import client, json_codec
 from jobbergate_cli.jobbergate_api_wrapper import JobbergateApi
 from jobbergate_cli.jobbergate_common import (
     JOBBERGATE_API_ENDPOINT,
+    JOBBERGATE_API_JWT_LOCK_PATH,
     JOBBERGATE_API_JWT_PATH,
     JOBBERGATE_API_OBTAIN_TOKEN_ENDPOINT,
     JOBBERGATE_APPLICATION_CONFIG,
@@ -28,17 +31,31 @@ from jobbergate_cli.jobbergate_common import (
     JOBBERGATE_AWS_SECRET_ACCESS_KEY,
     JOBBERGATE_CACHE_DIR,
     JOBBERGATE_DEBUG,
+    JOBBERGATE_DELETE_MAX_WORKERS,
+    JOBBERGATE_EXPORT_MAX_WORKERS,
     JOBBERGATE_JOB_SCRIPT_CONFIG,
     JOBBERGATE_JOB_SUBMISSION_CONFIG,
     JOBBERGATE_LOG_PATH,
     JOBBERGATE_PASSWORD,
     JOBBERGATE_S3_LOG_BUCKET,
+    JOBBERGATE_SYNC_MAX_WORKERS,
+    JOBBERGATE_TOKEN_LOCK_TIMEOUT,
     JOBBERGATE_USER_TOKEN_DIR,
     JOBBERGATE_USERNAME,
+    JOBBERGATE_WORKFLOW_PROFILE_PATH,
     SENTRY_DSN,
 )
+from jobbergate_cli.ledger import Ledger
+from jobbergate_cli.output import FORMATS, write_response
+from jobbergate_cli.profiler import WorkflowProfiler
 
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # not available on Windows, where the token is refreshed without a lock
+    fcntl = None
+
 # These are used in help text for the application commands below
 APPLICATION_ID_EXPLANATION = """
 
@@ -65,6 +82,57 @@ UPDATE_IDENTIFIER_EXPLANATION = """
 """
 
 
+def bulk_delete_options(func):
+    """Add the options selecting many objects to a delete command."""
+    options = [
+        click.option(
+            "--ids",
+            help="Ids and ranges of ids of the objects to delete, e.g. 1,4-7",
+        ),
+        click.option(
+            "--older-than",
+            help="Delete the objects last updated before this age (e.g. 30d, 12h) or date",
+        ),
+        click.option(
+            "--name-glob",
+            help="Delete the objects whose name matches this pattern, e.g. 'campaign-*'",
+        ),
+        click.option(
+            "--all",
+            "all_",
+            is_flag=True,
+            help="Apply --older-than and --name-glob to all objects, not only yours",
+        ),
+        click.option(
+            "--workers",
+            type=click.IntRange(min=1),
+            default=JOBBERGATE_DELETE_MAX_WORKERS,
+            show_default=True,
+            help="Maximum number of deletes sent at once",
+        ),
+        click.option(
+            "--yes",
+            is_flag=True,
+            help="Do not ask for confirmation before deleting many objects",
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def is_bulk_delete(single, ids, older_than, name_glob):
+    """
+    Whether a delete command selects many objects, which excludes selecting one.
+    """
+    bulk = bool(ids or older_than or name_glob)
+    if bulk and single:
+        raise click.UsageError(
+            "--id and --identifier can not be combined with --ids, --older-than or --name-glob"
+        )
+    return bulk
+
+
 def interactive_get_username_password(username, password):
     if not username:
         username = input("Please enter your username: ")
@@ -99,22 +167,22 @@ def init_logs(username=None, verbose=False):
 
 def tabulate_response(response):
     """Print a tabulated json response"""
-    if isinstance(response, list):
-        text = tabulate((my_dict for my_dict in response), headers="keys")
-    elif isinstance(response, dict):
-        text = tabulate(response.items())
-    else:
-        text = str(response)
-    print(text)
+    write_response(response, "table")
 
 
 def raw_response(response):
     """Print a raw, pretty-printed json response"""
-    if isinstance(response, (list, dict)):
-        text = json.dumps(response, indent=2)
-    else:
-        text = str(response)
-    print(text)
+    write_response(response, "raw")
+
+
+def text_stream(ctx):
+    """
+    Stream long text such as job script files can be written to directly.
+
+    In the table format, text is printed as it is, so it is written to stdout one
+    piece at a time. The other formats encode it in the response, so None is returned.
+    """
+    return sys.stdout if ctx.obj["format"] == "table" else None
 
 
 def jobbergate_command_wrapper(func):
@@ -138,18 +206,21 @@ def jobbergate_command_wrapper(func):
 
             result = func(ctx, *args, **kwargs)
             if result:
-                if ctx.obj["raw"]:
-                    raw_response(result)
-                else:
-                    tabulate_response(result)
+                write_response(result, ctx.obj["format"])
 
             logger.debug(f"Finished command '{ctx.command.name}'")
             return result
 
+        except click.ClickException:
+            # usage errors are reported by click itself
+            raise
+
         except Exception as err:
+            # commands running offline have no token
+            token = ctx.obj.get("token", {})
             message = "Caught error for {user} ({id_}) in {fn}({args_string})".format(
-                user=ctx.obj["token"]["username"],
-                id_=ctx.obj["token"]["user_id"],
+                user=token.get("username"),
+                id_=token.get("user_id"),
                 fn=func.__name__,
                 args_string=", ".join(
                     list(args) + [f"{k}={v}" for (k, v) in kwargs.items()]
@@ -164,8 +235,8 @@ def jobbergate_command_wrapper(func):
                     scope.set_context(
                         "command_info",
                         dict(
-                            username=ctx.obj["token"]["username"],
-                            user_id=ctx.obj["token"]["user_id"],
+                            username=token.get("username"),
+                            user_id=token.get("user_id"),
                             function=func.__name__,
                             command=ctx.command.name,
                             args=args,
@@ -204,11 +275,66 @@ def init_token(username, password):
         logger.error(f"Failed to retrieve a token, got response: {resp.text}")
         resp.raise_for_status()
 
-    data = resp.json()
+    data = json_codec.loads(resp.content)
     token = data.get("token")
     if not token:
         raise ValueError("No token found in response")
-    JOBBERGATE_API_JWT_PATH.write_text(token)
+    # replace the token file atomically, so other processes never read half a token
+    tmp_path = JOBBERGATE_API_JWT_PATH.with_name(
+        f"{JOBBERGATE_API_JWT_PATH.name}.{os.getpid()}.tmp"
+    )
+    tmp_path.write_text(token)
+    os.replace(str(tmp_path), str(JOBBERGATE_API_JWT_PATH))
+
+
+@contextmanager
+def token_lock(timeout=JOBBERGATE_TOKEN_LOCK_TIMEOUT):
+    """
+    Hold the token lock file, so one process at a time refreshes the token.
+
+    Waits up to timeout seconds for the lock, then goes on without it. Yields whether
+    the lock is held. Without fcntl, nothing is locked.
+    """
+    if fcntl is None:
+        yield False
+        return
+
+    JOBBERGATE_API_JWT_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(JOBBERGATE_API_JWT_LOCK_PATH), "a") as lock_file:
+        deadline = time.monotonic() + timeout
+        locked = False
+        while not locked:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        f"Token lock still held after {timeout}s, refreshing anyway"
+                    )
+                    break
+                time.sleep(0.05)
+        try:
+            yield locked
+        finally:
+            if locked:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def refresh_token(username, password):
+    """
+    Get a new token, unless another process got one while this one waited for it.
+
+    Processes started together with an expired token all find it invalid: the first
+    to take the token lock logs in, and the others find the new token valid once they
+    get the lock, and reuse it. Returns whether this process logged in.
+    """
+    with token_lock():
+        if is_token_valid():
+            logger.debug("Token was refreshed by another process")
+            return False
+        init_token(username, password)
+        return True
 
 
 def is_token_valid():
@@ -243,6 +369,19 @@ def decode_token_to_dict(encoded_token):
     return token
 
 
+def open_ledger():
+    """Open the local ledger, or return None when it is unavailable."""
+    try:
+        return Ledger()
+    except (sqlite3.Error, OSError) as err:
+        logger.warning(f"Local ledger unavailable, listing from the API: {str(err)}")
+        return None
+
+
+# subcommands that log in themselves, as some of their options run offline
+OFFLINE_COMMANDS = {"create-job-script"}
+
+
 def init_sentry():
     """Initialize Sentry."""
     logger.debug("Initializing sentry")
@@ -307,20 +446,29 @@ def init_sentry():
     is_flag=True,
     help="Print output as raw json",
 )
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(list(FORMATS)),
+    default="table",
+    help="Output format. jsonl, csv and tsv print one row per line. --raw is --format raw",
+)
 @click.option(
     "--full",
     "-f",
     is_flag=True,
-    help="Print all columns. Must be used with --raw",
+    help="Print all columns. Must be used with --raw or a --format other than table",
 )
 @click.version_option()
 @click.pass_context
-def main(ctx, username, password, verbose, raw, full):
+def main(ctx, username, password, verbose, raw, output_format, full):
     ctx.ensure_object(dict)
 
-    if full and not raw:
+    if raw:
+        output_format = "raw"
+    if full and output_format == "table":
         raise click.ClickException(
-            "--full option must be used with --raw",
+            "--full option must be used with --raw or a --format other than table",
         )
 
     init_cache_dir()
@@ -336,6 +484,18 @@ def main(ctx, username, password, verbose, raw, full):
     if JOBBERGATE_DEBUG:
         client.debug_requests_on()
 
+    ctx.obj["format"] = output_format
+    ctx.obj["full"] = full
+    ctx.obj["login"] = functools.partial(login, ctx, username, password, full)
+    # these subcommands log in themselves, unless they run offline
+    if ctx.invoked_subcommand not in OFFLINE_COMMANDS:
+        ctx.obj["login"]()
+
+
+def login(ctx, username, password, full):
+    """
+    Log in, unless the cached token is still valid, and create the API client.
+    """
     if not is_token_valid():
         logger.debug("Token is not valid. Getting credentials.")
         if username and password:
@@ -351,7 +511,7 @@ def main(ctx, username, password, verbose, raw, full):
 
         try:
             logger.debug(f"Initializing token for {username}")
-            init_token(username, password)
+            refresh_token(username, password)
         except requests.exceptions.ConnectionError as err:
             message = f"Auth failed to establish connection with API: {str(err)}"
             sentry_sdk.capture_message(message)
@@ -366,20 +526,31 @@ def main(ctx, username, password, verbose, raw, full):
             )
 
     logger.debug("Decoding auth token")
-    ctx.obj["token"] = decode_token_to_dict(JOBBERGATE_API_JWT_PATH.read_text())
+    encoded_token = JOBBERGATE_API_JWT_PATH.read_text()
+    ctx.obj["token"] = decode_token_to_dict(encoded_token)
     username = ctx.obj["token"]["username"]
     user_id = ctx.obj["token"]["user_id"]
     logger.debug(f"User invoking jobbergate-cli is {username} ({user_id})")
     ctx.obj["api"] = JobbergateApi(
-        token=JOBBERGATE_API_JWT_PATH.read_text(),
+        token=encoded_token,
         job_script_config=JOBBERGATE_JOB_SCRIPT_CONFIG,
         job_submission_config=JOBBERGATE_JOB_SUBMISSION_CONFIG,
         application_config=JOBBERGATE_APPLICATION_CONFIG,
         api_endpoint=JOBBERGATE_API_ENDPOINT,
         user_id=user_id,
         full_output=full,
+        ledger_factory=open_ledger,
+    )
+
+
+def offline_api(full):
+    """API client of the subcommands running without the API, so without a token."""
+    return JobbergateApi(
+        job_script_config=JOBBERGATE_JOB_SCRIPT_CONFIG,
+        application_config=JOBBERGATE_APPLICATION_CONFIG,
+        api_endpoint=JOBBERGATE_API_ENDPOINT,
+        full_output=full,
     )
-    ctx.obj["raw"] = raw
 
 
 @main.command("list-applications")
@@ -516,16 +687,60 @@ def update_application(
     "--identifier",
     help=f"The human-friendly identifier of the application to delete. {APPLICATION_IDENTIFIER_EXPLANATION}",
 )
+@bulk_delete_options
 @click.pass_context
 @jobbergate_command_wrapper
-def delete_application(ctx, id_, identifier):
+def delete_application(
+    ctx, id_, identifier, ids, older_than, name_glob, all_, workers, yes
+):
     """
-    DELETE an Application.
+    DELETE an Application, or many with --ids, --older-than or --name-glob.
     """
     api = ctx.obj["api"]
+    if is_bulk_delete(id_ or identifier, ids, older_than, name_glob):
+        return api.delete_many(
+            "application", all_, ids, older_than, name_glob, workers, yes
+        )
     return api.delete_application(id_, identifier)
 
 
+@main.command("sync-applications")
+@click.option(
+    "--application-dir",
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory holding one subdirectory per application, named by identifier",
+)
+@click.option(
+    "--all",
+    "all_",
+    is_flag=True,
+    help="Match the identifiers against all applications, not only yours",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=JOBBERGATE_SYNC_MAX_WORKERS,
+    show_default=True,
+    help="Maximum number of applications uploaded at once",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only show which applications would be created or updated",
+)
+@click.pass_context
+@jobbergate_command_wrapper
+def sync_applications(ctx, application_dir, all_, workers, dry_run):
+    """
+    SYNC a directory of applications, uploading the new and changed ones.
+    """
+    api = ctx.obj["api"]
+    return api.sync_applications(
+        application_dir, all=all_, max_workers=workers, dry_run=dry_run
+    )
+
+
 @main.command("list-job-scripts")
 @click.option(
     "--all",
@@ -536,14 +751,27 @@ def delete_application(ctx, id_, identifier):
         If NOT specified then only the user's job scripts will be returned.
     """,
 )
+@click.option(
+    "--since",
+    help="Optional ISO date; only list the job scripts updated since then.",
+)
+@click.option(
+    "--name",
+    help="Optional text the names of the listed job scripts must contain.",
+)
+@click.option(
+    "--sync",
+    is_flag=True,
+    help="Reconcile the local ledger with the API before listing.",
+)
 @click.pass_context
 @jobbergate_command_wrapper
-def list_job_scripts(ctx, all_=False):
+def list_job_scripts(ctx, all_=False, since=None, name=None, sync=False):
     """
     LIST Job Scripts.
     """
     api = ctx.obj["api"]
-    return api.list_job_scripts(all_)
+    return api.list_job_scripts(all_, sync=sync, since=since, name=name)
 
 
 @main.command("create-job-script")
@@ -594,6 +822,50 @@ def list_job_scripts(ctx, all_=False):
     is_flag=True,
     help="Optional parameter to view job script data in CLI output",
 )
+@click.option(
+    "--application-path",
+    "-a",
+    type=click.Path(),
+    help="""
+        Optional path to a local copy of the application directory. The questions and
+        templates are taken from it and the job script is rendered locally, so only the
+        rendered job script is uploaded
+    """,
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="""
+        Optional flag to render the job script locally and print the files without
+        contacting the API. Must be used with --application-path
+    """,
+)
+@click.option(
+    "--sweep-file",
+    type=click.Path(),
+    help="""
+        Optional JSON file describing a parameter sweep: either a list of parameter
+        objects, or an object with a "grid" or "zip" spec mapping each parameter to
+        its values. One job script is created per point, without asking questions
+        and without submitting. Answers from --param-file are shared by every point.
+    """,
+)
+@click.option(
+    "--sweep-workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum number of job scripts created at once in a sweep",
+)
+@click.option(
+    "--profile-workflow",
+    is_flag=True,
+    help=f"""
+        Time each stage: application download, config parsing, module import, each
+        workflow method and batch of prompts, rendering and upload. The breakdown
+        is printed to stderr and written to {JOBBERGATE_WORKFLOW_PROFILE_PATH}.
+    """,
+)
 @click.pass_context
 @jobbergate_command_wrapper
 def create_job_script(
@@ -606,21 +878,50 @@ def create_job_script(
     fast=False,
     no_submit=False,
     debug=False,
+    application_path=None,
+    dry_run=False,
+    sweep_file=None,
+    sweep_workers=4,
+    profile_workflow=False,
 ):
     """
     CREATE a Job Script.
     """
+    if dry_run:
+        ctx.obj["api"] = offline_api(ctx.obj.get("full", False))
+    elif "api" not in ctx.obj:
+        ctx.obj["login"]()
     api = ctx.obj["api"]
-    return api.create_job_script(
-        name,
-        application_id,
-        application_identifier,
-        param_file,
-        sbatch_params,
-        fast,
-        no_submit,
-        debug,
-    )
+    if profile_workflow:
+        api.profiler = WorkflowProfiler()
+    try:
+        if sweep_file:
+            return api.create_job_script_sweep(
+                name,
+                application_id,
+                application_identifier,
+                sweep_file,
+                param_file,
+                sbatch_params,
+                sweep_workers,
+            )
+        return api.create_job_script(
+            name,
+            application_id,
+            application_identifier,
+            param_file,
+            sbatch_params,
+            fast,
+            no_submit,
+            debug,
+            application_path=application_path,
+            dry_run=dry_run,
+            stream=text_stream(ctx),
+        )
+    finally:
+        if profile_workflow:
+            print(api.profiler.format(), file=sys.stderr)
+            api.profiler.write(JOBBERGATE_WORKFLOW_PROFILE_PATH)
 
 
 @main.command("get-job-script")
@@ -634,14 +935,21 @@ def create_job_script(
     "--as-string",
     is_flag=True,
 )
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    help="Write the job script files to this directory instead of printing them",
+)
 @click.pass_context
 @jobbergate_command_wrapper
-def get_job_script(ctx, id_, as_string):
+def get_job_script(ctx, id_, as_string, output_dir):
     """
     GET a Job Script.
     """
     api = ctx.obj["api"]
-    return api.get_job_script(id_, as_string)
+    return api.get_job_script(
+        id_, as_string, output_dir=output_dir, stream=text_stream(ctx)
+    )
 
 
 @main.command("update-job-script")
@@ -661,25 +969,51 @@ def get_job_script(ctx, id_, as_string):
         Example: '{"application.sh":"#!/bin/bash \\n hostname"}'
     """,
 )
+@click.option(
+    "--job-script-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="File holding the new main job script. The other files are kept.",
+)
+@click.option(
+    "--dir",
+    "dir_",
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory holding all the files of the job script, e.g. as written by get-job-script --output-dir",
+)
+@click.option(
+    "--if-unmodified-since",
+    help="updated_at of the version the changes are based on, as an ISO or HTTP date. Fails if changed since.",
+)
 @click.pass_context
 @jobbergate_command_wrapper
-def update_job_script(ctx, id_, job_script):
+def update_job_script(ctx, id_, job_script, job_script_file, dir_, if_unmodified_since):
     """
     UPDATE a Job Script.
     """
     api = ctx.obj["api"]
-    return api.update_job_script(id_, job_script)
+    return api.update_job_script(
+        id_,
+        job_script,
+        job_script_file=job_script_file,
+        job_script_dir=dir_,
+        unmodified_since=if_unmodified_since,
+    )
 
 
 @main.command("delete-job-script")
 @click.option("--id", "-i", "id_", help="The id of job script to delete")
+@bulk_delete_options
 @click.pass_context
 @jobbergate_command_wrapper
-def delete_job_script(ctx, id_):
+def delete_job_script(ctx, id_, ids, older_than, name_glob, all_, workers, yes):
     """
-    DELETE a Job Script.
+    DELETE a Job Script, or many with --ids, --older-than or --name-glob.
     """
     api = ctx.obj["api"]
+    if is_bulk_delete(id_, ids, older_than, name_glob):
+        return api.delete_many(
+            "job-script", all_, ids, older_than, name_glob, workers, yes
+        )
     return api.delete_job_script(id_)
 
 
@@ -693,14 +1027,35 @@ def delete_job_script(ctx, id_):
         If NOT specified then only the user's job submissions will be returned.
     """,
 )
+@click.option(
+    "--since",
+    help="Optional ISO date; only list the job submissions updated since then.",
+)
+@click.option(
+    "--name",
+    help="Optional text the names of the listed job submissions must contain.",
+)
+@click.option(
+    "--sync",
+    is_flag=True,
+    help="Reconcile the local ledger with the API before listing.",
+)
+@click.option(
+    "--status",
+    help="Optional status the listed job submissions must have.",
+)
 @click.pass_context
 @jobbergate_command_wrapper
-def list_job_submissions(ctx, all_=False):
+def list_job_submissions(
+    ctx, all_=False, since=None, name=None, sync=False, status=None
+):
     """
     LIST Job Submissions.
     """
     api = ctx.obj["api"]
-    return api.list_job_submissions(all_)
+    return api.list_job_submissions(
+        all_, sync=sync, since=since, name=name, status=status
+    )
 
 
 @main.command("create-job-submission")
@@ -722,6 +1077,20 @@ def list_job_submissions(ctx, all_=False):
         WILL NOT submit job
     """,
 )
+@click.option(
+    "--array-param-file",
+    type=click.Path(),
+    help="""
+        Optional JSON file with a list of parameter sets. The job script is submitted
+        once as a Slurm job array with one task per entry. Task N finds its parameters
+        in $JOBBERGATE_ARRAY_PARAMS_DIR/N.json
+    """,
+)
+@click.option(
+    "--array-max-concurrent",
+    type=int,
+    help="Optional limit of array tasks running at once. Must be used with --array-param-file",
+)
 @click.pass_context
 @jobbergate_command_wrapper
 def create_job_submission(
@@ -729,13 +1098,23 @@ def create_job_submission(
     job_script_id,
     name="",
     dry_run=False,
+    array_param_file=None,
+    array_max_concurrent=None,
 ):
     """
     CREATE Job Submission.
     """
+    if array_max_concurrent is not None and not array_param_file:
+        raise click.UsageError(
+            "--array-max-concurrent must be used with --array-param-file"
+        )
     api = ctx.obj["api"]
     return api.create_job_submission(
-        job_script_id=job_script_id, job_submission_name=name, render_only=dry_run
+        job_script_id=job_script_id,
+        job_submission_name=name,
+        render_only=dry_run,
+        array_param_file=array_param_file,
+        array_max_concurrent=array_max_concurrent,
     )
 
 
@@ -751,6 +1130,59 @@ def get_job_submission(ctx, id_):
     return api.get_job_submission(id_)
 
 
+@main.command("watch-job-submissions")
+@click.option(
+    "--id",
+    "-i",
+    "ids",
+    multiple=True,
+    help="The id of a job submission to watch. May be repeated. Defaults to all listed job submissions",
+)
+@click.option(
+    "--all",
+    "all_",
+    is_flag=True,
+    help="""
+        Optional parameter that will watch all job submissions.
+        If NOT specified then only the user's job submissions will be watched.
+    """,
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=5,
+    show_default=True,
+    help="Shortest wait between two status queries, in seconds",
+)
+@click.option(
+    "--max-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=60,
+    show_default=True,
+    help="Longest wait between two status queries while no job changes state, in seconds",
+)
+@click.option(
+    "--once",
+    is_flag=True,
+    help="Optional flag to print the current state of each job submission and exit",
+)
+@click.pass_context
+@jobbergate_command_wrapper
+def watch_job_submissions(
+    ctx, ids, all_=False, interval=5, max_interval=60, once=False
+):
+    """
+    WATCH the state of Job Submissions until they finish.
+
+    Each refresh makes a single squeue (and sacct) query for all the watched jobs,
+    and prints only the jobs that changed state.
+    """
+    if max_interval < interval:
+        raise click.UsageError("--max-interval must be at least --interval")
+    api = ctx.obj["api"]
+    return api.watch_job_submissions(ids, all_, interval, max_interval, once)
+
+
 @main.command("update-job-submission")
 @click.option("--id", "-i", "id_", help="The id of job submission to update")
 @click.pass_context
@@ -765,16 +1197,51 @@ def update_job_submission(ctx, id_):
 
 @main.command("delete-job-submission")
 @click.option("--id", "-i", "id_", help="The id of job submission to delete")
+@bulk_delete_options
 @click.pass_context
 @jobbergate_command_wrapper
-def delete_job_submission(ctx, id_):
+def delete_job_submission(ctx, id_, ids, older_than, name_glob, all_, workers, yes):
     """
-    DELETE a Job Submission.
+    DELETE a Job Submission, or many with --ids, --older-than or --name-glob.
     """
     api = ctx.obj["api"]
+    if is_bulk_delete(id_, ids, older_than, name_glob):
+        return api.delete_many(
+            "job-submission", all_, ids, older_than, name_glob, workers, yes
+        )
     return api.delete_job_submission(id_)
 
 
+@main.command("export")
+@click.option(
+    "--output-dir",
+    required=True,
+    type=click.Path(file_okay=False),
+    help="Directory to export to. Exporting to it again only downloads what changed.",
+)
+@click.option(
+    "--all",
+    "all_",
+    is_flag=True,
+    help="Export all applications and job scripts, not only yours",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=JOBBERGATE_EXPORT_MAX_WORKERS,
+    show_default=True,
+    help="Maximum number of objects downloaded at once",
+)
+@click.pass_context
+@jobbergate_command_wrapper
+def export(ctx, output_dir, all_, workers):
+    """
+    EXPORT applications and job scripts, with a manifest of checksums.
+    """
+    api = ctx.obj["api"]
+    return api.export(output_dir, all=all_, max_workers=workers)
+
+
 @main.command("upload-logs")
 @click.pass_context
 @jobbergate_command_wrapper
@@ -0,0 +1,210 @@
+"""
+Writers for the output of the CLI commands.
+
+Every format writes one row at a time to the output stream, so printing a long
+listing never builds the whole text in memory. The rows may be given as a list or
+as any iterable of dicts.
+
+    table  aligned columns for humans
+    raw    pretty-printed JSON
+    jsonl  one JSON object per line
+    csv    comma-separated values, with a header line
+    tsv    tab-separated values, with a header line
+
+Messages for humans, such as progress and notices, go to stderr, so the output of a
+command can be piped to other programs in any of the formats.
+"""
+import csv
+import itertools
+import sys
+import time
+
+from tabulate import tabulate
+
+from jobbergate_cli import json_codec
+
+
+# number of rows the table format looks at to size its columns. Shorter listings are
+# handed to tabulate as a whole.
+TABLE_SAMPLE_SIZE = 1000
+
+
+def _cell(value):
+    """Text of a single value in the table and delimited formats."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json_codec.dumps(value)
+    return str(value)
+
+
+def _columns(rows):
+    """Keys of the rows, in order of first appearance."""
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _justify(cell, width, right):
+    return cell.rjust(width) if right else cell.ljust(width)
+
+
+def write_table(rows, stream, sample_size=TABLE_SAMPLE_SIZE):
+    """
+    Write rows as an aligned table.
+
+    Columns are sized from the first sample_size rows only. Longer values further
+    down are printed in full, pushing the rest of their line to the right, and keys
+    first appearing after the sample are left out.
+    """
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, sample_size + 1))
+    if len(sample) <= sample_size:
+        print(tabulate(sample, headers="keys"), file=stream)
+        return
+
+    columns = _columns(sample)
+    widths = {
+        column: max([len(column)] + [len(_cell(row.get(column))) for row in sample])
+        for column in columns
+    }
+    numeric = {
+        column
+        for column in columns
+        if all(_is_number(row[column]) for row in sample if row.get(column) is not None)
+    }
+
+    def line(cells):
+        return "  ".join(
+            _justify(cell, widths[column], column in numeric)
+            for column, cell in zip(columns, cells)
+        ).rstrip()
+
+    stream.write(line(columns) + "\n")
+    stream.write("  ".join("-" * widths[column] for column in columns) + "\n")
+    for row in itertools.chain(sample, rows):
+        stream.write(line([_cell(row.get(column)) for column in columns]) + "\n")
+
+
+def write_raw(rows, stream, chunk_size=1000):
+    """Write rows as a pretty-printed JSON list, encoding chunk_size rows at a time."""
+    rows = iter(rows)
+    separator = "["
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        # drop the brackets around the encoded chunk, keeping its indented rows
+        stream.write(separator + json_codec.dumps(chunk, indent=2)[1:-2])
+        separator = ","
+    stream.write("[]\n" if separator == "[" else "\n]\n")
+
+
+def write_jsonl(rows, stream):
+    """Write rows as JSON lines."""
+    for row in rows:
+        stream.write(json_codec.dumps(row) + "\n")
+
+
+def write_delimited(rows, stream, delimiter=","):
+    """
+    Write rows as delimiter-separated values with a header line.
+
+    The columns are the keys of the first row. Nested values are written as JSON.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    columns = list(first)
+    writer = csv.writer(stream, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(columns)
+    for row in itertools.chain([first], rows):
+        writer.writerow([_cell(row.get(column)) for column in columns])
+
+
+FORMATS = {
+    "table": write_table,
+    "raw": write_raw,
+    "jsonl": write_jsonl,
+    "csv": write_delimited,
+    "tsv": lambda rows, stream: write_delimited(rows, stream, delimiter="\t"),
+}
+
+
+def write_response(response, output_format="table", stream=None):
+    """
+    Write the response of a command in one of the FORMATS.
+
+    A dict is written as a single row, except in the table format where it is shown
+    as key/value pairs. Anything other than a dict or an iterable of dicts is
+    written as text.
+    """
+    stream = stream or sys.stdout
+    if isinstance(response, dict):
+        if output_format == "table":
+            print(tabulate(response.items()), file=stream)
+        elif output_format == "raw":
+            print(json_codec.dumps(response, indent=2), file=stream)
+        else:
+            FORMATS[output_format]([response], stream)
+    elif isinstance(response, (str, bytes)) or not hasattr(response, "__iter__"):
+        print(str(response), file=stream)
+    else:
+        FORMATS[output_format](response, stream)
+
+
+def notice(message, stream=None):
+    """
+    Write a message for humans to stderr, so stdout only holds the command output.
+    """
+    print(message, file=stream or sys.stderr)
+
+
+class ProgressLine:
+    """
+    Progress of a batch of operations, written to stderr.
+
+    On a terminal a single line is rewritten in place, at most every interval
+    seconds. Otherwise a line is written every tenth of the batch, so logs stay short.
+
+    :param total: Number of operations in the batch
+    :param label: What the operations do, e.g. "Deleted"
+    """
+
+    def __init__(self, total, label, stream=None, interval=0.1):
+        self.total = total
+        self.label = label
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.interactive = self.stream.isatty()
+        self._shown_at = 0.0
+        self._shown_step = 0
+
+    def _text(self, done, failed):
+        text = f"{self.label} {done - failed}/{self.total}"
+        return text + (f", {failed} failed" if failed else "")
+
+    def update(self, done, failed=0):
+        """Show that done operations finished, failed of which did not succeed."""
+        if self.interactive:
+            now = time.monotonic()
+            if now - self._shown_at >= self.interval or done == self.total:
+                self._shown_at = now
+                self.stream.write("\r" + self._text(done, failed))
+                self.stream.flush()
+        else:
+            step = done * 10 // max(self.total, 1)
+            if step > self._shown_step:
+                self._shown_step = step
+                self.stream.write(self._text(done, failed) + "\n")
+
+    def finish(self):
+        """End the progress line."""
+        if self.interactive:
+            self.stream.write("\n")
@@ -0,0 +1,92 @@
+"""
+Timing of the stages of create-job-script, for application authors.
+
+Each stage (downloading the application, parsing its config, importing its module,
+every workflow method, every batch of prompts, rendering, uploading, submitting)
+is timed separately, so slow Python in an application's jobbergate.py stands out
+from the time spent in the API or waiting for answers.
+
+Stages may run concurrently, such as the uploads of a sweep, so the time summed over
+the stages can exceed the wall time of the run. Both are reported, and each stage's
+share is of the wall time.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import time
+
+from jobbergate_cli import json_codec
+
+
+class WorkflowProfiler:
+    """
+    Record the wall-clock time of named stages.
+
+    A disabled profiler records nothing, so stages can be timed unconditionally.
+
+    :param enabled: Whether stages are recorded
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_at = datetime.now()
+        self.stages = []
+        # perf_counter at the start of the first stage and the end of the last one
+        self._span = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the code run in this context as the stage `name`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages.append((name, end - start))
+                if self._span is None:
+                    self._span = (start, end)
+                else:
+                    self._span = (min(self._span[0], start), max(self._span[1], end))
+
+    def stage_seconds(self):
+        """Time summed over the recorded stages, counting overlapping stages twice."""
+        return sum(seconds for _, seconds in self.stages)
+
+    def wall_seconds(self):
+        """Wall time from the start of the first stage to the end of the last one."""
+        if self._span is None:
+            return self.stage_seconds()
+        return self._span[1] - self._span[0]
+
+    def report(self):
+        """Return the recorded stages as a JSON-serializable dict."""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": self.wall_seconds(),
+            "stage_seconds": self.stage_seconds(),
+            "stages": [
+                {"name": name, "seconds": seconds} for name, seconds in self.stages
+            ],
+        }
+
+    def format(self):
+        """Return the recorded stages as a table, in the order they ran."""
+        wall = self.wall_seconds()
+        width = max([len("summed stages")] + [len(name) for name, _ in self.stages])
+        lines = [f"{'stage':<{width}}  {'seconds':>9}  {'share':>6}"]
+        for name, seconds in self.stages:
+            share = seconds / (wall or 1.0)
+            lines.append(f"{name:<{width}}  {seconds:>9.3f}  {share:>6.1%}")
+        lines.append(f"{'summed stages':<{width}}  {self.stage_seconds():>9.3f}")
+        lines.append(f"{'wall':<{width}}  {wall:>9.3f}")
+        return "\n".join(lines)
+
+    def write(self, path):
+        """Write the report to a JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json_codec.dumps(self.report(), indent=2))
@@ -0,0 +1,163 @@
+"""
+Interactive prompts for the questions of application workflows.
+
+This is the only module importing inquirer, and it is only imported when something
+has to be asked.
+
+Each appform question type maps to a function building the matching inquirer
+question. Subclasses of the appform types use the builder of their nearest base
+class.
+"""
+import inquirer
+
+from jobbergate_cli import appform
+
+
+def _choices(question):
+    # inquirer evaluates callable choices with the answers so far, when showing the
+    # question, so choice providers are not evaluated for skipped questions
+    return lambda answers: question.get_choices()
+
+
+def _text(question, ignore):
+    return inquirer.Text(
+        question.variablename,
+        message=question.message,
+        default=question.default,
+        ignore=ignore,
+    )
+
+
+def _integer(question, ignore):
+    return inquirer.Text(
+        question.variablename,
+        message=question.message,
+        default=question.default,
+        validate=question.validate,
+        ignore=ignore,
+    )
+
+
+def _list(question, ignore):
+    return inquirer.List(
+        question.variablename,
+        message=question.message,
+        choices=_choices(question),
+        default=question.default,
+        ignore=ignore,
+    )
+
+
+def _directory(question, ignore):
+    return inquirer.Path(
+        question.variablename,
+        message=question.message,
+        path_type=inquirer.Path.DIRECTORY,
+        default=question.default,
+        exists=question.exists,
+        ignore=ignore,
+    )
+
+
+def _file(question, ignore):
+    return inquirer.Path(
+        question.variablename,
+        message=question.message,
+        path_type=inquirer.Path.FILE,
+        default=question.default,
+        exists=question.exists,
+        ignore=ignore,
+    )
+
+
+def _checkbox(question, ignore):
+    return inquirer.Checkbox(
+        question.variablename,
+        message=question.message,
+        choices=_choices(question),
+        default=question.default,
+        ignore=ignore,
+    )
+
+
+def _confirm(question, ignore):
+    return inquirer.Confirm(
+        question.variablename,
+        message=question.message,
+        default=question.default,
+        ignore=ignore,
+    )
+
+
+def _const(question, ignore):
+    return inquirer.Text(
+        question.variablename,
+        message="",
+        default=question.default,
+        ignore=True,
+    )
+
+
+BUILDERS = {
+    appform.Text: _text,
+    appform.Integer: _integer,
+    appform.List: _list,
+    appform.Directory: _directory,
+    appform.File: _file,
+    appform.Checkbox: _checkbox,
+    appform.Confirm: _confirm,
+    # The branches of a BooleanList are separate entries of the compiled plan
+    appform.BooleanList: _confirm,
+    appform.Const: _const,
+}
+
+
+def builder_for(question_type):
+    """Find the builder of a question type, through its base classes if needed."""
+    try:
+        return BUILDERS[question_type]
+    except KeyError:
+        pass
+    for base in question_type.__mro__[1:]:
+        if base in BUILDERS:
+            BUILDERS[question_type] = BUILDERS[base]
+            return BUILDERS[base]
+    BUILDERS[question_type] = None
+    return None
+
+
+def build_prompts(plan):
+    """
+    Build the inquirer questions of a compiled plan.
+
+    Questions of unknown types are left out.
+
+    :param plan: (question, hidden) pairs, as returned by appform.compile_questions
+    """
+    prompts = []
+    for question, hidden in plan:
+        builder = BUILDERS.get(type(question)) or builder_for(type(question))
+        if builder is not None:
+            prompts.append(builder(question, hidden))
+    return prompts
+
+
+def ask(plan, answers=None):
+    """
+    Prompt for the questions of a compiled plan.
+
+    Returns the given answers updated with the ones of the user.
+
+    :param plan: (question, hidden) pairs, as returned by appform.compile_questions
+    :param answers: Answers known so far, seen by the visibility predicates
+    """
+    return inquirer.prompt(
+        build_prompts(plan), answers=dict(answers or {}), raise_keyboard_interrupt=True
+    )
+
+
+def confirm(message, default=True):
+    """Ask a yes/no question."""
+    return inquirer.prompt(
+        [inquirer.Confirm("confirm", message=message, default=default)]
+    )["confirm"]
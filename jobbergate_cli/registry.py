@@ -0,0 +1,116 @@
+"""
+Registries of the workflows, hooks and choices of jobbergate applications.
+
+The decorators of appform and workflow register into the registry active in the
+current thread. Each imported application module gets a registry of its own, active
+while the module is executed and while its workflow runs, so applications evaluated
+in the same process, one after the other or in different threads, do not see each
+other's registrations.
+
+Registrations made outside of any application go to DEFAULT_REGISTRY.
+"""
+from collections import deque
+from contextlib import contextmanager
+import importlib.util
+import threading
+import types
+
+
+# name of the module attribute holding the registry of an application module
+MODULE_ATTRIBUTE = "__jobbergate_registry__"
+
+
+class ApplicationRegistry:
+    """
+    Registrations of a single application.
+
+    :param name: Name of the application, for messages
+    """
+
+    __slots__ = (
+        "name",
+        "questions",
+        "workflows",
+        "prefuncs",
+        "postfuncs",
+        "provided_choices",
+        "lock",
+    )
+
+    def __init__(self, name=None):
+        self.name = name
+        self.questions = deque()
+        self.workflows = {}
+        self.prefuncs = {}
+        self.postfuncs = {}
+        # choices computed by choice providers, keyed by provider
+        self.provided_choices = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ApplicationRegistry({self.name!r})"
+
+
+DEFAULT_REGISTRY = ApplicationRegistry("default")
+
+_local = threading.local()
+
+
+def active():
+    """Return the registry active in the current thread."""
+    return getattr(_local, "registry", None) or DEFAULT_REGISTRY
+
+
+@contextmanager
+def bound(registry):
+    """
+    Make a registry the active one in the current thread, in this context.
+
+    Contexts may be nested: the previously active registry is restored on exit.
+    """
+    previous = getattr(_local, "registry", None)
+    _local.registry = registry
+    try:
+        yield registry
+    finally:
+        _local.registry = previous
+
+
+def of_module(module):
+    """Return the registry of an application module, or DEFAULT_REGISTRY."""
+    return getattr(module, MODULE_ATTRIBUTE, DEFAULT_REGISTRY)
+
+
+def exec_module(spec, name=None):
+    """
+    Import an application module from its spec, with a registry of its own.
+
+    :param spec: Module spec, as returned by importlib.util.spec_from_file_location
+    :param name: Name of the application, for messages
+    """
+    module = importlib.util.module_from_spec(spec)
+    registry = ApplicationRegistry(name or spec.name)
+    setattr(module, MODULE_ATTRIBUTE, registry)
+    with bound(registry):
+        spec.loader.exec_module(module)
+    return module
+
+
+def exec_source(source, name, filename="<application>"):
+    """
+    Import an application module from its source text, with a registry of its own.
+
+    Unlike exec_module, nothing is read from disk, so threads importing different
+    applications do not race on a shared file.
+
+    :param source: Python source of the module
+    :param name: Name of the module
+    :param filename: File name shown in tracebacks
+    """
+    module = types.ModuleType(name)
+    module.__file__ = filename
+    registry = ApplicationRegistry(name)
+    setattr(module, MODULE_ATTRIBUTE, registry)
+    with bound(registry):
+        exec(compile(source, filename, "exec"), module.__dict__)
+    return module
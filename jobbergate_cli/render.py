@@ -0,0 +1,210 @@
+"""
+Local rendering of job scripts from the templates of an application directory.
+
+Mirrors what the API does when a job script is created: the main template named by
+``default_template`` becomes ``application.sh`` and each of the ``supporting_files`` is
+rendered to the name given in ``supporting_files_output_name``. Templates receive the
+flattened param_dict as ``data``.
+
+Rendered job scripts are cached by (application version, parameter hash), so
+rendering the same answers again does not touch the templates.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from jobbergate_cli import json_codec
+from jobbergate_cli.jobbergate_common import (
+    JOBBERGATE_APPLICATION_CONFIG_FILE_NAME,
+    JOBBERGATE_APPLICATION_MODULE_FILE_NAME,
+    JOBBERGATE_RENDER_CACHE_DIR,
+)
+
+
+try:
+    import jinja2
+except ImportError:  # pragma: no cover
+    jinja2 = None
+
+
+class RenderError(Exception):
+    """Raised when a job script can not be rendered locally."""
+
+
+def flatten_param_dict(param_dict):
+    """Merge the nested sections of param_dict into a single level, as the API does."""
+    flat = {}
+    for key, value in param_dict.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[key] = value
+    return flat
+
+
+def inject_sbatch_params(job_script, sbatch_params):
+    """Insert raw sbatch parameters as #SBATCH lines right after the shebang."""
+    if not sbatch_params:
+        return job_script
+    first_line, _, rest = job_script.partition("\n")
+    sbatch_lines = "".join(f"#SBATCH {param}\n" for param in sbatch_params)
+    return f"{first_line}\n{sbatch_lines}{rest}"
+
+
+def application_version(application_path):
+    """Hash the module, config and templates of an application directory."""
+    application_path = Path(application_path)
+    digest = hashlib.sha256()
+    paths = [
+        application_path / JOBBERGATE_APPLICATION_MODULE_FILE_NAME,
+        application_path / JOBBERGATE_APPLICATION_CONFIG_FILE_NAME,
+    ]
+    templates_dir = application_path / "templates"
+    if templates_dir.is_dir():
+        paths.extend(sorted(p for p in templates_dir.iterdir() if p.is_file()))
+    for path in paths:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def application_content_hash(application_data):
+    """Hash the module and config of an application, as stored by the API."""
+    digest = hashlib.sha256()
+    for key in ("application_file", "application_config"):
+        digest.update(key.encode())
+        digest.update((application_data.get(key) or "").encode())
+    return digest.hexdigest()
+
+
+def params_hash(param_dict, sbatch_params=()):
+    """Hash the answers and sbatch parameters a job script is rendered with."""
+    payload = json.dumps([param_dict, list(sbatch_params or [])], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _template_name(name):
+    return name.replace("templates/", "", 1) if name.startswith("templates/") else name
+
+
+def render_job_script(templates_dir, param_dict, sbatch_params=()):
+    """
+    Render the job script files of an application.
+
+    Returns a dict mapping file names to rendered content, with the main job script
+    under "application.sh".
+    """
+    if jinja2 is None:
+        raise RenderError(
+            "Local rendering requires jinja2, "
+            "please install it with: pip install 'jobbergate-cli[render]'"
+        )
+
+    config = param_dict.get("jobbergate_config", {})
+    default_template = config.get("default_template")
+    if not default_template:
+        raise RenderError("No default_template found in jobbergate_config")
+
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(str(templates_dir)))
+    data = flatten_param_dict(param_dict)
+    try:
+        rendered = {
+            "application.sh": env.get_template(_template_name(default_template)).render(
+                data=data
+            )
+        }
+        output_names = config.get("supporting_files_output_name") or {}
+        for supporting_file in config.get("supporting_files") or []:
+            output_name = output_names.get(supporting_file, [supporting_file])
+            if isinstance(output_name, list):
+                output_name = output_name[0]
+            rendered[output_name] = env.get_template(
+                _template_name(supporting_file)
+            ).render(data=data)
+    except jinja2.TemplateError as err:
+        raise RenderError(f"Failed to render templates: {err}")
+
+    rendered["application.sh"] = inject_sbatch_params(
+        rendered["application.sh"], sbatch_params
+    )
+    return rendered
+
+
+def render_cached(application_path, param_dict, sbatch_params=(), cache_dir=None):
+    """
+    Render the job script files of a local application, reusing a cached rendering.
+
+    The cache lives under JOBBERGATE_RENDER_CACHE_DIR, in one directory per
+    application version with one JSON file per parameter hash.
+    """
+    cache_dir = Path(cache_dir or JOBBERGATE_RENDER_CACHE_DIR)
+    cache_path = (
+        cache_dir
+        / application_version(application_path)
+        / f"{params_hash(param_dict, sbatch_params)}.json"
+    )
+    if cache_path.exists():
+        return json.loads(cache_path.read_text())
+
+    rendered = render_job_script(
+        Path(application_path) / "templates", param_dict, sbatch_params
+    )
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}")
+    temp_path.write_text(json.dumps(rendered))
+    os.replace(str(temp_path), str(cache_path))
+    return rendered
+
+
+def rendered_files(job_script_data_as_string):
+    """
+    Iterate over the (name, content) files of a job script, as stored by the API.
+
+    Raises ValueError when the job script data is not a JSON object.
+    """
+    rendered = json_codec.loads(job_script_data_as_string)
+    if not isinstance(rendered, dict):
+        raise ValueError("job_script_data_as_string is not a JSON object")
+    return iter(rendered.items())
+
+
+def join_rendered_files(files, separator):
+    """Join the contents of (name, content) files, each preceded by separator."""
+    return "".join(separator + content for _, content in files)
+
+
+def print_rendered_files(files, stream, separator):
+    """
+    Write the contents of (name, content) files to a stream, one at a time.
+
+    Writes what join_rendered_files would return, followed by a newline, without
+    building the joined text.
+    """
+    for _, content in files:
+        stream.write(separator)
+        stream.write(content)
+    stream.write("\n")
+
+
+def write_rendered_files(files, output_dir, rename=None):
+    """
+    Write (name, content) files to a directory, one at a time.
+
+    Returns the paths written. Raises RenderError for names leading out of
+    output_dir.
+
+    :param rename: Optional mapping of file names to the names to write them as
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    root = output_dir.resolve()
+    paths = []
+    for name, content in files:
+        path = output_dir / (rename or {}).get(name, name)
+        if root not in path.resolve().parents:
+            raise RenderError(f"Refusing to write {name} outside of {output_dir}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        paths.append(path)
+    return paths
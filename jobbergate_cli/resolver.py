@@ -0,0 +1,103 @@
+"""
+Non-interactive resolution of the answers to workflow questions.
+
+Answers come from the supplied parameters first, then from the question defaults,
+and Const questions always take their value. Supplied and default answers are
+checked the way the interactive prompts would check them, and BooleanList branches
+are followed from the answers resolved so far. Questions left without an answer are
+returned, in asking order, for the caller to prompt or report.
+
+Nothing here imports the interactive prompt library.
+"""
+from collections import namedtuple
+import os
+
+from jobbergate_cli import appform
+
+
+Resolution = namedtuple(
+    "Resolution", ["answers", "defaulted", "deferred", "missing", "invalid"]
+)
+Resolution.__doc__ = """Outcome of resolve.
+
+:param answers: Answers resolved without asking, by variable name
+:param defaulted: Names of the answers taken from question defaults
+:param deferred: (question, hidden) pairs that still need to be asked, in order
+:param missing: Names of the questions without answer, when not interactive
+:param invalid: Messages about supplied or default answers that were rejected
+"""
+
+
+def check_answer(question, value):
+    """Return why an answer is rejected by its question, or None if it is valid."""
+    if isinstance(question, appform.Integer):
+        try:
+            valid = question.validate(None, int(value))
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            return f"{question.variablename}={value!r} is not an accepted integer"
+
+    elif isinstance(question, (appform.File, appform.Directory)):
+        if question.exists is not None:
+            path = os.path.expanduser(str(value))
+            if isinstance(question, appform.File):
+                found, kind = os.path.isfile(path), "file"
+            else:
+                found, kind = os.path.isdir(path), "directory"
+            if found != bool(question.exists):
+                state = "does not exist" if question.exists else "already exists"
+                return f"{question.variablename}: {kind} {value} {state}"
+
+    return None
+
+
+def resolve(plan, supplied, use_defaults, interactive=True):
+    """
+    Resolve the answers of a compiled plan of questions without prompting.
+
+    :param plan: (question, hidden) pairs, as returned by appform.compile_questions
+    :param supplied: Answers supplied up front, by variable name
+    :param use_defaults: Take the defaults of questions without a supplied answer
+    :param interactive: Whether questions without answer may still be asked. When
+                        False they are reported as missing.
+    """
+    answers = {}
+    defaulted = []
+    deferred = []
+    missing = []
+    invalid = []
+    # BooleanLists waiting for the user, whose branches can only be decided then
+    pending = set()
+
+    for question, hidden in plan:
+        name = question.variablename
+        undecided = hidden is not None and bool(
+            pending & getattr(hidden, "depends", pending)
+        )
+        skipped = hidden is not None and not undecided and hidden(answers)
+
+        if name in supplied:
+            answers[name] = supplied[name]
+            # answers to questions that may not be asked are not checked
+            if not (skipped or undecided):
+                invalid.extend(filter(None, [check_answer(question, answers[name])]))
+            continue
+
+        if skipped or isinstance(question, appform.Const):
+            # as the prompts do, skipped questions take their default
+            answers[name] = question.default
+        elif undecided:
+            deferred.append((question, hidden))
+            pending.add(name)
+        elif use_defaults and question.default is not None:
+            answers[name] = question.default
+            defaulted.append(name)
+            invalid.extend(filter(None, [check_answer(question, question.default)]))
+        elif interactive:
+            deferred.append((question, hidden))
+            pending.add(name)
+        else:
+            missing.append(name)
+
+    return Resolution(answers, defaulted, deferred, missing, invalid)
@@ -0,0 +1,279 @@
+"""
+Execution of Slurm commands on the submit host
+"""
+import re
+import subprocess
+import time
+
+from jobbergate_cli.jobbergate_common import (
+    SACCT_PATH,
+    SBATCH_PATH,
+    SBATCH_TIMEOUT,
+    SQUEUE_PATH,
+)
+
+
+# sbatch --parsable prints "<job id>" or "<job id>;<cluster name>"
+PARSABLE_JOB_ID = re.compile(r"^(\d+)(?:;\S+)?$")
+# sbatch without --parsable prints "Submitted batch job <job id>"
+SUBMITTED_JOB_ID = re.compile(r"Submitted batch job (\d+)")
+
+# states after which a job does not change anymore
+TERMINAL_STATES = {
+    "BOOT_FAIL",
+    "CANCELLED",
+    "COMPLETED",
+    "DEADLINE",
+    "FAILED",
+    "NODE_FAIL",
+    "OUT_OF_MEMORY",
+    "PREEMPTED",
+    "TIMEOUT",
+}
+
+# reported for jobs neither squeue nor sacct know about
+UNKNOWN_STATE = "UNKNOWN"
+
+# when the tasks of a job array are in different states, the job array is reported
+# in the first of these states held by any of its tasks
+ARRAY_STATE_PRIORITY = ["RUNNING", "COMPLETING", "PENDING", "SUSPENDED"]
+
+
+class SbatchError(Exception):
+    """Raised when sbatch fails, times out, or its output has no job id."""
+
+
+def parse_job_id(output):
+    """Find the Slurm job id in the output of sbatch."""
+    for line in output.splitlines():
+        match = PARSABLE_JOB_ID.match(line.strip())
+        if match:
+            return match.group(1)
+
+    match = SUBMITTED_JOB_ID.search(output)
+    if match:
+        return match.group(1)
+
+    raise SbatchError(f"Could not find a job id in sbatch output: {output!r}")
+
+
+class SbatchExecutor:
+    """
+    Submit job scripts with sbatch.
+
+    Job ids are read from the machine-readable ``--parsable`` output, and every call
+    is bounded by a timeout.
+
+    :param sbatch_path: Path to the sbatch executable
+    :param timeout: Seconds to wait for each sbatch call
+    """
+
+    def __init__(self, sbatch_path=SBATCH_PATH, timeout=SBATCH_TIMEOUT):
+        self.sbatch_path = sbatch_path
+        self.timeout = timeout
+
+    def submit(self, filename, *script_args, sbatch_args=(), cwd=None):
+        """
+        Submit a job script and return its Slurm job id.
+
+        Raises FileNotFoundError if sbatch is not available and SbatchError if the
+        submission fails.
+
+        :param filename: Job script to submit
+        :param script_args: Arguments passed along to the job script
+        :param sbatch_args: Options for sbatch itself, placed before the job script
+        :param cwd: Directory to submit from, defaults to the current one
+        """
+        cmd = [self.sbatch_path, "--parsable", *sbatch_args, filename, *script_args]
+        try:
+            process = subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                timeout=self.timeout,
+                cwd=cwd,
+            )
+        except subprocess.TimeoutExpired:
+            raise SbatchError(f"sbatch did not finish within {self.timeout} seconds")
+
+        if process.returncode != 0:
+            raise SbatchError(
+                process.stderr.strip() or f"sbatch exited with {process.returncode}"
+            )
+
+        return parse_job_id(process.stdout)
+
+
+def _run_query(cmd, timeout, expected_errors=()):
+    """
+    Run a Slurm query command and return its stdout, or None if it fails.
+
+    :param expected_errors: Messages on stderr that do not make a non-zero exit a
+                            failure, such as squeue's for jobs that left the queue
+    """
+    try:
+        process = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if process.returncode != 0 and not any(
+        error in process.stderr for error in expected_errors
+    ):
+        return None
+    return process.stdout
+
+
+def _merge_state(states, job_id, state):
+    """Record the state of a job, summarizing the tasks of job arrays."""
+    job_id = job_id.split("_")[0].split(".")[0]
+    state = state.split()[0] if state.strip() else UNKNOWN_STATE
+    current = states.get(job_id)
+    if current is None:
+        states[job_id] = state
+        return
+    for active_state in ARRAY_STATE_PRIORITY:
+        if active_state in (current, state):
+            states[job_id] = active_state
+            return
+
+
+def query_job_states(
+    job_ids, squeue_path=SQUEUE_PATH, sacct_path=SACCT_PATH, timeout=SBATCH_TIMEOUT
+):
+    """
+    Get the state of many Slurm jobs at once.
+
+    Makes a single squeue call for all the jobs, then a single sacct call for the
+    jobs that already left the queue. Jobs found by neither are reported as UNKNOWN.
+    When a call fails or times out, the jobs it would have found are left out of the
+    result, as they were not observed.
+
+    :param job_ids: Slurm job ids to look up
+    """
+    job_ids = sorted({str(job_id) for job_id in job_ids})
+    states = {}
+    if not job_ids:
+        return states
+
+    output = _run_query(
+        [
+            squeue_path,
+            "--noheader",
+            "--states=all",
+            "--format=%i|%T",
+            f"--jobs={','.join(job_ids)}",
+        ],
+        timeout,
+        expected_errors=("Invalid job id",),
+    )
+    observed = output is not None
+    for line in (output or "").splitlines():
+        job_id, _, state = line.strip().partition("|")
+        _merge_state(states, job_id, state)
+
+    missing = [job_id for job_id in job_ids if job_id not in states]
+    if missing:
+        output = _run_query(
+            [
+                sacct_path,
+                "--noheader",
+                "--parsable2",
+                "--allocations",
+                "--format=JobID,State",
+                f"--jobs={','.join(missing)}",
+            ],
+            timeout,
+        )
+        observed = observed and output is not None
+        for line in (output or "").splitlines():
+            job_id, _, state = line.strip().partition("|")
+            _merge_state(states, job_id, state)
+
+    if not observed:
+        return {job_id: states[job_id] for job_id in job_ids if job_id in states}
+    return {job_id: states.get(job_id, UNKNOWN_STATE) for job_id in job_ids}
+
+
+class JobStateWatcher:
+    """
+    Track the state of many Slurm jobs with one batched query per tick.
+
+    Each call to poll queries the jobs that are not finished yet and returns the
+    state transitions since the previous snapshot. The wait before the next tick
+    grows while nothing changes, up to max_interval, and drops back to
+    min_interval as soon as a job changes state.
+
+    :param job_ids: Slurm job ids to track
+    :param min_interval: Shortest wait between two ticks, in seconds
+    :param max_interval: Longest wait between two ticks, in seconds
+    :param backoff: Factor applied to the wait after a tick without transitions
+    :param query: Function returning the states of a list of job ids
+    """
+
+    def __init__(
+        self,
+        job_ids,
+        min_interval=5,
+        max_interval=60,
+        backoff=1.5,
+        query=query_job_states,
+    ):
+        self.snapshot = {str(job_id): None for job_id in job_ids}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.query = query
+
+    @property
+    def done(self):
+        """Whether every tracked job reached a terminal state."""
+        return all(state in TERMINAL_STATES for state in self.snapshot.values())
+
+    def poll(self):
+        """
+        Query the unfinished jobs and return their transitions.
+
+        Returns a list of (job_id, old_state, new_state). The first poll reports
+        every job with None as its old state. Jobs the query did not observe, for
+        instance because squeue failed, keep their state.
+        """
+        pending = [
+            job_id
+            for job_id, state in self.snapshot.items()
+            if state not in TERMINAL_STATES
+        ]
+        transitions = []
+        for job_id, state in self.query(pending).items():
+            old_state = self.snapshot.get(job_id)
+            if state != old_state:
+                transitions.append((job_id, old_state, state))
+                self.snapshot[job_id] = state
+
+        if transitions:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return transitions
+
+    def watch(self, max_ticks=None, sleep=time.sleep):
+        """
+        Poll until every job is finished, yielding the transitions of each tick.
+
+        :param max_ticks: Optional maximum number of polls
+        """
+        ticks = 0
+        while True:
+            yield self.poll()
+            ticks += 1
+            if self.done or (max_ticks is not None and ticks >= max_ticks):
+                return
+            sleep(self.interval)
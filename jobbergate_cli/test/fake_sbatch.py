@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Stand-in for sbatch, for tests and benchmarks of job submission without Slurm.
+
+Hands out increasing job ids, printed the way sbatch does with and without
+--parsable. Its behavior is driven by environment variables:
+
+    FAKE_SBATCH_STATE  file holding the last job id given out (default: ./.fake_sbatch)
+    FAKE_SBATCH_LOG    optional file where each call's arguments are appended as a line
+    FAKE_SBATCH_SLEEP  optional seconds to wait before answering
+    FAKE_SBATCH_FAIL   optional error message; when set, sbatch fails with it
+
+Point the CLI at it with SBATCH_PATH, through a small wrapper if needed:
+
+    printf '#!/bin/sh\\nexec python3 %s "$@"\\n' fake_sbatch.py > sbatch && chmod +x sbatch
+"""
+import fcntl
+import os
+import sys
+import time
+
+
+def main(argv):
+    if os.environ.get("FAKE_SBATCH_SLEEP"):
+        time.sleep(float(os.environ["FAKE_SBATCH_SLEEP"]))
+
+    if os.environ.get("FAKE_SBATCH_LOG"):
+        with open(os.environ["FAKE_SBATCH_LOG"], "a") as log:
+            log.write(" ".join(argv) + "\n")
+
+    if os.environ.get("FAKE_SBATCH_FAIL"):
+        print(f"sbatch: error: {os.environ['FAKE_SBATCH_FAIL']}", file=sys.stderr)
+        return 1
+
+    with open(os.environ.get("FAKE_SBATCH_STATE", ".fake_sbatch"), "a+") as state:
+        fcntl.flock(state, fcntl.LOCK_EX)
+        state.seek(0)
+        job_id = int(state.read() or 0) + 1
+        state.seek(0)
+        state.truncate()
+        state.write(str(job_id))
+
+    if "--parsable" in argv:
+        print(job_id)
+    else:
+        print(f"Submitted batch job {job_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,125 @@
+"""
+Tests of the appform questions and of their prompts
+"""
+from jobbergate_cli import appform
+from jobbergate_cli.prompts import build_prompts, builder_for
+
+
+def nested_questions():
+    return [
+        appform.Text("name", "Name?"),
+        appform.BooleanList(
+            "advanced",
+            "Advanced?",
+            whentrue=[
+                appform.BooleanList(
+                    "gpu",
+                    "GPU?",
+                    whentrue=[appform.Integer("gpus", "How many?", minval=1)],
+                    whenfalse=[appform.Text("cpus", "Which CPUs?")],
+                )
+            ],
+            whenfalse=[appform.Const("preset", default="small")],
+        ),
+    ]
+
+
+def test_compile_questions__flattens_branches():
+    """
+    Are branch questions placed after their BooleanList, with composed predicates?
+    """
+    plan = appform.compile_questions(nested_questions())
+    assert [question.variablename for question, _ in plan] == [
+        "name",
+        "advanced",
+        "preset",
+        "gpu",
+        "cpus",
+        "gpus",
+    ]
+
+    hidden = {question.variablename: h for question, h in plan}
+    assert hidden["name"] is None
+    assert hidden["preset"](dict(advanced=True))
+    assert not hidden["preset"](dict(advanced=False))
+    assert not hidden["gpus"](dict(advanced=True, gpu=True))
+    assert hidden["cpus"](dict(advanced=True, gpu=True))
+    # A hidden branch hides its nested branches, whatever their own answer
+    assert hidden["gpus"](dict(advanced=False, gpu=True))
+    assert hidden["cpus"](dict(advanced=False, gpu=None))
+
+
+def test_questions_have_slots():
+    """
+    Are the declared attributes of questions slots, and may applications still set
+    attributes of their own?
+    """
+    question = appform.Integer("n", "N?", minval=1)
+    assert question.__dict__ == {}
+    question.help = "How many"
+    assert question.__dict__ == {"help": "How many"}
+
+
+def test_build_prompts__dispatches_through_base_classes():
+    """
+    Do subclasses of appform questions get the prompt of their base class?
+    """
+
+    class Email(appform.Text):
+        pass
+
+    class Unknown:
+        variablename = "unknown"
+
+    assert builder_for(Email) is builder_for(appform.Text)
+    prompts = build_prompts(
+        [(Email("email", "Email?"), None), (Unknown(), None)]
+        + appform.compile_questions(nested_questions()[1:])
+    )
+    assert [prompt.name for prompt in prompts] == [
+        "email",
+        "advanced",
+        "preset",
+        "gpu",
+        "cpus",
+        "gpus",
+    ]
+    assert prompts[2].ignore is True
+
+
+def test_choice_providers__evaluated_once_on_demand():
+    """
+    Are choice providers only evaluated when shown, once per run?
+    """
+    calls = []
+
+    def running_jobs():
+        calls.append(1)
+        return ["1 first", "2 second"]
+
+    first = appform.List("job", "Which job?", choices=running_jobs)
+    second = appform.Checkbox("jobs", "Which jobs?", choices=running_jobs)
+    generated = appform.List("size", "Size?", choices=(n for n in [1, 2]))
+    assert calls == []
+
+    assert first.get_choices() == second.get_choices() == ["1 first", "2 second"]
+    assert calls == [1]
+    assert generated.get_choices() == generated.get_choices() == [1, 2]
+    assert appform.List("x", "X?", choices=["a"]).get_choices() == ["a"]
+
+
+def test_build_prompts__defers_choices():
+    """
+    Do prompts evaluate choice providers only when their question is rendered?
+    """
+    calls = []
+
+    def modules():
+        calls.append(1)
+        return ["gcc", "intel"]
+
+    (prompt,) = build_prompts([(appform.List("module", "Module?", modules), None)])
+    assert calls == []
+    prompt.answers = {}
+    assert prompt.choices == ["gcc", "intel"]
+    assert calls == [1]
@@ -0,0 +1,164 @@
+"""
+Tests of the export of applications and job scripts
+"""
+import hashlib
+import json
+from unittest.mock import patch
+
+from pytest import fixture, raises
+
+from jobbergate_cli import export, jobbergate_api_wrapper
+
+
+APPLICATIONS = {
+    1: dict(
+        id=1,
+        application_name="app",
+        updated_at="2021-12-01T00:00:00",
+        application_file="print('hi')",
+        application_config="jobbergate_config: {}",
+    ),
+}
+
+JOB_SCRIPTS = {
+    10: dict(
+        id=10,
+        job_script_name="first",
+        updated_at="2021-12-01T00:00:00",
+        job_script_data_as_string=json.dumps({"application.sh": "#!/bin/bash"}),
+    ),
+    11: dict(
+        id=11,
+        job_script_name="second",
+        updated_at="2021-12-02T00:00:00",
+        job_script_data_as_string=json.dumps({"application.sh": "x", "in/deck": "y"}),
+    ),
+}
+
+
+@fixture
+def api():
+    return jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token",
+        api_endpoint="https://jobbergate-api-staging.omnivector.solutions",
+        user_id=1,
+    )
+
+
+def run_export(api, output_dir, objects):
+    """Export with the API answering from objects, returning the summary and GETs."""
+    fetched = []
+
+    def list_request(kind, params=None):
+        return [
+            dict(id=entity["id"], updated_at=entity["updated_at"])
+            for entity in objects[kind].values()
+        ]
+
+    def jobbergate_request(method, endpoint):
+        kind, entity_id = endpoint.rstrip("/").split("/")[-2:]
+        fetched.append(f"{kind}/{entity_id}")
+        entity = objects[kind].get(int(entity_id))
+        if entity is None:
+            return api.error_handle(error="not found", solution="")
+        return dict(entity)
+
+    with patch.object(api, "list_request", side_effect=list_request), patch.object(
+        api, "jobbergate_request", side_effect=jobbergate_request
+    ), patch.object(jobbergate_api_wrapper.client, "use_pooled_session"):
+        summary = api.export(str(output_dir), max_workers=2)
+    return summary, sorted(fetched)
+
+
+def test_export__writes_tree_and_manifest(api, tmp_path):
+    """
+    Are the files of every object written, with their checksums in the manifest?
+    """
+    objects = {"application": APPLICATIONS, "job-script": JOB_SCRIPTS}
+    summary, fetched = run_export(api, tmp_path, objects)
+
+    assert summary["listed"] == 3 and summary["exported"] == 3
+    assert fetched == ["application/1", "job-script/10", "job-script/11"]
+    assert (tmp_path / "application/1/jobbergate.py").read_text() == "print('hi')"
+    assert (tmp_path / "job-script/11/files/in/deck").read_text() == "y"
+    metadata = json.loads((tmp_path / "job-script/11/metadata.json").read_text())
+    assert metadata == dict(
+        id=11, job_script_name="second", updated_at="2021-12-02T00:00:00"
+    )
+
+    manifest = json.loads((tmp_path / export.MANIFEST_NAME).read_text())
+    deck = manifest["objects"]["job-script/11"]["files"]["job-script/11/files/in/deck"]
+    assert deck == dict(size=1, sha256=hashlib.sha256(b"y").hexdigest())
+
+
+def test_export__resumes_and_repeats_incrementally(api, tmp_path):
+    """
+    Are unchanged objects skipped, and changed or missing ones downloaded again?
+    """
+    objects = {"application": APPLICATIONS, "job-script": dict(JOB_SCRIPTS)}
+    run_export(api, tmp_path, objects)
+
+    summary, fetched = run_export(api, tmp_path, objects)
+    assert fetched == []
+    assert summary["unchanged"] == 3
+
+    # an interrupted download, and an update on the server
+    (tmp_path / "job-script/10/files/application.sh").unlink()
+    objects["job-script"][11] = dict(
+        JOB_SCRIPTS[11],
+        updated_at="2021-12-03T00:00:00",
+        job_script_data_as_string=json.dumps({"application.sh": "x"}),
+    )
+    summary, fetched = run_export(api, tmp_path, objects)
+    assert fetched == ["job-script/10", "job-script/11"]
+    assert summary["unchanged"] == 1 and summary["exported"] == 2
+    # the file dropped from the job script is not left behind
+    assert not (tmp_path / "job-script/11/files/in").exists()
+
+
+def test_export__rebuilds_corrupt_manifest(api, tmp_path):
+    """
+    Is a manifest truncated by an interrupted export treated as empty and rebuilt?
+    """
+    objects = {"application": APPLICATIONS, "job-script": JOB_SCRIPTS}
+    run_export(api, tmp_path, objects)
+    manifest_path = tmp_path / export.MANIFEST_NAME
+    manifest_path.write_text(manifest_path.read_text()[:40])
+
+    summary, fetched = run_export(api, tmp_path, objects)
+    assert fetched == ["application/1", "job-script/10", "job-script/11"]
+    assert summary["exported"] == 3
+    assert sorted(json.loads(manifest_path.read_text())["objects"]) == [
+        "application/1",
+        "job-script/10",
+        "job-script/11",
+    ]
+    assert [path.name for path in tmp_path.glob("*.tmp")] == []
+
+
+def test_export__reports_failures(api, tmp_path):
+    """
+    Is an object that can not be exported reported, without stopping the others?
+    """
+    bad = dict(
+        id=12,
+        updated_at="2021-12-01T00:00:00",
+        job_script_data_as_string=json.dumps({"../escape": "x"}),
+    )
+    objects = {"application": {}, "job-script": dict(JOB_SCRIPTS)}
+    objects["job-script"][12] = bad
+    summary, _ = run_export(api, tmp_path, objects)
+
+    assert summary["exported"] == 2
+    assert summary["failed_objects"] == "job-script/12"
+    assert not (tmp_path / "job-script/escape").exists()
+    manifest = export.Manifest(tmp_path)
+    assert sorted(manifest.objects) == ["job-script/10", "job-script/11"]
+
+
+def test_object_files__invalid_name():
+    with raises(ValueError):
+        export.object_files(
+            "job-script",
+            dict(id=1, job_script_data_as_string=json.dumps({"/etc/passwd": ""})),
+        )
@@ -0,0 +1,209 @@
+"""
+Tests of the helper library for jobbergate applications
+"""
+import asyncio
+import json
+import os
+import threading
+from unittest.mock import patch
+
+from pytest import fixture, raises
+
+from jobbergate_cli import jobberappslib
+
+
+@fixture
+def fake_squeue(tmp_path, monkeypatch):
+    """
+    A squeue without --json support that logs its calls
+    """
+    squeue = tmp_path / "squeue"
+    squeue.write_text(
+        f"""#!/bin/sh
+echo "$@" >> {tmp_path}/squeue.log
+case "$*" in *--json*) echo "squeue: unrecognized option '--json'" >&2; exit 1;; esac
+printf '101|RUNNING|alice|first job\\n102|PENDING|alice|with|pipe\\n'
+"""
+    )
+    squeue.chmod(0o755)
+    monkeypatch.setattr(jobberappslib.getpass, "getuser", lambda: "alice")
+    monkeypatch.setattr(jobberappslib, "SQUEUE_PATH", str(squeue))
+    monkeypatch.setattr(jobberappslib, "JOBBERGATE_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(jobberappslib, "_snapshots", {})
+    monkeypatch.setattr(jobberappslib, "_squeue_json", None)
+    return tmp_path / "squeue.log"
+
+
+def test_get_running_jobs(fake_squeue):
+    assert jobberappslib.get_running_jobs() == [
+        "     101 first job",
+        "     102 with|pipe",
+    ]
+
+
+def test_get_running_jobs__no_squeue(fake_squeue, monkeypatch, capsys):
+    monkeypatch.setattr(jobberappslib, "SQUEUE_PATH", "/does/not/exist")
+    assert jobberappslib.get_running_jobs() == []
+    assert "Could not retrieve queue information" in capsys.readouterr().out
+
+
+def test_get_queue_snapshot__indexes(fake_squeue):
+    snapshot = jobberappslib.get_queue_snapshot()
+    assert snapshot.by_id["102"] == jobberappslib.QueueRow(
+        "102", "with|pipe", "PENDING", "alice"
+    )
+    assert [row.job_id for row in snapshot.by_name["first job"]] == ["101"]
+
+
+def test_get_queue_snapshot__shared_until_stale(fake_squeue):
+    """
+    Is squeue called once per TTL, with --json only tried the first time?
+    """
+    first = jobberappslib.get_queue_snapshot(ttl=60)
+    assert jobberappslib.get_queue_snapshot(ttl=60) is first
+    assert jobberappslib.get_queue_snapshot(ttl=0) is not first
+    assert fake_squeue.read_text().splitlines() == [
+        "--json --user=alice",
+        "--noheader --format=%A|%T|%u|%j --user=alice",
+        "--noheader --format=%A|%T|%u|%j --user=alice",
+    ]
+
+
+def test_get_queue_snapshot__disk_cache(fake_squeue, monkeypatch):
+    first = jobberappslib.get_queue_snapshot(ttl=60, disk_cache=True)
+    monkeypatch.setattr(jobberappslib, "_snapshots", {})
+    with patch.object(jobberappslib, "_squeue_rows") as mock_rows:
+        second = jobberappslib.get_queue_snapshot(ttl=60, disk_cache=True)
+        mock_rows.assert_not_called()
+    assert second.rows == first.rows
+    cached = json.loads(
+        (fake_squeue.parent / "cache" / "squeue-alice.json").read_text()
+    )
+    assert cached["rows"][0] == ["101", "first job", "RUNNING", "alice"]
+
+
+def test_get_queue_snapshot__json(fake_squeue, monkeypatch):
+    def run(cmd_args, **kwargs):
+        stdout = json.dumps(
+            {
+                "jobs": [
+                    {
+                        "job_id": 7,
+                        "name": "x",
+                        "job_state": ["RUNNING"],
+                        "user_name": "alice",
+                    }
+                ]
+            }
+        )
+        return jobberappslib.subprocess.CompletedProcess(cmd_args, 0, stdout.encode())
+
+    with patch.object(jobberappslib.subprocess, "run", side_effect=run):
+        snapshot = jobberappslib.get_queue_snapshot()
+    assert snapshot.rows == [jobberappslib.QueueRow("7", "x", "RUNNING", "alice")]
+
+
+def test_get_queue_snapshot__single_flight(fake_squeue):
+    """
+    Do concurrent callers share one squeue run, without the lock held while it runs?
+    """
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def squeue_rows(user):
+        calls.append(user)
+        started.set()
+        release.wait(5)
+        return [jobberappslib.QueueRow("7", "x", "RUNNING", user)]
+
+    results = []
+
+    def take():
+        results.append(jobberappslib.get_queue_snapshot())
+
+    with patch.object(jobberappslib, "_squeue_rows", side_effect=squeue_rows):
+        threads = [threading.Thread(target=take) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        assert started.wait(5)
+        assert jobberappslib._snapshots_lock.acquire(timeout=5)
+        jobberappslib._snapshots_lock.release()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+    assert calls == ["alice"]
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert jobberappslib._snapshots_pending == {}
+
+
+def test_get_queue_snapshot__failure_clears_pending(fake_squeue, monkeypatch):
+    monkeypatch.setattr(jobberappslib, "SQUEUE_PATH", "/does/not/exist")
+    with raises(OSError):
+        jobberappslib.get_queue_snapshot()
+    assert jobberappslib._snapshots_pending == {}
+
+
+def test_get_queue_snapshot_async(fake_squeue):
+    loop = asyncio.new_event_loop()
+    try:
+        snapshot = loop.run_until_complete(jobberappslib.get_queue_snapshot_async())
+    finally:
+        loop.close()
+    assert sorted(snapshot.by_id) == ["101", "102"]
+
+
+@fixture
+def input_dir(tmp_path):
+    """
+    A directory with input files of increasing modification times
+    """
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    for i, name in enumerate(["a.inp", "b.dat", "c.inp", "noext", ".hidden.inp"]):
+        file_path = directory / name
+        file_path.write_text(name)
+        os.utime(str(file_path), (1000 + i, 1000 + i))
+    (directory / "sub.inp").mkdir()
+    (directory / "broken.inp").symlink_to(directory / "missing")
+    return directory
+
+
+def test_get_file_list(input_dir):
+    assert jobberappslib.get_file_list(input_dir) == [
+        ".hidden.inp",
+        "c.inp",
+        "b.dat",
+        "a.inp",
+    ]
+    assert jobberappslib.get_file_list(input_dir, "*.inp") == [
+        ".hidden.inp",
+        "c.inp",
+        "a.inp",
+    ]
+
+
+def test_get_file_list__limit(input_dir):
+    assert jobberappslib.get_file_list(input_dir, "*", limit=2) == [
+        ".hidden.inp",
+        "noext",
+    ]
+
+
+def test_get_file_list__cache(input_dir, monkeypatch):
+    """
+    Is the cached list reused until a file is added to the directory?
+    """
+    monkeypatch.setattr(jobberappslib, "_file_lists", {})
+    assert jobberappslib.get_file_list(input_dir, "*.dat", cache=True) == ["b.dat"]
+
+    with patch.object(jobberappslib.os, "scandir") as mock_scandir:
+        assert jobberappslib.get_file_list(input_dir, "*.dat", cache=True) == ["b.dat"]
+        mock_scandir.assert_not_called()
+
+    (input_dir / "d.dat").write_text("d")
+    os.utime(str(input_dir), (2000, 2000))
+    assert jobberappslib.get_file_list(input_dir, "*.dat", cache=True) == [
+        "d.dat",
+        "b.dat",
+    ]
@@ -1,8 +1,14 @@
 """
 Tests of the API client architecture and related functions
 """
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import shutil
+import tarfile
+from unittest.mock import Mock, patch
 
-from pytest import mark
+from pytest import fixture, mark, raises
 
 from jobbergate_cli import jobbergate_api_wrapper
 
@@ -24,3 +30,918 @@ def test_fit_line(input, expected):
     Do we truncate a string in the expected ways?
     """
     assert jobbergate_api_wrapper._fit_line(input, n=19) == expected
+
+
+@fixture
+def api():
+    return jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token",
+        job_script_config={},
+        job_submission_config={},
+        api_endpoint="https://jobbergate-api-staging.omnivector.solutions",
+        user_id=1,
+    )
+
+
+def test_get_entity__reuses_remembered_objects(api):
+    """
+    Do objects already held by this invocation skip the round trip to the API?
+    """
+    api.remember_entity("job-script", {"id": 13, "job_script_name": "dummy"})
+    with patch.object(api, "jobbergate_request") as mock_request:
+        assert api.get_entity("job-script", "13") == {
+            "id": 13,
+            "job_script_name": "dummy",
+        }
+        mock_request.assert_not_called()
+
+        api.forget_entity("job-script", 13)
+        api.get_entity("job-script", 13)
+        mock_request.assert_called_once()
+
+
+def test_remember_entity__ignores_errors(api):
+    api.remember_entity("application", api.error_handle(error="oops", solution="none"))
+    api.remember_entity("application", "PUT request failed")
+    assert api._entities == {}
+
+
+def test_create_job_submission__no_refetch(api, tmp_path, monkeypatch):
+    """
+    Does a job submission for a freshly created job script reuse what we already have?
+    """
+    monkeypatch.chdir(tmp_path)
+    api.remember_entity("application", {"id": 7, "application_name": "dummy-app"})
+    api.remember_entity(
+        "job-script",
+        {
+            "id": 13,
+            "application": 7,
+            "job_script_name": "dummy",
+            "job_script_data_as_string": json.dumps({"application.sh": "#!/bin/bash"}),
+        },
+    )
+    with patch.object(api, "jobbergate_request") as mock_request:
+        mock_request.return_value = {"id": 1}
+        api.create_job_submission(job_script_id=13, render_only=True)
+
+    mock_request.assert_called_once()
+    assert mock_request.call_args[1]["method"] == "POST"
+    assert (tmp_path / "dummy.job").read_text() == "#!/bin/bash"
+
+
+def test_create_job_submission__job_array(api, tmp_path, monkeypatch, capsys):
+    """
+    Is a parameter sweep submitted with a single sbatch call as a Slurm job array?
+    """
+    monkeypatch.chdir(tmp_path)
+    array_param_file = tmp_path / "sweep.json"
+    array_param_file.write_text(json.dumps([{"x": 1}, {"x": 2}, {"x": 3}]))
+    api.remember_entity("application", {"id": 7, "application_name": "dummy-app"})
+    api.remember_entity(
+        "job-script",
+        {
+            "id": 13,
+            "application": 7,
+            "job_script_name": "dummy",
+            "job_script_data_as_string": json.dumps({"application.sh": "#!/bin/bash"}),
+        },
+    )
+    with patch.object(api, "jobbergate_request") as mock_request, patch.object(
+        api.sbatch, "submit"
+    ) as mock_run, patch.object(
+        api, "job_submission_config", {"job_submission_description": "nightly"}
+    ):
+        mock_request.return_value = {"id": 1}
+        mock_run.return_value = "42"
+        api.create_job_submission(
+            job_script_id=13,
+            render_only=False,
+            array_param_file=str(array_param_file),
+            array_max_concurrent=2,
+        )
+
+    params_dir = tmp_path / "dummy.job.array"
+    mock_run.assert_called_once_with(
+        "dummy.job",
+        "dummy-app",
+        sbatch_args=[
+            "--array=0-2%2",
+            f"--export=ALL,JOBBERGATE_ARRAY_PARAMS_DIR={params_dir}",
+        ],
+    )
+    assert json.loads((params_dir / "2.json").read_text()) == {"x": 3}
+    mock_request.assert_called_once()
+    data = mock_request.call_args[1]["data"]
+    assert data["slurm_job_id"] == "42"
+    assert data["job_submission_description"] == (
+        "nightly (Slurm job array with 3 tasks)"
+    )
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == "Submitted batch job 42\n"
+
+
+def test_get_job_script__output_dir(api, tmp_path):
+    """
+    Are the job script files written to --output-dir rather than printed?
+    """
+    files = {"application.sh": "#!/bin/bash", "input.deck": "deck"}
+    api.remember_entity(
+        "job-script", dict(id=13, job_script_data_as_string=json.dumps(files))
+    )
+
+    response = api.get_job_script(13, False, output_dir=str(tmp_path / "out"))
+    assert "job_script_data_as_string" not in response
+    assert response["job_script_files"] == [
+        str(tmp_path / "out" / "application.sh"),
+        str(tmp_path / "out" / "input.deck"),
+    ]
+    assert (tmp_path / "out" / "input.deck").read_text() == "deck"
+
+    response = api.get_job_script(13, False)
+    assert response["job_script_data_as_string"] == (
+        "\nNEW_FILE\n#!/bin/bash\nNEW_FILE\ndeck"
+    )
+    assert api.get_job_script(13, True) == "#!/bin/bash"
+
+    stream = io.StringIO()
+    response = api.get_job_script(13, False, stream=stream)
+    assert "job_script_data_as_string" not in response
+    assert stream.getvalue() == "\nNEW_FILE\n#!/bin/bash\nNEW_FILE\ndeck\n"
+
+
+def test_update_job_script__dir_is_one_partial_update(api, tmp_path):
+    """
+    Is a directory of job script files sent as a single conditional PATCH?
+    """
+    (tmp_path / "application.sh").write_text("#!/bin/bash\nhostname")
+    (tmp_path / "inputs").mkdir()
+    (tmp_path / "inputs" / "deck").write_text("deck")
+    api.remember_entity("job-script", {"id": 13, "updated_at": "2021-12-01T10:00:00"})
+    with patch.object(api, "jobbergate_request") as mock_request:
+        mock_request.return_value = {"id": 13, "updated_at": "2021-12-02T10:00:00"}
+        api.update_job_script(13, job_script_dir=str(tmp_path))
+
+    mock_request.assert_called_once()
+    kwargs = mock_request.call_args[1]
+    assert kwargs["method"] == "PATCH"
+    assert kwargs["headers"] == {"If-Unmodified-Since": "Wed, 01 Dec 2021 10:00:00 GMT"}
+    assert json.loads(kwargs["data"]["job_script_data_as_string"]) == {
+        "application.sh": "#!/bin/bash\nhostname",
+        "inputs/deck": "deck",
+    }
+    assert api.get_entity("job-script", 13)["updated_at"] == "2021-12-02T10:00:00"
+
+
+def test_update_job_script__file_sends_only_the_main_script(api, tmp_path):
+    """
+    Does --job-script-file send the main script only, without downloading the rest?
+    """
+    job_script_file = tmp_path / "job.sh"
+    job_script_file.write_text("#!/bin/bash\nnew")
+    with patch.object(api, "jobbergate_request") as mock_request:
+        mock_request.return_value = {"id": 13, "updated_at": "2021-12-02"}
+        api.update_job_script(
+            13, job_script_file=str(job_script_file), unmodified_since="2021-12-01"
+        )
+
+    mock_request.assert_called_once()
+    kwargs = mock_request.call_args[1]
+    assert kwargs["method"] == "PATCH"
+    assert kwargs["headers"] == {"If-Unmodified-Since": "Wed, 01 Dec 2021 00:00:00 GMT"}
+    assert list(kwargs["data"]) == ["job_script_files"]
+    assert json.loads(kwargs["data"]["job_script_files"]) == {
+        "application.sh": "#!/bin/bash\nnew"
+    }
+
+
+def test_update_job_script__file_merges_partial_response(api, tmp_path):
+    """
+    Is a partial PATCH response merged into the copy held by the client?
+    """
+    job_script_file = tmp_path / "job.sh"
+    job_script_file.write_text("#!/bin/bash\nnew")
+    stored = {"application.sh": "#!/bin/bash\nold", "input.deck": "deck"}
+    api.remember_entity(
+        "job-script",
+        dict(
+            id=13,
+            job_script_name="dummy",
+            job_script_data_as_string=json.dumps(stored),
+            updated_at="2021-12-01",
+        ),
+    )
+    with patch.object(api, "jobbergate_request") as mock_request:
+        mock_request.return_value = {"id": 13, "updated_at": "2021-12-02"}
+        api.update_job_script(13, job_script_file=str(job_script_file))
+
+    assert mock_request.call_args[1]["headers"] == {
+        "If-Unmodified-Since": "Wed, 01 Dec 2021 00:00:00 GMT"
+    }
+    entity = api.get_entity("job-script", 13)
+    assert entity["job_script_name"] == "dummy"
+    assert entity["updated_at"] == "2021-12-02"
+    assert json.loads(entity["job_script_data_as_string"]) == {
+        "application.sh": "#!/bin/bash\nnew",
+        "input.deck": "deck",
+    }
+
+
+def test_update_job_script__file_falls_back_to_whole_job_script(api, tmp_path):
+    """
+    Are the other files kept when the API does not take single files?
+    """
+    job_script_file = tmp_path / "job.sh"
+    job_script_file.write_text("#!/bin/bash\nnew")
+    stored = {"application.sh": "#!/bin/bash\nold", "input.deck": "deck"}
+    api.remember_entity(
+        "job-script", dict(id=13, job_script_data_as_string=json.dumps(stored))
+    )
+    with patch.object(jobbergate_api_wrapper.client, "patch") as mock_patch:
+        mock_patch.side_effect = [
+            Mock(status_code=422, text="job_script_files: unknown field"),
+            Mock(status_code=200, content=b'{"id": 13}'),
+        ]
+        assert api.update_job_script(13, job_script_file=str(job_script_file)) == {
+            "id": 13
+        }
+
+    assert api.file_updates is False
+    data = mock_patch.call_args[1]["data"]
+    assert json.loads(data["job_script_data_as_string"]) == {
+        "application.sh": "#!/bin/bash\nnew",
+        "input.deck": "deck",
+    }
+
+
+def test_update_job_script__falls_back_to_put(api):
+    """
+    Is the whole job script PUT when the API does not accept PATCH?
+    """
+
+    def patch_not_allowed(*args, **kwargs):
+        return Mock(status_code=405)
+
+    api.remember_entity("job-script", {"id": 13, "job_script_name": "dummy"})
+    with patch.object(
+        jobbergate_api_wrapper.client, "patch", side_effect=patch_not_allowed
+    ), patch.object(jobbergate_api_wrapper.client, "put") as mock_put:
+        mock_put.return_value = Mock(status_code=200, content=b'{"id": 13}')
+        assert api.update_job_script(13, '{"application.sh": "x"}') == {"id": 13}
+
+    assert api.partial_updates is False
+    assert mock_put.call_args[1]["data"] == {
+        "id": 13,
+        "job_script_name": "dummy",
+        "job_script_data_as_string": '{"application.sh": "x"}',
+    }
+
+
+def test_update_job_script__ledger_copy_is_not_a_precondition(api):
+    """
+    Is the possibly stale copy of the ledger left out of If-Unmodified-Since?
+    """
+    api._ledger = Mock()
+    api._ledger.get.return_value = {"id": 13, "updated_at": "2021-12-01T10:00:00"}
+    with patch.object(api, "jobbergate_request") as mock_request:
+        mock_request.return_value = {"id": 13}
+        api.update_job_script(13, '{"application.sh": "x"}')
+
+    assert mock_request.call_args[1]["headers"] == {}
+
+
+def test_update_job_script__server_error_keeps_partial_updates(api):
+    """
+    Is PATCH only given up when the API does not support it?
+    """
+    with patch.object(jobbergate_api_wrapper.client, "patch") as mock_patch:
+        mock_patch.return_value = Mock(status_code=500, text="")
+        response = api.update_job_script(13, '{"application.sh": "x"}')
+
+    assert "error" in response
+    assert api.partial_updates is True and api.file_updates is True
+
+
+@mark.parametrize(
+    "value",
+    [
+        "2021-12-06T10:00:00",
+        "2021-12-06T10:00:00.000000",
+        "2021-12-06T10:00:00Z",
+        "2021-12-06T12:00:00+02:00",
+        "2021-12-06 10:00:00.5+0000",
+        "Mon, 06 Dec 2021 10:00:00 GMT",
+    ],
+)
+def test_http_date(value):
+    assert jobbergate_api_wrapper.http_date(value).startswith(
+        "Mon, 06 Dec 2021 10:00:0"
+    )
+
+
+def test_http_date__invalid():
+    with raises(ValueError):
+        jobbergate_api_wrapper.http_date("yesterday")
+
+
+def test_update_job_script__put_failed(api):
+    """
+    Is a failed PUT reported as an error?
+    """
+    api.partial_updates = False
+    api.remember_entity("job-script", {"id": 13, "job_script_name": "dummy"})
+    with patch.object(jobbergate_api_wrapper.client, "put") as mock_put:
+        mock_put.return_value = Mock(status_code=500, content=b"Server Error")
+        response = api.update_job_script(13, '{"application.sh": "x"}')
+
+    assert response["error"].startswith("Failed to update")
+
+
+def test_update_job_script__conflict(api):
+    """
+    Is a rejected conditional update reported as a conflict?
+    """
+    with patch.object(jobbergate_api_wrapper.client, "patch") as mock_patch:
+        mock_patch.return_value = Mock(status_code=412)
+        response = api.update_job_script(
+            13, '{"application.sh": "x"}', unmodified_since="2021-12-01"
+        )
+
+    assert "was changed since it was fetched" in response["error"]
+    assert mock_patch.call_args[1]["headers"]["If-Unmodified-Since"] == (
+        "Wed, 01 Dec 2021 00:00:00 GMT"
+    )
+
+
+def test_shared_client__concurrent_payloads(tmp_path, monkeypatch):
+    """
+    Do threads sharing one client build payloads of their own, leaving the base
+    configs untouched?
+    """
+    monkeypatch.chdir(tmp_path)
+    base_submission = {"job_submission_name": "", "job_submission_description": "D"}
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token",
+        job_script_config={"job_script_name": "", "job_script_description": "D"},
+        job_submission_config=base_submission,
+        api_endpoint="https://jobbergate-api-staging.omnivector.solutions",
+        user_id=1,
+    )
+    api.remember_entity("application", {"id": 7, "application_name": "dummy-app"})
+    for index in range(8):
+        api.remember_entity(
+            "job-script",
+            {
+                "id": index,
+                "application": 7,
+                "job_script_name": f"script-{index}",
+                "job_script_data_as_string": json.dumps({"application.sh": "#!"}),
+            },
+        )
+    sent = []
+
+    def jobbergate_request(method, endpoint, data):
+        sent.append(dict(data))
+        return {"id": data["job_script"]}
+
+    def work(index):
+        sbatch_params = [f"--param-{n}" for n in range(index % 4)]
+        payload = api.job_script_payload(
+            f"name-{index}", 7, {"jobbergate_config": {}}, sbatch_params
+        )
+        assert payload["job_script_name"] == f"name-{index}"
+        assert sorted(k for k in payload if k.startswith("sbatch_params_")) == sorted(
+            [f"sbatch_params_{n}" for n in range(len(sbatch_params))]
+            + (["sbatch_params_len"] if sbatch_params else [])
+        )
+        api.create_job_submission(
+            job_script_id=index % 8,
+            render_only=True,
+            job_submission_name=f"submission-{index}",
+        )
+
+    with patch.object(api, "jobbergate_request", side_effect=jobbergate_request):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(200)))
+
+    assert len(sent) == 200
+    for data in sent:
+        index = int(data["job_submission_name"].split("-")[1])
+        assert data["job_script"] == index % 8
+        assert "slurm_job_id" not in data
+    assert base_submission == {
+        "job_submission_name": "",
+        "job_submission_description": "D",
+    }
+    assert dict(api.job_script_config) == {
+        "job_script_name": "",
+        "job_script_description": "D",
+    }
+    with raises(TypeError):
+        api.job_submission_config["job_script"] = 1
+
+
+def test_shared_client__concurrent_uploads(api, tmp_path, monkeypatch):
+    """
+    Do threads sharing one client upload their own answers and application archives?
+    """
+    monkeypatch.chdir(tmp_path)
+    api.remember_entity(
+        "application",
+        {
+            "id": 7,
+            "application_name": "dummy-app",
+            "application_file": (
+                "from jobbergate_cli import appform\n"
+                "class JobbergateApplication:\n"
+                "    def __init__(self, data):\n"
+                "        pass\n"
+                "    def mainflow(self, data):\n"
+                "        return [appform.Text('value', 'Value?')]\n"
+            ),
+            "application_config": "jobbergate_config: {}\n",
+        },
+    )
+    for index in range(8):
+        application_path = tmp_path / f"app-{index}"
+        application_path.mkdir()
+        (application_path / "jobbergate.py").write_text(f"# {index}\n")
+        (application_path / "jobbergate.yaml").write_text("jobbergate_config: {}\n")
+        (tmp_path / f"params-{index}.json").write_text(json.dumps({"value": index}))
+    sent = {}
+
+    def jobbergate_request(method, endpoint, data=None, files=None, **kwargs):
+        name = files["upload_file"][0] if files else None
+        if name == "param_dict.json":
+            param_dict = json.loads(files["upload_file"][1])
+            sent[data["job_script_name"]] = param_dict["jobbergate_config"]["value"]
+        elif name is not None:
+            archive = tarfile.open(fileobj=files["upload_file"][1], mode="r:gz")
+            module = archive.extractfile("jobbergate.py").read().decode()
+            sent[data["application_name"]] = module
+        return {
+            "id": 1,
+            "job_script_name": data.get("job_script_name"),
+            "job_script_data_as_string": json.dumps({"application.sh": "#!"}),
+        }
+
+    def work(index):
+        api.create_job_script(
+            f"script-{index}",
+            7,
+            None,
+            str(tmp_path / f"params-{index}.json"),
+            None,
+            fast=True,
+            no_submit=True,
+            debug=False,
+        )
+        api.create_application(f"app-{index}", None, str(tmp_path / f"app-{index}"), "")
+
+    with patch.object(
+        api, "jobbergate_request", side_effect=jobbergate_request
+    ), patch.object(api, "create_job_submission"), patch("builtins.print"):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(work, range(8)))
+
+    for index in range(8):
+        assert sent[f"script-{index}"] == index
+        assert sent[f"app-{index}"] == f"# {index}\n"
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_file()) == [
+        f"params-{index}.json" for index in range(8)
+    ]
+
+
+@mark.parametrize("content", ["{}", "[]", "[1, 2]", "not json"])
+def test_load_array_params__invalid(api, tmp_path, content):
+    array_param_file = tmp_path / "sweep.json"
+    array_param_file.write_text(content)
+    assert "error" in api.load_array_params(str(array_param_file))
+
+
+@mark.parametrize(
+    "spec,expected",
+    [
+        [[{"a": 1}, {"a": 2}], [{"a": 1}, {"a": 2}]],
+        [
+            {"grid": {"a": [1, 2], "b": ["x", "y"]}},
+            [
+                {"a": 1, "b": "x"},
+                {"a": 1, "b": "y"},
+                {"a": 2, "b": "x"},
+                {"a": 2, "b": "y"},
+            ],
+        ],
+        [
+            {"zip": {"a": [1, 2], "b": ["x", "y"]}, "base": {"c": 0}},
+            [{"a": 1, "b": "x", "c": 0}, {"a": 2, "b": "y", "c": 0}],
+        ],
+    ],
+    ids=["list", "grid", "zip-with-base"],
+)
+def test_load_sweep_points(api, tmp_path, spec, expected):
+    sweep_file = tmp_path / "sweep.json"
+    sweep_file.write_text(json.dumps(spec))
+    assert api.load_sweep_points(str(sweep_file)) == expected
+
+
+@mark.parametrize(
+    "spec",
+    [[], {}, {"zip": {"a": [1, 2], "b": [1]}}, {"grid": {"a": [1]}, "zip": {}}],
+    ids=["empty-list", "no-axes", "zip-mismatch", "grid-and-zip"],
+)
+def test_load_sweep_points__invalid(api, tmp_path, spec):
+    sweep_file = tmp_path / "sweep.json"
+    sweep_file.write_text(json.dumps(spec))
+    assert "error" in api.load_sweep_points(str(sweep_file))
+
+
+@mark.parametrize("name,base_name", [("sweep", "sweep"), (None, "app")])
+def test_create_job_script_sweep(api, tmp_path, name, base_name):
+    """
+    Is the application loaded once, and one job script created per resolved point,
+    named after the application by default?
+    """
+    from jobbergate_cli import appform
+
+    class JobbergateApplication:
+        def __init__(self, param_dict):
+            pass
+
+        def mainflow(self, data):
+            return [appform.Integer("size", "Size?"), appform.Text("tag", "Tag?", "t")]
+
+    sweep_file = tmp_path / "sweep.json"
+    sweep_file.write_text(json.dumps({"grid": {"size": [1, 2, 3]}}))
+    created = []
+
+    def post_job_script(data, files):
+        param_dict = json.loads(files["upload_file"][1])
+        created.append(param_dict["jobbergate_config"])
+        return dict(id=len(created), job_script_name=data["job_script_name"])
+
+    with patch.object(
+        api, "fetch_application", return_value={"id": 7, "application_name": "app"}
+    ), patch.object(
+        api, "load_application_config", return_value={"jobbergate_config": {}}
+    ), patch.object(
+        api, "import_jobbergate_application_module"
+    ) as mock_import, patch.object(
+        api, "post_job_script", side_effect=post_job_script
+    ):
+        mock_import.return_value.JobbergateApplication = JobbergateApplication
+        results = api.create_job_script_sweep(
+            name, 7, None, str(sweep_file), None, (), max_workers=2
+        )
+
+    mock_import.assert_called_once()
+    assert [r["job_script_name"] for r in results] == [
+        f"{base_name}-{index}" for index in range(3)
+    ]
+    assert sorted(c["size"] for c in created) == [1, 2, 3]
+    assert all(c["tag"] == "t" for c in created)
+
+
+@mark.parametrize("content", ["{not json", "[1, 2]"], ids=["not-json", "not-object"])
+def test_load_param_file__invalid(api, tmp_path, content):
+    param_file = tmp_path / "params.json"
+    param_file.write_text(content)
+    response = api.load_param_file(str(param_file))
+    assert response["error"] == f"invalid --parameter-file supplied: {param_file}"
+
+
+def test_create_job_script_sweep__missing_answer(api, tmp_path):
+    from jobbergate_cli import appform
+
+    class JobbergateApplication:
+        def __init__(self, param_dict):
+            pass
+
+        def mainflow(self, data):
+            return [appform.Integer("size", "Size?"), appform.Text("tag", "Tag?")]
+
+    sweep_file = tmp_path / "sweep.json"
+    sweep_file.write_text(json.dumps([{"size": 1}]))
+    with patch.object(api, "fetch_application", return_value={"id": 7}), patch.object(
+        api, "load_application_config", return_value={"jobbergate_config": {}}
+    ), patch.object(
+        api, "import_jobbergate_application_module"
+    ) as mock_import, patch.object(
+        api, "post_job_script"
+    ) as mock_post:
+        mock_import.return_value.JobbergateApplication = JobbergateApplication
+        results = api.create_job_script_sweep(
+            "sweep", 7, None, str(sweep_file), None, (), max_workers=2
+        )
+
+    mock_post.assert_not_called()
+    assert results[0]["error"] == "No answer supplied for: tag"
+
+
+def test_list_applications__projects_fields(api):
+    """
+    Do listings ask for the displayed fields only, falling back when rejected?
+    """
+    listing = [dict(id=1, application_name="one", application_description="app")]
+    content = json.dumps(listing).encode()
+    with patch.object(jobbergate_api_wrapper.client, "get") as request:
+        request.side_effect = [
+            Mock(status_code=400, text="Unknown query parameter: fields"),
+            Mock(status_code=200, content=content),
+            Mock(status_code=200, content=content),
+        ]
+        assert api.list_applications(all=False, user=False) == listing
+        api.list_applications(all=False, user=False)
+
+    sent = [call[1]["params"] for call in request.call_args_list]
+    assert sent[0]["fields"] == ",".join(
+        jobbergate_api_wrapper.LIST_FIELDS["application"]
+    )
+    assert "fields" not in sent[1]
+    assert "fields" not in sent[2]
+
+
+def test_list_applications__failure_keeps_projection(api):
+    """
+    Are failures other than a rejected fields parameter returned without a retry?
+    """
+    with patch.object(jobbergate_api_wrapper.client, "get") as request:
+        request.return_value = Mock(status_code=500, text="Server Error")
+        assert "error" in api.list_applications(all=False, user=False)
+
+    request.assert_called_once()
+    assert api.project_fields is True
+
+
+def test_list_job_scripts__fetches_heavy_fields_lazily(api):
+    """
+    Is the job script data fetched once, on first access only?
+    """
+    detail = dict(id=7, job_script_name="seven", job_script_data_as_string="{}")
+    with patch.object(
+        api,
+        "jobbergate_request",
+        side_effect=[[dict(id=7, job_script_name="seven")], detail],
+    ) as request:
+        (job_script,) = api.list_job_scripts(False)
+        assert job_script == dict(id=7, job_script_name="seven")
+        assert request.call_count == 1
+
+        assert job_script["job_script_data_as_string"] == "{}"
+        assert job_script["job_script_data_as_string"] == "{}"
+        assert request.call_count == 2
+        with raises(KeyError):
+            job_script["no_such_field"]
+
+
+def test_parse_ids_and_format_ids():
+    """
+    Are lists and ranges of ids parsed, and formatted back compactly?
+    """
+    assert jobbergate_api_wrapper.parse_ids("7, 1,3-5,4") == [1, 3, 4, 5, 7]
+    assert jobbergate_api_wrapper.format_ids([7, 5, 1, 3, 4]) == "1,3-5,7"
+    for spec in ["", "a", "5-3", "1-b"]:
+        with raises(ValueError):
+            jobbergate_api_wrapper.parse_ids(spec)
+
+
+def test_parse_age():
+    """
+    Are ages counted back from now, and dates taken as they are?
+    """
+    from datetime import datetime
+
+    now = datetime(2021, 12, 31, 12, 0, 0)
+    assert jobbergate_api_wrapper.parse_age("30d", now) == "2021-12-01T12:00:00"
+    assert jobbergate_api_wrapper.parse_age("12h", now) == "2021-12-31T00:00:00"
+    assert jobbergate_api_wrapper.parse_age("2021-12-01") == "2021-12-01T00:00:00"
+    with raises(ValueError):
+        jobbergate_api_wrapper.parse_age("yesterday")
+
+
+def test_delete_many__filters_and_reports_failures(api, capsys):
+    """
+    Are the objects matching the filters deleted concurrently, with a summary of the
+    failures?
+    """
+    listed = [
+        dict(id=1, job_submission_name="campaign-1", updated_at="2021-01-01T00:00:00"),
+        dict(id=2, job_submission_name="campaign-2", updated_at="2021-01-02T00:00:00"),
+        dict(id=3, job_submission_name="other", updated_at="2021-01-01T00:00:00"),
+        dict(id=4, job_submission_name="campaign-4", updated_at="2021-06-01T00:00:00"),
+        dict(id=5, job_submission_name="campaign-5", updated_at="2021-01-03T00:00:00"),
+    ]
+
+    def delete_job_submission(job_submission_id):
+        if job_submission_id == 2:
+            return api.error_handle(error="not allowed", solution="")
+        return ""
+
+    with patch.object(api, "list_request", return_value=listed), patch.object(
+        api, "delete_job_submission", side_effect=delete_job_submission
+    ) as mock_delete, patch.object(
+        jobbergate_api_wrapper.client, "use_pooled_session"
+    ) as mock_session:
+        summary = api.delete_many(
+            "job-submission",
+            older_than="2021-03-01",
+            name_glob="campaign-*",
+            max_workers=2,
+            yes=True,
+        )
+
+    mock_session.assert_called_once_with(2)
+    assert sorted(call[0][0] for call in mock_delete.call_args_list) == [1, 2, 5]
+    assert summary["requested"] == 3
+    assert summary["deleted"] == 2
+    assert summary["failed"] == 1
+    assert summary["failed_ids"] == "2"
+    assert "Failed to delete job-submission 2: not allowed" in capsys.readouterr().err
+
+
+def test_select_entities__compares_dates_not_strings(api):
+    """
+    Are timestamps of different formats compared as dates with --older-than?
+    """
+    listed = [
+        dict(id=1, job_script_name="a", updated_at="2021-02-28T23:59:59Z"),
+        dict(id=2, job_script_name="b", updated_at="2021-03-01T01:00:00+02:00"),
+        dict(id=3, job_script_name="c", updated_at="2021-03-01T00:00:00.5+00:00"),
+        dict(id=4, job_script_name="d", updated_at="2021-03-01T00:00:00"),
+        dict(id=5, job_script_name="e", updated_at=None),
+    ]
+    with patch.object(api, "list_request", return_value=listed):
+        assert api.select_entities("job-script", False, older_than="2021-03-01") == [
+            1,
+            2,
+        ]
+
+
+def test_delete_many__ids_without_listing(api):
+    """
+    Are ids deleted without a listing, and is nothing deleted without confirmation?
+    """
+    with patch.object(api, "list_request") as mock_list, patch.object(
+        api, "delete_job_script", return_value=""
+    ) as mock_delete, patch(
+        "jobbergate_cli.prompts.confirm", return_value=False
+    ), patch.object(
+        jobbergate_api_wrapper.client, "use_pooled_session"
+    ):
+        assert "error" in api.delete_many("job-script", ids="1-3")
+        mock_delete.assert_not_called()
+
+        summary = api.delete_many("job-script", ids="1-3", yes=True)
+
+    mock_list.assert_not_called()
+    assert summary["deleted"] == 3
+    assert "failed_ids" not in summary
+
+
+def make_application(path, config="jobbergate_config: {}\n", module="x = 1\n"):
+    path.mkdir(parents=True)
+    (path / "jobbergate.py").write_text(module)
+    (path / "jobbergate.yaml").write_text(config)
+    return path
+
+
+def test_sync_applications__plans_by_identifier(api, tmp_path):
+    """
+    Are application directories matched by identifier, with only the new, changed and
+    invalid ones reported as such?
+    """
+    root = tmp_path / "apps"
+    make_application(root / "new")
+    make_application(root / "group" / "same")
+    make_application(root / "changed")
+    make_application(root / "broken", config="[unclosed\n")
+    make_application(root / "syntax", module="def (\n")
+    make_application(root / "twice")
+    make_application(root / "group" / "twice")
+    make_application(root / ".hidden")
+    make_application(root / "new" / "nested")
+    listed = [
+        dict(id=2, application_identifier="same", updated_at="t1"),
+        dict(id=3, application_identifier="changed", updated_at="t1"),
+    ]
+    state_path = tmp_path / "sync.json"
+    state_path.write_text(
+        json.dumps(
+            {
+                "same": dict(
+                    version=jobbergate_api_wrapper.render.application_version(
+                        root / "group" / "same"
+                    ),
+                    updated_at="t1",
+                ),
+                "changed": dict(version="old", updated_at="t1"),
+            }
+        )
+    )
+
+    with patch.object(api, "list_request", return_value=listed), patch.object(
+        api, "jobbergate_request"
+    ) as mock_request:
+        rows = api.sync_applications(str(root), dry_run=True, state_path=state_path)
+
+    mock_request.assert_not_called()
+    actions = {row["identifier"]: row["action"] for row in rows}
+    assert actions == {
+        "broken": "invalid",
+        "changed": "update",
+        "new": "create",
+        "same": "unchanged",
+        "syntax": "invalid",
+        "twice": "invalid",
+    }
+    assert {row["identifier"]: row["id"] for row in rows}["changed"] == 3
+
+
+def test_sync_applications__no_state_compares_content(api, tmp_path):
+    """
+    Without a record of earlier syncs, are applications compared with the API by
+    content hash, and is the match recorded?
+    """
+    root = tmp_path / "apps"
+    make_application(root / "same")
+    make_application(root / "changed", module="x = 2\n")
+    listed = [
+        dict(id=2, application_identifier="same", updated_at="t1"),
+        dict(id=3, application_identifier="changed", updated_at="t1"),
+    ]
+    state_path = tmp_path / "sync.json"
+
+    def jobbergate_request(method, endpoint, **kwargs):
+        return dict(
+            id=int(endpoint.rstrip("/").split("/")[-1]),
+            application_file="x = 1\n",
+            application_config="jobbergate_config: {}\n",
+        )
+
+    with patch.object(api, "list_request", return_value=listed), patch.object(
+        api, "jobbergate_request", side_effect=jobbergate_request
+    ):
+        rows = api.sync_applications(str(root), dry_run=True, state_path=state_path)
+        assert {row["identifier"]: row["action"] for row in rows} == {
+            "changed": "update",
+            "same": "unchanged",
+        }
+        assert not state_path.exists()
+
+        # nothing to upload, but the match is remembered
+        shutil.rmtree(str(root / "changed"))
+        rows = api.sync_applications(str(root), state_path=state_path)
+
+    assert [row["action"] for row in rows] == ["unchanged"]
+    assert list(json.loads(state_path.read_text())) == ["same"]
+
+
+def test_sync_applications__uploads_in_memory(api, tmp_path):
+    """
+    Are the new and changed applications packed without a tar file in the working
+    directory and uploaded, and are they unchanged on the next sync?
+    """
+    root = tmp_path / "apps"
+    make_application(root / "new")
+    make_application(root / "changed")
+    (root / "changed" / "templates").mkdir()
+    (root / "changed" / "templates" / "job.j2").write_text("#!/bin/bash\n")
+    listed = [dict(id=3, application_identifier="changed", updated_at="t1")]
+    state_path = tmp_path / "state" / "sync.json"
+    uploads = {}
+
+    def jobbergate_request(method, endpoint, data=None, files=None, **kwargs):
+        if method == "GET":
+            return dict(id=3, application_identifier="changed", updated_at="t1")
+        archive = tarfile.open(fileobj=files["upload_file"][1], mode="r|gz")
+        uploads[data["application_identifier"]] = (method, sorted(archive.getnames()))
+        return dict(id=3 if method == "PUT" else 7, updated_at="t2")
+
+    with patch.object(
+        api, "list_request", side_effect=lambda *args, **kwargs: listed
+    ), patch.object(
+        api, "jobbergate_request", side_effect=jobbergate_request
+    ), patch.object(
+        jobbergate_api_wrapper.client, "use_pooled_session"
+    ), patch(
+        "sys.stderr"
+    ):
+        rows = api.sync_applications(str(root), max_workers=2, state_path=state_path)
+        listed = [
+            dict(id=3, application_identifier="changed", updated_at="t2"),
+            dict(id=7, application_identifier="new", updated_at="t2"),
+        ]
+        again = api.sync_applications(str(root), state_path=state_path)
+
+    assert [(row["identifier"], row["action"], row["id"]) for row in rows] == [
+        ("changed", "update", 3),
+        ("new", "create", 7),
+    ]
+    assert uploads["new"] == ("POST", ["jobbergate.py", "jobbergate.yaml"])
+    assert uploads["changed"] == (
+        "PUT",
+        ["jobbergate.py", "jobbergate.yaml", "templates/job.j2"],
+    )
+    assert not (tmp_path / "jobbergate.tar.gz").exists()
+    assert [row["action"] for row in again] == ["unchanged", "unchanged"]
@@ -0,0 +1,47 @@
+"""
+Tests of the JSON codec
+"""
+import json
+
+from pytest import mark, raises
+
+from jobbergate_cli import json_codec
+
+
+DOCUMENT = {
+    "id": 1,
+    "name": "café",
+    "nested": {"list": [1, 2.5, None, True], "empty": {}},
+    "items": [],
+}
+
+
+@mark.parametrize("backend", ["orjson", "json"])
+def test_dumps__same_text_with_both_backends(backend, monkeypatch):
+    """
+    Do both backends write compact and indented JSON the same way?
+    """
+    if backend == "json":
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif json_codec.orjson is None:
+        return
+
+    assert json_codec.dumps(DOCUMENT) == json.dumps(
+        DOCUMENT, ensure_ascii=False, separators=(",", ":")
+    )
+    assert json_codec.dumps(DOCUMENT, indent=2) == json.dumps(
+        DOCUMENT, ensure_ascii=False, indent=2
+    )
+    assert json_codec.dumps({2: "b", 1: "a"}, sort_keys=True) == '{"1":"a","2":"b"}'
+    assert json_codec.loads(json_codec.dumps(DOCUMENT).encode()) == DOCUMENT
+
+    with raises(ValueError):
+        json_codec.loads("not json")
+
+
+def test_dumps__falls_back_on_unsupported_values():
+    """
+    Are values orjson can not encode still written?
+    """
+    big = 1 << 70
+    assert json_codec.dumps([big]) == f"[{big}]"
@@ -0,0 +1,180 @@
+"""
+Tests of the local ledger of job scripts and job submissions
+"""
+import importlib
+import sqlite3
+from unittest.mock import MagicMock, Mock, patch
+
+from pytest import fixture
+
+from jobbergate_cli import jobbergate_api_wrapper, jobbergate_common
+from jobbergate_cli.ledger import Ledger, matches
+
+
+def script(id_, name="script", updated_at="2021-10-01T00:00:00"):
+    return dict(id=id_, job_script_name=name, updated_at=updated_at)
+
+
+@fixture
+def ledger(tmp_path):
+    return Ledger(path=tmp_path / "cache" / "ledger.sqlite3", ttl=60)
+
+
+def test_sync_and_query(ledger):
+    """
+    Does a synced scope list its objects, filtered and ordered by id?
+    """
+    assert ledger.is_stale("job-script", "all")
+    ledger.sync(
+        "job-script",
+        "all",
+        [
+            script(2, "beta", "2021-10-02T00:00:00"),
+            script(1, "Alpha", "2021-10-01T00:00:00"),
+        ],
+    )
+    assert not ledger.is_stale("job-script", "all")
+    assert ledger.is_stale("job-script", "user:1")
+
+    assert [s["id"] for s in ledger.query("job-script", "all")] == [1, 2]
+    assert [s["id"] for s in ledger.query("job-script", "all", name="alp")] == [1]
+    assert [s["id"] for s in ledger.query("job-script", "all", since="2021-10-02")] == [
+        2
+    ]
+    assert ledger.query("job-script", "user:1") == []
+
+
+def test_sync__drops_unlisted_and_rewrites_changed(ledger):
+    """
+    Does a second sync only keep what the API listed, with its latest content?
+    """
+    ledger.sync("job-script", "all", [script(1), script(2)])
+    ledger.sync("job-script", "all", [script(2, "renamed", "2021-10-03T00:00:00")])
+
+    assert ledger.query("job-script", "all") == [
+        script(2, "renamed", "2021-10-03T00:00:00")
+    ]
+
+
+def test_upsert_and_delete(ledger):
+    """
+    Do writes through the ledger show up in, and leave, the listings?
+    """
+    ledger.sync("job-script", "all", [])
+    ledger.upsert("job-script", script(3), scopes=("all",))
+    ledger.upsert("job-script", dict(error="failed"), scopes=("all",))
+    assert ledger.query("job-script", "all") == [script(3)]
+    assert ledger.get("job-script", "3") == script(3)
+
+    ledger.delete("job-script", 3)
+    assert ledger.query("job-script", "all") == []
+    assert ledger.get("job-script", 3) is None
+
+
+def test_matches():
+    """
+    Are objects listed by the API filtered like ledger queries?
+    """
+    submission = dict(id=1, job_submission_name="Nightly", status="COMPLETED")
+    assert matches("job-submission", submission, name="night", status="completed")
+    assert not matches("job-submission", submission, status="FAILED")
+    assert not matches("job-submission", submission, since="2021-10-01")
+
+
+def test_list_job_scripts__uses_ledger(ledger):
+    """
+    Does listing reach the API only when the ledger is stale or a sync is forced?
+    """
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token",
+        job_script_config={},
+        job_submission_config={},
+        api_endpoint="https://jobbergate-api-staging.omnivector.solutions",
+        user_id=1,
+        ledger=ledger,
+    )
+    with patch.object(
+        api, "jobbergate_request", return_value=[script(1), script(2, "other")]
+    ) as request:
+        assert [s["id"] for s in api.list_job_scripts(False)] == [1, 2]
+        assert [s["id"] for s in api.list_job_scripts(False, name="oth")] == [2]
+        assert request.call_count == 1
+
+        api.list_job_scripts(False, sync=True)
+        assert request.call_count == 2
+
+
+def locked(ledger):
+    """Make every statement of the ledger fail as with a lock held by another process"""
+    connection = MagicMock()
+    connection.execute.side_effect = sqlite3.OperationalError("database is locked")
+    connection.executemany.side_effect = connection.execute.side_effect
+    return patch.object(ledger, "_connection", connection)
+
+
+def test_write_through__locked_database(ledger):
+    """
+    Do writes through a locked ledger give up without failing the command?
+    """
+    with locked(ledger):
+        ledger.upsert("job-script", script(3), scopes=("all",))
+        ledger.delete("job-script", 3)
+        assert ledger.get("job-script", 3) is None
+
+
+def test_list_job_scripts__locked_database(ledger):
+    """
+    Are job scripts listed from the API when the ledger is locked?
+    """
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token", user_id=1, ledger=ledger
+    )
+    with patch.object(
+        api, "jobbergate_request", return_value=[script(1), script(2, "other")]
+    ) as request, locked(ledger):
+        assert [s["id"] for s in api.list_job_scripts(False, name="oth")] == [2]
+    assert request.call_count == 1
+
+
+def test_ledger_factory__opened_on_first_use():
+    """
+    Is the ledger only opened when a command uses it, and only once?
+    """
+    factory = Mock(return_value=None)
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token", user_id=1, ledger_factory=factory
+    )
+    factory.assert_not_called()
+    assert api.ledger is None
+    assert api.ledger is None
+    factory.assert_called_once_with()
+
+
+def test_record_entity__without_heavy_fields(ledger):
+    """
+    Are the job script files left out of the copies written through to the ledger?
+    """
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token", user_id=1, ledger=ledger
+    )
+    api.record_entity(
+        "job-script",
+        dict(script(3), job_script_data_as_string='{"application.sh": "#!"}'),
+        created=True,
+    )
+    assert ledger.get("job-script", 3) == script(3)
+
+
+def test_ledger_path__per_endpoint(monkeypatch):
+    """
+    Do different API endpoints get ledgers of their own?
+    """
+    paths = []
+    for endpoint in ("https://staging.example.com", "https://prod.example.com"):
+        monkeypatch.setenv("JOBBERGATE_API_ENDPOINT", endpoint)
+        paths.append(importlib.reload(jobbergate_common).JOBBERGATE_LEDGER_PATH)
+    monkeypatch.undo()
+    importlib.reload(jobbergate_common)
+
+    assert paths[0].parent == paths[1].parent
+    assert paths[0] != paths[1]
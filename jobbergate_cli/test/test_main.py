@@ -1,10 +1,13 @@
 """
 Unit test helper functions in main
 """
+from concurrent.futures import ThreadPoolExecutor
 import json
-import pathlib
-from unittest.mock import create_autospec, patch
+import time
+from unittest.mock import patch
 
+import click
+from click.testing import CliRunner
 from pytest import fixture, mark, raises
 from requests import HTTPError
 
@@ -12,15 +15,16 @@ from jobbergate_cli import main
 
 
 @fixture
-def token_cache_mock(dwf_jwt_token):
+def token_cache_mock(dwf_jwt_token, tmp_path):
     """
-    Mock access to the filesystem path where the jwt token is cached
+    Point the filesystem path where the jwt token is cached to a temporary file
     """
-    mockpath = create_autospec(pathlib.Path, instance=True)
-    mockpath.exists.return_value = True
-    mockpath.read_text.return_value = dwf_jwt_token["raw"]
-    with patch.object(main, "JOBBERGATE_API_JWT_PATH", mockpath):
-        yield mockpath
+    token_path = tmp_path / "jobbergate.token"
+    token_path.write_text(dwf_jwt_token["raw"])
+    with patch.object(main, "JOBBERGATE_API_JWT_PATH", token_path), patch.object(
+        main, "JOBBERGATE_API_JWT_LOCK_PATH", tmp_path / "jobbergate.token.lock"
+    ):
+        yield token_path
 
 
 @fixture
@@ -123,3 +127,172 @@ def test_init_token__no_token(response_mock):
     )
     with bad_response, raises(ValueError, match="No token found in response"):
         main.init_token("unittests@omnivector.solutions", "unit tests")
+
+
+@mark.freeze_time("2020-11-23 19:50:00")
+def test_init_token__atomic_write(dwf_jwt_token_response, token_cache_mock):
+    """
+    Is the token file replaced, without a temporary file left behind?
+    """
+    token_cache_mock.unlink()
+    with dwf_jwt_token_response, patch.object(
+        main.os, "replace", wraps=main.os.replace
+    ) as mock_replace:
+        main.init_token("unittests@omnivector.solutions", "unit tests")
+
+    mock_replace.assert_called_once()
+    assert [path.name for path in token_cache_mock.parent.iterdir()] == [
+        "jobbergate.token"
+    ]
+    assert main.is_token_valid()
+
+
+def test_refresh_token__single_flight(dwf_jwt_token, token_cache_mock):
+    """
+    When many workers find the token expired at once, does only one log in, and do
+    the others reuse its token?
+    """
+    token_cache_mock.unlink()
+    logins = []
+
+    def init_token(username, password):
+        logins.append(username)
+        time.sleep(0.2)
+        token_cache_mock.write_text(dwf_jwt_token["raw"])
+
+    with patch.object(main, "init_token", side_effect=init_token), patch.object(
+        main, "is_token_valid", side_effect=token_cache_mock.exists
+    ):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            refreshed = list(
+                executor.map(
+                    lambda i: main.refresh_token(f"worker-{i}", "secret"), range(8)
+                )
+            )
+
+    assert len(logins) == 1
+    assert refreshed.count(True) == 1
+
+
+def test_token_lock__timeout(token_cache_mock):
+    """
+    Does a process go on without the lock when it is held for too long?
+    """
+
+    def take_lock():
+        with main.token_lock(timeout=0.1) as locked:
+            return locked
+
+    with main.token_lock() as locked:
+        assert locked
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(take_lock).result() is False
+    assert take_lock() is True
+
+
+def test_create_job_submission__array_max_concurrent_needs_param_file():
+    """
+    Is --array-max-concurrent without --array-param-file a usage error?
+    """
+    result = CliRunner().invoke(
+        main.create_job_submission,
+        ["--job-script-id", "1", "--array-max-concurrent", "2"],
+        obj={},
+    )
+    assert result.exit_code == 2
+    assert "--array-max-concurrent must be used with --array-param-file" in (
+        result.output
+    )
+
+
+def test_create_job_script__dry_run_is_offline(tmp_path):
+    """
+    Does create-job-script --dry-run run without logging in?
+    """
+    with patch.object(main, "is_token_valid") as is_token_valid, patch.object(
+        main, "init_logs"
+    ), patch.object(
+        main.JobbergateApi,
+        "create_job_script",
+        return_value={"application.sh": "#!/bin/bash"},
+    ) as create_job_script:
+        result = CliRunner().invoke(
+            main.main,
+            [
+                "--format",
+                "jsonl",
+                "create-job-script",
+                "--application-path",
+                str(tmp_path),
+                "--dry-run",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    is_token_valid.assert_not_called()
+    assert create_job_script.call_args[1]["dry_run"] is True
+
+
+@mark.parametrize(
+    "args",
+    [
+        ["--id", "1", "--ids", "2-3"],
+        ["--id", "1", "--older-than", "30d"],
+        ["--ids", "2-3", "--workers", "0"],
+    ],
+)
+def test_delete_job_script__invalid_selection(args):
+    """
+    Are --id with a bulk selection, and no workers, usage errors?
+    """
+    result = CliRunner().invoke(main.delete_job_script, args, obj={"api": None})
+    assert result.exit_code == 2
+
+
+@mark.parametrize(
+    "args",
+    [
+        ["--interval", "0"],
+        ["--max-interval", "-1"],
+        ["--interval", "10", "--max-interval", "5"],
+    ],
+)
+def test_watch_job_submissions__invalid_intervals(args):
+    result = CliRunner().invoke(main.watch_job_submissions, args, obj={"api": None})
+    assert result.exit_code == 2
+
+
+def test_create_job_submission__jsonl_stdout(tmp_path, monkeypatch, capsys):
+    """
+    Does stdout of a submission with --format jsonl only hold the JSON response?
+    """
+    monkeypatch.chdir(tmp_path)
+    api = main.JobbergateApi(
+        token="dummy-token",
+        job_submission_config={},
+        api_endpoint="https://jobbergate-api-staging.omnivector.solutions",
+        user_id=1,
+    )
+    api.remember_entity("application", {"id": 7, "application_name": "dummy-app"})
+    api.remember_entity(
+        "job-script",
+        {
+            "id": 13,
+            "application": 7,
+            "job_script_name": "dummy",
+            "job_script_data_as_string": json.dumps({"application.sh": "#!/bin/bash"}),
+        },
+    )
+    with patch.object(
+        api, "jobbergate_request", return_value={"id": 1, "slurm_job_id": "42"}
+    ), patch.object(api.sbatch, "submit", return_value="42"):
+        with click.Context(
+            main.create_job_submission, obj={"api": api, "format": "jsonl"}
+        ) as ctx:
+            ctx.invoke(main.create_job_submission, job_script_id=13)
+
+    captured = capsys.readouterr()
+    assert [json.loads(line) for line in captured.out.splitlines()] == [
+        {"id": 1, "slurm_job_id": "42"}
+    ]
+    assert "Submitted batch job 42" in captured.err
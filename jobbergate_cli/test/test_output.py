@@ -0,0 +1,131 @@
+"""
+Tests of the output formats of the CLI commands
+"""
+import io
+import json
+
+from pytest import mark
+from tabulate import tabulate
+
+from jobbergate_cli.output import ProgressLine, write_response, write_table
+
+
+ROWS = [
+    dict(id=1, name="first", data={"a": [1, 2]}),
+    dict(id=22, name="second, with comma", data=None),
+]
+
+
+def written(response, output_format):
+    stream = io.StringIO()
+    write_response(response, output_format, stream=stream)
+    return stream.getvalue()
+
+
+def test_write_response__jsonl():
+    """
+    Is every row written as a line of JSON?
+    """
+    assert [json.loads(line) for line in written(ROWS, "jsonl").splitlines()] == ROWS
+
+
+@mark.parametrize(
+    "output_format,expected",
+    [
+        (
+            "csv",
+            'id,name,data\n1,first,"{""a"":[1,2]}"\n22,"second, with comma",\n',
+        ),
+        (
+            "tsv",
+            'id\tname\tdata\n1\tfirst\t"{""a"":[1,2]}"\n22\tsecond, with comma\t\n',
+        ),
+    ],
+)
+def test_write_response__delimited(output_format, expected):
+    """
+    Are rows written with a header line and nested values as JSON?
+    """
+    assert written(ROWS, output_format) == expected
+
+
+def test_write_response__raw_and_dict():
+    """
+    Do raw output and single objects look as they did before the formats existed?
+    """
+    assert written(ROWS, "raw") == json.dumps(ROWS, indent=2) + "\n"
+    assert written(ROWS[0], "table") == tabulate(ROWS[0].items()) + "\n"
+    assert (
+        written(ROWS[0], "jsonl") == json.dumps(ROWS[0], separators=(",", ":")) + "\n"
+    )
+    assert written("plain text", "csv") == "plain text\n"
+
+
+def test_write_response__raw_non_ascii():
+    """
+    Are non-ASCII characters written unescaped in raw output?
+    """
+    rows = [dict(id=1, name="café")]
+    assert written(rows, "raw") == json.dumps(rows, indent=2, ensure_ascii=False) + "\n"
+
+
+def test_write_table__small_listing_uses_tabulate():
+    """
+    Are listings shorter than the sample printed by tabulate?
+    """
+    assert written(ROWS, "table") == tabulate(ROWS, headers="keys") + "\n"
+
+
+def test_write_table__sizes_columns_from_sample():
+    """
+    Are long listings aligned on the sample, with numbers to the right?
+    """
+    rows = [
+        dict(id=1, name="a"),
+        dict(id=200, name="bb"),
+        dict(id=3, name="ccc"),
+        dict(id=4, name="longer"),
+    ]
+    stream = io.StringIO()
+    write_table(rows, stream, sample_size=2)
+    assert stream.getvalue().splitlines() == [
+        " id  name",
+        "---  ----",
+        "  1  a",
+        "200  bb",
+        "  3  ccc",
+        "  4  longer",
+    ]
+
+
+@mark.parametrize("output_format", ["table", "raw", "jsonl", "csv", "tsv"])
+def test_write_response__streams_rows(output_format):
+    """
+    Is output written before the last row is produced?
+    """
+    stream = io.StringIO()
+
+    def rows():
+        for id_ in range(2000):
+            yield dict(id=id_, name=f"row {id_}")
+        # the first rows reached the stream before this generator ends
+        assert stream.tell() > 0
+
+    write_response(rows(), output_format, stream=stream)
+    assert "row 1999" in stream.getvalue()
+
+
+def test_progress_line__not_a_terminal():
+    """
+    Is progress written every tenth of the batch when stderr is not a terminal?
+    """
+    stream = io.StringIO()
+    progress = ProgressLine(100, "Deleted", stream=stream)
+    for done in range(1, 101):
+        progress.update(done, failed=1 if done > 50 else 0)
+    progress.finish()
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 10
+    assert lines[0] == "Deleted 10/100"
+    assert lines[-1] == "Deleted 99/100, 1 failed"
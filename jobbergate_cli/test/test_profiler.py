@@ -0,0 +1,98 @@
+"""
+Tests of the workflow profiler
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from jobbergate_cli import appform, jobbergate_api_wrapper
+from jobbergate_cli.profiler import WorkflowProfiler
+
+
+def test_stage__records_only_when_enabled():
+    """
+    Are stages recorded in order, even when they raise, and only when enabled?
+    """
+    profiler = WorkflowProfiler()
+    with profiler.stage("first"):
+        pass
+    try:
+        with profiler.stage("failing"):
+            raise ValueError()
+    except ValueError:
+        pass
+    assert [name for name, _ in profiler.stages] == ["first", "failing"]
+
+    disabled = WorkflowProfiler(enabled=False)
+    with disabled.stage("ignored"):
+        pass
+    assert disabled.stages == []
+
+
+def test_report_and_format(tmp_path):
+    """
+    Are the stages written as a table and as a JSON report?
+    """
+    profiler = WorkflowProfiler()
+    profiler.stages = [("download application", 0.5), ("workflow mainflow", 1.5)]
+
+    lines = profiler.format().splitlines()
+    assert lines[1].split() == ["download", "application", "0.500", "25.0%"]
+    assert lines[-2].split() == ["summed", "stages", "2.000"]
+    assert lines[-1].split() == ["wall", "2.000"]
+
+    path = tmp_path / "profile" / "report.json"
+    profiler.write(path)
+    report = json.loads(path.read_text())
+    assert report["stage_seconds"] == report["wall_seconds"] == 2.0
+    assert report["stages"][1] == {"name": "workflow mainflow", "seconds": 1.5}
+
+
+def test_wall_seconds__concurrent_stages():
+    """
+    Are concurrent stages summed separately from the wall time they span?
+    """
+    profiler = WorkflowProfiler()
+    barrier = threading.Barrier(4)
+
+    def upload():
+        with profiler.stage("upload"):
+            barrier.wait()
+            time.sleep(0.1)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(4):
+            executor.submit(upload)
+
+    assert profiler.stage_seconds() >= 0.4
+    assert 0.1 <= profiler.wall_seconds() < 0.3
+    share = profiler.format().splitlines()[1].split()[-1]
+    assert float(share.rstrip("%")) <= 100
+
+
+def test_run_workflow__profiles_each_step():
+    """
+    Is each workflow method timed separately?
+    """
+
+    class Application:
+        def mainflow(self, data):
+            data["nextworkflow"] = "second"
+            return [appform.Text("name", "Name?", default="n")]
+
+        def second(self, data):
+            return []
+
+    api = jobbergate_api_wrapper.JobbergateApi(
+        token="dummy-token", user_id=1, profiler=WorkflowProfiler()
+    )
+    with patch("builtins.print"):
+        api.run_workflow(Application(), {"jobbergate_config": {}}, {}, fast=True)
+    assert [name for name, _ in api.profiler.stages] == [
+        "workflow mainflow",
+        "resolve mainflow",
+        "workflow second",
+        "resolve second",
+    ]
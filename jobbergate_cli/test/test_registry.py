@@ -0,0 +1,143 @@
+"""
+Test the registries of jobbergate applications
+"""
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
+import textwrap
+import threading
+
+from jobbergate_cli import appform, jobbergate_api_wrapper, registry, workflow
+
+
+APPLICATION = """
+from jobbergate_cli import appform, workflow
+from jobbergate_cli.application_base import JobbergateApplicationBase
+
+
+@workflow.logic
+def pre_mainflow(data):
+    return {{"cluster": "{name}"}}
+
+
+@appform.workflow
+def extra(data):
+    return []
+
+
+class JobbergateApplication(JobbergateApplicationBase):
+    def mainflow(self, data):
+        return [appform.List("partition", "Partition?", choices=partitions)]
+
+
+def partitions():
+    return ["{name}-debug", "{name}-compute"]
+"""
+
+
+def load(tmp_path, name):
+    path = tmp_path / f"{name}.py"
+    path.write_text(textwrap.dedent(APPLICATION.format(name=name)))
+    return registry.exec_module(importlib.util.spec_from_file_location(name, path))
+
+
+def test_bound__nests_and_restores():
+    """
+    Is the previously active registry restored when a context is left?
+    """
+    outer = registry.ApplicationRegistry("outer")
+    inner = registry.ApplicationRegistry("inner")
+    assert registry.active() is registry.DEFAULT_REGISTRY
+    with registry.bound(outer):
+        with registry.bound(inner):
+            assert registry.active() is inner
+        assert registry.active() is outer
+    assert registry.active() is registry.DEFAULT_REGISTRY
+
+
+def test_bound__is_per_thread():
+    """
+    Does binding a registry in one thread leave the other threads alone?
+    """
+    bound = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def other_thread():
+        bound.wait(timeout=5)
+        seen.append(registry.active())
+        release.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with registry.bound(registry.ApplicationRegistry()):
+        bound.set()
+        release.wait(timeout=5)
+    thread.join()
+    assert seen == [registry.DEFAULT_REGISTRY]
+
+
+def test_exec_module__isolates_applications(tmp_path):
+    """
+    Does each application module, even the same one loaded twice, get its own
+    workflows, hooks and choices?
+    """
+    first = load(tmp_path, "first")
+    second = load(tmp_path, "second")
+    again = load(tmp_path, "first")
+
+    registries = [registry.of_module(module) for module in (first, second, again)]
+    assert len({id(found) for found in registries}) == 3
+    for found in registries:
+        assert list(found.prefuncs) == ["mainflow"]
+        assert list(found.workflows) == ["extra"]
+
+    assert workflow.prefuncs == {} and appform.workflows == {}
+    assert registry.of_module(object()) is registry.DEFAULT_REGISTRY
+
+
+def test_run_workflow__evaluates_applications_concurrently(tmp_path):
+    """
+    Do applications evaluated at once in a thread pool keep their own answers?
+    """
+    modules = [load(tmp_path, f"app{index}") for index in range(4)]
+    api = jobbergate_api_wrapper.JobbergateApi(token="dummy-token", user_id=1)
+
+    def evaluate(module):
+        param_dict = {"jobbergate_config": {}, "application_config": {}}
+        application = module.JobbergateApplication(param_dict)
+        error = api.run_workflow(
+            application,
+            param_dict,
+            {"partition": "debug"},
+            fast=True,
+            interactive=False,
+            application_registry=registry.of_module(module),
+        )
+        assert error is None
+        question = application.mainflow({})[0]
+        with registry.bound(registry.of_module(module)):
+            choices = question.get_choices()
+        return param_dict["jobbergate_config"]["cluster"], choices
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(evaluate, modules * 5))
+
+    for module, (cluster, choices) in zip(modules * 5, results):
+        name = module.__name__
+        assert cluster == name
+        assert choices == [f"{name}-debug", f"{name}-compute"]
+    for module in modules:
+        assert list(registry.of_module(module).provided_choices.values()) == [
+            [f"{module.__name__}-debug", f"{module.__name__}-compute"]
+        ]
+
+
+def test_exec_source__imports_without_files():
+    """
+    Is an application imported from its source with a registry of its own?
+    """
+    source = textwrap.dedent(APPLICATION.format(name="inline"))
+    module = registry.exec_source(source, "JobbergateApplication", "jobbergate.py")
+    assert module.partitions() == ["inline-debug", "inline-compute"]
+    assert list(registry.of_module(module).prefuncs) == ["mainflow"]
+    assert workflow.prefuncs == {}
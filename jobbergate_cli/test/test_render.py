@@ -0,0 +1,97 @@
+"""
+Tests of the local job script renderer
+"""
+from unittest.mock import patch
+
+from pytest import fixture, importorskip, raises
+
+from jobbergate_cli import render
+
+
+importorskip("jinja2")
+
+
+@fixture
+def application_dir(tmp_path):
+    """
+    A minimal application directory with a main template and a supporting file
+    """
+    application_path = tmp_path / "app"
+    templates = application_path / "templates"
+    templates.mkdir(parents=True)
+    (application_path / "jobbergate.py").write_text("# module")
+    (application_path / "jobbergate.yaml").write_text("# config")
+    (templates / "job.j2").write_text("#!/bin/bash\necho {{ data.greeting }}\n")
+    (templates / "input.j2").write_text("size={{ data.size }}\n")
+    return application_path
+
+
+@fixture
+def param_dict():
+    return {
+        "application_config": {"greeting": "hello"},
+        "jobbergate_config": {
+            "default_template": "templates/job.j2",
+            "supporting_files": ["input.j2"],
+            "supporting_files_output_name": {"input.j2": ["input.dat"]},
+            "size": 3,
+        },
+    }
+
+
+def test_render_job_script(application_dir, param_dict):
+    rendered = render.render_job_script(
+        application_dir / "templates", param_dict, ["-N 10"]
+    )
+    assert rendered == {
+        "application.sh": "#!/bin/bash\n#SBATCH -N 10\necho hello",
+        "input.dat": "size=3",
+    }
+
+
+def test_render_job_script__no_default_template(application_dir):
+    with raises(render.RenderError, match="default_template"):
+        render.render_job_script(application_dir / "templates", {})
+
+
+def test_render_cached(application_dir, param_dict, tmp_path):
+    """
+    Is the same rendering served from the cache until the application changes?
+    """
+    cache_dir = tmp_path / "cache"
+    first = render.render_cached(application_dir, param_dict, cache_dir=cache_dir)
+
+    with patch.object(render, "render_job_script") as mock_render:
+        assert (
+            render.render_cached(application_dir, param_dict, cache_dir=cache_dir)
+            == first
+        )
+        mock_render.assert_not_called()
+
+    (application_dir / "templates" / "job.j2").write_text("#!/bin/bash\necho bye\n")
+    assert (
+        render.render_cached(application_dir, param_dict, cache_dir=cache_dir) != first
+    )
+
+
+def test_write_rendered_files(tmp_path):
+    """
+    Are the files of a stored job script written one by one, and kept inside the
+    output directory?
+    """
+    files = render.rendered_files('{"application.sh": "#!/bin/bash", "in/deck": "x"}')
+    paths = render.write_rendered_files(
+        files, tmp_path / "out", rename={"application.sh": "job.sh"}
+    )
+    assert [p.relative_to(tmp_path).as_posix() for p in paths] == [
+        "out/job.sh",
+        "out/in/deck",
+    ]
+    assert (tmp_path / "out" / "in" / "deck").read_text() == "x"
+
+    with raises(render.RenderError, match="outside"):
+        render.write_rendered_files([("../escape", "x")], tmp_path / "out")
+    assert not (tmp_path / "escape").exists()
+
+    with raises(ValueError):
+        render.rendered_files("[]")
@@ -0,0 +1,123 @@
+"""
+Tests of the non-interactive resolution of workflow answers
+"""
+import subprocess
+import sys
+
+from jobbergate_cli import appform
+from jobbergate_cli.resolver import resolve
+
+
+def plan_of(*questions):
+    return appform.compile_questions(list(questions))
+
+
+def test_resolve__supplied_defaults_and_consts():
+    """
+    Are supplied answers preferred to defaults, and Const values always set?
+    """
+    resolution = resolve(
+        plan_of(
+            appform.Text("name", "Name?", default="default-name"),
+            appform.Integer("size", "Size?", default=2),
+            appform.Const("kind", default="batch"),
+            appform.Text("tag", "Tag?"),
+        ),
+        supplied=dict(name="given"),
+        use_defaults=True,
+    )
+    assert resolution.answers == dict(name="given", size=2, kind="batch")
+    assert resolution.defaulted == ["size"]
+    assert [question.variablename for question, _ in resolution.deferred] == ["tag"]
+    assert resolution.missing == resolution.invalid == []
+
+
+def test_resolve__checks_answers(tmp_path):
+    """
+    Are integers and paths checked as the prompts would check them?
+    """
+    resolution = resolve(
+        plan_of(
+            appform.Integer("size", "Size?", minval=1, maxval=4),
+            appform.Integer("count", "Count?"),
+            appform.File("input", "Input?", exists=True),
+            appform.Directory("workdir", "Workdir?", exists=True),
+        ),
+        supplied=dict(
+            size=5, count="many", input=str(tmp_path / "missing"), workdir=str(tmp_path)
+        ),
+        use_defaults=False,
+        interactive=False,
+    )
+    assert resolution.invalid == [
+        "size=5 is not an accepted integer",
+        "count='many' is not an accepted integer",
+        f"input: file {tmp_path / 'missing'} does not exist",
+    ]
+
+
+def test_resolve__follows_boolean_lists():
+    """
+    Are only the questions of the chosen branches resolved or reported missing?
+    """
+    plan = plan_of(
+        appform.BooleanList(
+            "gpu",
+            "GPU?",
+            whentrue=[appform.Integer("gpus", "How many?")],
+            whenfalse=[appform.Text("cpus", "Which CPUs?", default="all")],
+        )
+    )
+
+    resolution = resolve(plan, dict(gpu=True), use_defaults=True, interactive=False)
+    assert resolution.missing == ["gpus"]
+    assert resolution.answers == dict(gpu=True, cpus="all")
+
+    resolution = resolve(plan, dict(gpu=False), use_defaults=True, interactive=False)
+    assert resolution.missing == []
+    assert resolution.answers == dict(gpu=False, cpus="all", gpus=None)
+
+
+def test_resolve__defers_branches_of_unanswered_boolean_lists():
+    """
+    Are branches left to the prompts when their BooleanList has to be asked?
+    """
+    resolution = resolve(
+        plan_of(
+            appform.BooleanList(
+                "gpu",
+                "GPU?",
+                whentrue=[appform.Integer("gpus", "How many?", default=1)],
+            ),
+            appform.Text("name", "Name?", default="job"),
+        ),
+        supplied={},
+        use_defaults=False,
+    )
+    assert [question.variablename for question, _ in resolution.deferred] == [
+        "gpu",
+        "gpus",
+        "name",
+    ]
+
+
+def test_run_workflow__headless_does_not_import_inquirer():
+    """
+    Does a fully answered workflow run without loading the prompt library?
+    """
+    script = """
+import sys
+from jobbergate_cli import appform
+from jobbergate_cli.jobbergate_api_wrapper import JobbergateApi
+
+class Application:
+    def mainflow(self, data):
+        return [appform.Integer("size", "Size?", default=1), appform.Text("tag", "Tag?")]
+
+api = JobbergateApi(token="dummy-token", user_id=1)
+param_dict = {"jobbergate_config": {}}
+assert api.run_workflow(Application(), param_dict, {"tag": "t"}, fast=True) is None
+assert param_dict["jobbergate_config"] == {"size": 1, "tag": "t"}
+assert "inquirer" not in sys.modules
+"""
+    subprocess.run([sys.executable, "-c", script], check=True)
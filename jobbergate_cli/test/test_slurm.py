@@ -0,0 +1,179 @@
+"""
+Tests of the Slurm command execution layer
+"""
+from pathlib import Path
+import sys
+
+from pytest import fixture, mark, raises
+
+from jobbergate_cli import slurm
+
+
+FAKE_SBATCH = Path(__file__).parent / "fake_sbatch.py"
+
+
+@fixture
+def fake_sbatch(tmp_path, monkeypatch):
+    """
+    An executable sbatch stand-in that logs its calls next to its state file
+    """
+    sbatch_path = tmp_path / "sbatch"
+    sbatch_path.write_text(f'#!/bin/sh\nexec {sys.executable} {FAKE_SBATCH} "$@"\n')
+    sbatch_path.chmod(0o755)
+    monkeypatch.setenv("FAKE_SBATCH_STATE", str(tmp_path / "state"))
+    monkeypatch.setenv("FAKE_SBATCH_LOG", str(tmp_path / "calls.log"))
+    return sbatch_path
+
+
+@mark.parametrize(
+    "output,expected",
+    [
+        ["1234\n", "1234"],
+        ["1234;cluster-a\n", "1234"],
+        ["sbatch: warning: something\n1234\n", "1234"],
+        ["Submitted batch job 1234\n", "1234"],
+    ],
+    ids=["parsable", "parsable-cluster", "warning-first", "human"],
+)
+def test_parse_job_id(output, expected):
+    assert slurm.parse_job_id(output) == expected
+
+
+def test_parse_job_id__no_job_id():
+    with raises(slurm.SbatchError, match="Could not find a job id"):
+        slurm.parse_job_id("Soumis le travail par lots\n")
+
+
+def test_submit(fake_sbatch, tmp_path):
+    executor = slurm.SbatchExecutor(sbatch_path=str(fake_sbatch))
+    assert executor.submit("job.sh", "app", sbatch_args=["--array=0-3"]) == "1"
+    assert executor.submit("job.sh") == "2"
+    calls = (tmp_path / "calls.log").read_text().splitlines()
+    assert calls == ["--parsable --array=0-3 job.sh app", "--parsable job.sh"]
+
+
+def test_submit__failure(fake_sbatch, monkeypatch):
+    monkeypatch.setenv("FAKE_SBATCH_FAIL", "Invalid account")
+    executor = slurm.SbatchExecutor(sbatch_path=str(fake_sbatch))
+    with raises(slurm.SbatchError, match="Invalid account"):
+        executor.submit("job.sh")
+
+
+def test_submit__timeout(fake_sbatch, monkeypatch):
+    monkeypatch.setenv("FAKE_SBATCH_SLEEP", "5")
+    executor = slurm.SbatchExecutor(sbatch_path=str(fake_sbatch), timeout=0.5)
+    with raises(slurm.SbatchError, match="did not finish"):
+        executor.submit("job.sh")
+
+
+def test_submit__missing_sbatch(tmp_path):
+    executor = slurm.SbatchExecutor(sbatch_path=str(tmp_path / "missing"))
+    with raises(FileNotFoundError):
+        executor.submit("job.sh")
+
+
+@fixture
+def fake_query_tools(tmp_path):
+    """
+    Canned squeue and sacct executables that log their arguments
+    """
+
+    def make(name, output):
+        path = tmp_path / name
+        (tmp_path / f"{name}.out").write_text(output)
+        path.write_text(
+            f'#!/bin/sh\necho "$@" >> {tmp_path}/{name}.log\ncat {tmp_path}/{name}.out\n'
+        )
+        path.chmod(0o755)
+        return str(path)
+
+    return make
+
+
+def test_query_job_states(fake_query_tools, tmp_path):
+    """
+    Are all jobs looked up with one squeue call, and finished ones with one sacct call?
+    """
+    squeue = fake_query_tools(
+        "squeue", "1|RUNNING\n2_0|COMPLETED\n2_1|PENDING\n2_2|RUNNING\n"
+    )
+    sacct = fake_query_tools("sacct", "3|CANCELLED by 1000\n")
+
+    states = slurm.query_job_states(
+        ["1", "2", "3", 4], squeue_path=squeue, sacct_path=sacct
+    )
+
+    assert states == {"1": "RUNNING", "2": "RUNNING", "3": "CANCELLED", "4": "UNKNOWN"}
+    assert (tmp_path / "squeue.log").read_text().splitlines() == [
+        "--noheader --states=all --format=%i|%T --jobs=1,2,3,4"
+    ]
+    assert (tmp_path / "sacct.log").read_text().splitlines() == [
+        "--noheader --parsable2 --allocations --format=JobID,State --jobs=3,4"
+    ]
+
+
+def test_query_job_states__no_slurm(tmp_path):
+    states = slurm.query_job_states(
+        ["1"], squeue_path=str(tmp_path / "nope"), sacct_path=str(tmp_path / "nope")
+    )
+    assert states == {}
+
+
+def test_query_job_states__failed_query(fake_query_tools, tmp_path):
+    """
+    Are the jobs of a failed query left out, and jobs that left the queue looked up?
+    """
+    squeue = fake_query_tools("squeue", "1|RUNNING\n")
+    sacct = fake_query_tools("sacct", "")
+    (tmp_path / "sacct").write_text(
+        "#!/bin/sh\necho 'connection refused' >&2\nexit 1\n"
+    )
+    assert slurm.query_job_states(["1", "2"], squeue_path=squeue, sacct_path=sacct) == {
+        "1": "RUNNING"
+    }
+
+    (tmp_path / "squeue").write_text(
+        "#!/bin/sh\necho 'slurm_load_jobs error: Invalid job id specified' >&2\nexit 1\n"
+    )
+    sacct = fake_query_tools("sacct", "2|COMPLETED\n")
+    assert slurm.query_job_states(["2", "3"], squeue_path=squeue, sacct_path=sacct) == {
+        "2": "COMPLETED",
+        "3": "UNKNOWN",
+    }
+
+
+def test_job_state_watcher():
+    """
+    Are only transitions reported, finished and unobserved jobs kept as they were,
+    and the interval adapted?
+    """
+    ticks = iter(
+        [
+            {"1": "PENDING", "2": "RUNNING"},
+            # a failed query observes nothing
+            {},
+            {"1": "RUNNING", "2": "COMPLETED"},
+            {"1": "COMPLETED"},
+        ]
+    )
+    queried = []
+
+    def query(job_ids):
+        queried.append(sorted(job_ids))
+        return next(ticks)
+
+    sleeps = []
+    watcher = slurm.JobStateWatcher(
+        [1, 2], min_interval=2, max_interval=3, backoff=2, query=query
+    )
+    transitions = list(watcher.watch(sleep=sleeps.append))
+
+    assert transitions == [
+        [("1", None, "PENDING"), ("2", None, "RUNNING")],
+        [],
+        [("1", "PENDING", "RUNNING"), ("2", "RUNNING", "COMPLETED")],
+        [("1", "RUNNING", "COMPLETED")],
+    ]
+    assert queried == [["1", "2"], ["1", "2"], ["1", "2"], ["1"]]
+    assert sleeps == [2, 3, 2]
+    assert watcher.done
@@ -0,0 +1,146 @@
+"""
+Test the pre and post functions of workflows
+"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from unittest.mock import patch
+
+from pytest import raises
+
+from jobbergate_cli import appform, jobbergate_api_wrapper, registry, workflow
+
+
+def test_hook_runner__merges_values_in_order():
+    """
+    Do the values of pre and post functions get merged, the ones for all workflows first?
+    """
+    seen = []
+    pre = {
+        "": lambda data: {"a": 1, "b": 1},
+        "step": lambda data: seen.append(data) or {"b": 2},
+    }
+    post = {"step": lambda data: {"c": 3}, "other": lambda data: None}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        hooks = workflow.HookRunner(executor, pre=pre, post=post)
+        data = {"x": 1}
+        hooks.start_pre("", data)
+        hooks.start_pre("step", data)
+        hooks.start_pre("unknown", data)
+        data["x"] = 2
+        assert hooks.waiting_pre("step")
+        assert hooks.finish_pre("step") == {"a": 1, "b": 2}
+        assert not hooks.waiting_pre("step")
+        assert hooks.finish_pre("step") == {}
+
+        hooks.start_post("step", data)
+        hooks.start_post("other", data)
+        assert hooks.waiting_post()
+        assert hooks.finish_post() == {"c": 3}
+        assert not hooks.waiting_post()
+
+    # the functions get a snapshot of the data
+    assert seen == [{"x": 1}]
+
+
+def test_hook_runner__binds_the_registry():
+    """
+    Do the functions run with the registry active when the runner was created?
+    """
+    application_registry = registry.ApplicationRegistry("app")
+    with ThreadPoolExecutor(max_workers=1) as executor, registry.bound(
+        application_registry
+    ):
+        hooks = workflow.HookRunner(
+            executor, pre={"step": lambda data: {"seen": registry.active()}}, post={}
+        )
+        hooks.start_pre("step", {})
+        assert hooks.finish_pre("step") == {"seen": application_registry}
+
+
+def test_hook_runner__wraps_failures():
+    """
+    Does a failing function raise a HookError naming its workflow?
+    """
+
+    def broken(data):
+        raise RuntimeError("no cluster")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        hooks = workflow.HookRunner(executor, pre={"step": broken}, post={})
+        hooks.start_pre("step", {})
+        with raises(workflow.HookError, match="pre function of workflow 'step'"):
+            hooks.finish_pre("step")
+
+
+def test_run_workflow__runs_hooks_concurrently():
+    """
+    Does the pre function of the next step run while the current step is answered,
+    and are the returned values seen by the workflow?
+    """
+    started = threading.Event()
+
+    def pre_second(data):
+        started.set()
+        return {"partitions": ["debug", "compute"]}
+
+    class Application:
+        def mainflow(self, data):
+            data["nextworkflow"] = "second"
+            return [appform.Text("name", "Name?", default="n")]
+
+        def second(self, data):
+            assert data["partitions"] == ["debug", "compute"]
+            return []
+
+    def resolve(*args, **kwargs):
+        # the first step is still being answered
+        assert started.wait(timeout=5)
+        return original_resolve(*args, **kwargs)
+
+    original_resolve = jobbergate_api_wrapper.resolver.resolve
+    hooks = registry.ApplicationRegistry()
+    with registry.bound(hooks):
+        workflow.logic(pre_second)
+
+        @workflow.logic
+        def post_(data):
+            return {"summary": data["name"]}
+
+    api = jobbergate_api_wrapper.JobbergateApi(token="dummy-token", user_id=1)
+    param_dict = {"jobbergate_config": {}}
+    with patch.object(jobbergate_api_wrapper.resolver, "resolve", resolve), patch(
+        "builtins.print"
+    ):
+        assert (
+            api.run_workflow(
+                Application(), param_dict, {}, fast=True, application_registry=hooks
+            )
+            is None
+        )
+    assert param_dict["jobbergate_config"]["summary"] == "n"
+    # nothing leaked into the registrations made outside of applications
+    assert workflow.prefuncs == {} and workflow.postfuncs == {}
+
+
+def test_run_workflow__reports_failing_hook():
+    """
+    Is a failing post function reported as an error?
+    """
+
+    class Application:
+        def mainflow(self, data):
+            return []
+
+    hooks = registry.ApplicationRegistry()
+    with registry.bound(hooks):
+
+        @workflow.logic
+        def post_mainflow(data):
+            raise ValueError("bad answers")
+
+    api = jobbergate_api_wrapper.JobbergateApi(token="dummy-token", user_id=1)
+    with registry.bound(hooks):
+        response = api.run_workflow(Application(), {"jobbergate_config": {}}, {}, True)
+    assert "post function of workflow 'mainflow' failed: bad answers" in (
+        response["error"]
+    )
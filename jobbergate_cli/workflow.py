@@ -2,19 +2,24 @@
 Workflow
 ========
 
-Work flow module that could add pre and post functions to workflows"""
+Work flow module that could add pre and post functions to workflows
 
-
-#
-# THIS FILE IS PROBABLY NOT IN USE/DEPRECATED
-# https://www.pivotaltracker.com/n/projects/2450975/stories/175750071
-#
+Pre functions of a workflow step start on a thread pool as soon as the step is
+known, which is while the questions of the previous step are being answered. Post
+functions start once the answers of their step are collected. Each function gets a
+copy of the answers so far, and may return a dict of values to add to them: the
+values of pre functions are added before the step's method is called, the ones of
+post functions once every step is done."""
 
 from functools import partial, wraps
 
+from jobbergate_cli import registry
+
 
-prefuncs = {}
-postfuncs = {}
+# registrations made outside of any application; see registry.active for the
+# registrations of the application being evaluated
+prefuncs = registry.DEFAULT_REGISTRY.prefuncs
+postfuncs = registry.DEFAULT_REGISTRY.postfuncs
 
 
 def logic(func=None, *, name=None, prepost=None):
@@ -70,11 +75,93 @@ def logic(func=None, *, name=None, prepost=None):
             prepost = "post"
 
     if prepost == "pre":
-        prefuncs[name] = func
+        registry.active().prefuncs[name] = func
         return wrapper
 
     if prepost == "post":
-        postfuncs[name] = func
+        registry.active().postfuncs[name] = func
         return wrapper
 
     raise NameError
+
+
+class HookError(Exception):
+    """Raised when a pre or post function of a workflow fails."""
+
+
+def _hook_result(prepost, name, future):
+    try:
+        result = future.result()
+    except Exception as err:
+        raise HookError(
+            f"The {prepost} function of workflow '{name or '*'}' failed: {err}"
+        ) from err
+    return result if isinstance(result, dict) else {}
+
+
+class HookRunner:
+    """
+    Run the pre and post functions of workflows on a thread pool.
+
+    The functions run with the registry that was active when the runner was
+    created, so the registrations they make or look up stay with their application.
+
+    :param executor: Executor the functions are submitted to
+    :param pre: Pre functions by workflow name, defaults to the ones of the active
+                registry
+    :param post: Post functions by workflow name, defaults to the ones of the active
+                 registry
+    """
+
+    def __init__(self, executor, pre=None, post=None):
+        self.executor = executor
+        self.registry = registry.active()
+        self.pre = self.registry.prefuncs if pre is None else pre
+        self.post = self.registry.postfuncs if post is None else post
+        self._pre_futures = {}
+        self._post_futures = []
+
+    def _submit(self, func, data):
+        return self.executor.submit(self._call, func, dict(data))
+
+    def _call(self, func, data):
+        with registry.bound(self.registry):
+            return func(data)
+
+    def start_pre(self, name, data):
+        """Start the pre function of a workflow, unless it is already running."""
+        func = self.pre.get(name)
+        if func is not None and self._pre_futures.get(name) is None:
+            self._pre_futures[name] = self._submit(func, data)
+
+    def waiting_pre(self, name):
+        """Whether pre functions for this workflow, or for all, were started."""
+        return any(self._pre_futures.get(key) is not None for key in ("", name))
+
+    def finish_pre(self, name):
+        """Wait for the pre functions of a workflow, and return their values."""
+        values = {}
+        for key in ("", name):
+            future = self._pre_futures.get(key)
+            if future is not None:
+                self._pre_futures[key] = None
+                values.update(_hook_result("pre", key, future))
+        return values
+
+    def start_post(self, name, data):
+        """Start the post function of a workflow."""
+        func = self.post.get(name)
+        if func is not None:
+            self._post_futures.append((name, self._submit(func, data)))
+
+    def waiting_post(self):
+        """Whether post functions were started and not waited for yet."""
+        return bool(self._post_futures)
+
+    def finish_post(self):
+        """Wait for the started post functions, and return their values in order."""
+        values = {}
+        futures, self._post_futures = self._post_futures, []
+        for name, future in futures:
+            values.update(_hook_result("post", name, future))
+        return values